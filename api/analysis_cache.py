@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Analysis Result Cache
+Size-bounded LRU of pre-serialized /analyze responses, invalidated per
+country whenever the data source's latest period changes
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+# Bounds on cached analyses (whichever is hit first triggers eviction)
+MAX_ENTRIES = 256
+MAX_BYTES = 64 * 1024 * 1024
+
+
+class AnalysisResultCache:
+    """
+    LRU cache of serialized analysis responses
+    
+    Entries are grouped by country; a lookup with a different period than
+    the one the country's entries were computed for drops that country's
+    entries, so new data is never answered from stale results.
+    """
+    
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (country, body)
+        self._periods: Dict[str, str] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+    
+    def get(self, country: str, period: str, key: Hashable) -> Optional[bytes]:
+        """Return the cached body for key, or None"""
+        with self._lock:
+            if self._periods.get(country) != period:
+                self._invalidate(country)
+                self._periods[country] = period
+            
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, country: str, period: str, key: Hashable, body: bytes):
+        """Store a serialized response computed for period"""
+        with self._lock:
+            if self._periods.get(country) != period:
+                return  # Period moved on while this analysis ran
+            
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+            
+            self._entries[key] = (country, body)
+            self._bytes += len(body)
+            
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+    
+    def clear(self):
+        """Drop all cached analyses"""
+        with self._lock:
+            self._entries.clear()
+            self._periods.clear()
+            self._bytes = 0
+    
+    def _invalidate(self, country: str):
+        """Internal: Drop all entries for a country (lock held)"""
+        stale = [key for key, (entry_country, _) in self._entries.items() if entry_country == country]
+        for key in stale:
+            self._bytes -= len(self._entries.pop(key)[1])
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Analysis Job Queue
+Runs /analyze requests on a bounded background worker pool so large
+national analyses don't hold HTTP connections open
+"""
+import queue
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Worker threads running analyses
+DEFAULT_WORKERS = 4
+# Jobs waiting for a worker before submissions are rejected
+MAX_QUEUED_JOBS = 100
+# Finished jobs are kept this long (seconds) for status polling
+JOB_RETENTION = 3600
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity"""
+    pass
+
+
+@dataclass
+class AnalysisJob:
+    """A queued/running/finished analysis"""
+    id: str
+    key: Hashable
+    status: str = "queued"  # queued, running, completed, failed
+    stage: str = "queued"
+    progress: float = 0.0
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    submitted_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+    
+    def report_progress(self, stage: str, progress: float):
+        """Progress callback handed to the analysis"""
+        self.stage = stage
+        self.progress = progress
+
+
+class AnalysisJobQueue:
+    """
+    Bounded background worker pool for analyses
+    
+    Identical submissions (same key) while a job is queued or running are
+    deduplicated onto that job. Workers start lazily on first submit.
+    """
+    
+    def __init__(self, workers: int = DEFAULT_WORKERS, max_queued: int = MAX_QUEUED_JOBS,
+                 retention: float = JOB_RETENTION):
+        self.workers = workers
+        self.retention = retention
+        self.jobs: Dict[str, AnalysisJob] = {}
+        self.active: Dict[Hashable, AnalysisJob] = {}
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._lock = threading.Lock()
+        self._threads = []
+    
+    def submit(self, key: Hashable, fn: Callable[[Callable[[str, float], None]], Any]) -> AnalysisJob:
+        """
+        Queue fn(progress_callback) under key, or return the active job for key
+        
+        Raises QueueFullError if no more jobs can be queued.
+        """
+        with self._lock:
+            self._prune()
+            
+            job = self.active.get(key)
+            if job is not None:
+                return job
+            
+            job = AnalysisJob(id=uuid.uuid4().hex, key=key)
+            try:
+                self._queue.put_nowait((job, fn))
+            except queue.Full:
+                raise QueueFullError(f"Analysis queue is full ({self._queue.maxsize} jobs)")
+            
+            self.jobs[job.id] = job
+            self.active[key] = job
+            self._start_workers()
+            return job
+    
+    def get(self, job_id: str) -> Optional[AnalysisJob]:
+        """Look up a job by id"""
+        return self.jobs.get(job_id)
+    
+    def _start_workers(self):
+        """Internal: Start worker threads on first use"""
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._worker, name=f"analysis-worker-{len(self._threads)}",
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    def _worker(self):
+        """Internal: Run queued jobs until the process exits"""
+        while True:
+            job, fn = self._queue.get()
+            job.status = "running"
+            job.started_at = datetime.now()
+            
+            status, stage, progress = "completed", "completed", 1.0
+            try:
+                job.result = fn(job.report_progress)
+            except Exception as e:
+                job.error = getattr(e, 'detail', None) or str(e)
+                status, stage, progress = "failed", "failed", job.progress
+            finally:
+                # completed_at before status: a finished job always has one
+                with self._lock:
+                    job.completed_at = datetime.now()
+                    job.report_progress(stage, progress)
+                    job.status = status
+                    if self.active.get(job.key) is job:
+                        del self.active[job.key]
+                self._queue.task_done()
+    
+    def _prune(self):
+        """Internal: Drop finished jobs past the retention window (lock held)"""
+        cutoff = time.time() - self.retention
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished and job.completed_at is not None and job.completed_at.timestamp() < cutoff
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
@@ -0,0 +1,51 @@
+"""
+End-to-end API benchmarks through the in-process ASGI client, with the
+UK upstream stubbed
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("httpx")
+
+from conftest import api_module, make_openprescribing_get
+
+ANALYZE_BODY = {'company': 'Benchmark', 'drug_name': 'metformin', 'country': 'UK', 'top_n': 50}
+
+
+@pytest.fixture(scope='module', params=[1_000, 10_000], ids=lambda n: f"{n}")
+def client(request):
+    from fastapi.testclient import TestClient
+    data_sources_uk = api_module('data_sources_uk')
+    main = api_module('main')
+
+    monkeypatch = pytest.MonkeyPatch()
+    monkeypatch.setattr(data_sources_uk.requests, 'get', make_openprescribing_get(request.param))
+    with TestClient(main.app) as test_client:
+        yield test_client
+    monkeypatch.undo()
+
+
+def _clear_caches():
+    routes = api_module('routes')
+    routes.ANALYSIS_CACHE.clear()
+    routes.get_shared_cache().clear()
+
+
+def bench_health(benchmark, client):
+    assert benchmark(client.get, '/health').status_code == 200
+
+
+def bench_analyze_cold(benchmark, client):
+    """Full /analyze: stubbed upstream pull, scoring, serialization (caches cleared)"""
+    response = benchmark.pedantic(
+        client.post, args=('/analyze',), kwargs={'json': ANALYZE_BODY},
+        setup=_clear_caches, rounds=5, iterations=1
+    )
+    assert response.status_code == 200
+
+
+def bench_analyze_cached(benchmark, client):
+    """Memoized /analyze response"""
+    client.post('/analyze', json=ANALYZE_BODY)
+    response = benchmark(client.post, '/analyze', json=ANALYZE_BODY)
+    assert response.headers['X-Analysis-Cache'] == 'hit'
@@ -0,0 +1,67 @@
+"""
+Data source benchmarks: US cache file loading, drug search, geocoder
+cache loads and the UK pull path against a stubbed OpenPrescribing
+"""
+import os
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from conftest import API_DIR, SYNTHETIC_PERIOD, api_module, make_openprescribing_get
+
+US_CACHE_DRUG = 'metformin hcl'
+
+
+@pytest.fixture(scope='module')
+def us_source():
+    source = api_module('data_sources_us').USDataSource()
+    if not os.path.exists(os.path.join(API_DIR, 'cache', f"us_{US_CACHE_DRUG.replace(' ', '_')}_data.json")):
+        pytest.skip(f"US cache file for {US_CACHE_DRUG} not present")
+    return source
+
+
+def bench_us_cache_index(benchmark, us_source):
+    """Directory scan that builds the US drug index (runs on data source construction)"""
+    benchmark(us_source._load_available_drugs)
+    assert us_source.available_drugs
+
+
+def bench_us_cache_load(benchmark, us_source):
+    """Cold load of one drug's state aggregates from its cache file"""
+    def load():
+        us_source.cache.delete(f"us:prescribing:{US_CACHE_DRUG}:None")
+        return us_source.get_prescribing_data(US_CACHE_DRUG, '2023')
+
+    assert benchmark(load)
+
+
+@pytest.mark.parametrize('name', ['metformin', 'not-a-real-drug'])
+def bench_us_find_drug_code(benchmark, us_source, name):
+    """Exact match vs worst-case partial scan of the US drug index"""
+    benchmark(us_source.find_drug_code, name)
+
+
+@pytest.mark.parametrize('query', ['statin', 'metformin', 'zz'])
+def bench_common_drug_search(benchmark, query):
+    benchmark(api_module('common_drugs').search_drugs, query, 10)
+
+
+def bench_geocoder_cache_load(benchmark):
+    """Postcode cache file load (runs on every PostcodeGeocoder construction)"""
+    geocoder = api_module('postcode_geocoding').PostcodeGeocoder()
+    assert isinstance(benchmark(geocoder._load_cache), dict)
+
+
+@pytest.mark.parametrize('n', [1_000, 10_000])
+def bench_uk_pull_stubbed(benchmark, monkeypatch, n):
+    """UK spending_by_org pull + practice detail join, upstream stubbed, cache cleared each round"""
+    data_sources_uk = api_module('data_sources_uk')
+    monkeypatch.setattr(data_sources_uk.requests, 'get', make_openprescribing_get(n))
+    source = data_sources_uk.UKDataSource()
+
+    def pull():
+        source.cache.clear()
+        return source.get_prescribing_data('0601022B0', SYNTHETIC_PERIOD)
+
+    assert len(benchmark.pedantic(pull, rounds=5, iterations=1)) == n
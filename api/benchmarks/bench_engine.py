@@ -0,0 +1,73 @@
+"""
+Engine benchmarks: full analyze_drug, segmentation and scoring at
+100 / 1k / 10k / 100k synthetic prescribers
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from pharma_intelligence_engine import (
+    PharmaIntelligenceEngine, Segmenter, MarketShareScorer, SimpleVolumeScorer, RecommendationEngine
+)
+from conftest import SyntheticDataSource, make_opportunities
+
+
+def _rounds(n):
+    """Fewer rounds for the large sizes so the suite stays a few minutes"""
+    return 3 if n >= 100_000 else 10
+
+
+def bench_analyze_drug(benchmark, prescribing_data, drug):
+    engine = PharmaIntelligenceEngine(SyntheticDataSource(prescribing_data))
+    report = benchmark.pedantic(
+        engine.analyze_drug, args=(drug, 'UK'), kwargs={'top_n': 50},
+        rounds=_rounds(len(prescribing_data)), iterations=1
+    )
+    assert report['market_summary']['total_prescribers'] == len(prescribing_data)
+
+
+@pytest.mark.parametrize('n', [10_000, 100_000])
+@pytest.mark.parametrize('members', [False, True], ids=['counts', 'members'])
+def bench_segment(benchmark, n, members):
+    """Fused volume + opportunity segmentation, as run by analyze_drug (counts only)"""
+    opportunities = make_opportunities(n)
+    segmentation = benchmark(Segmenter.segment, opportunities, members)
+    assert sum(segmentation.by_opportunity.values()) == n
+
+
+@pytest.mark.parametrize('n', [10_000, 100_000])
+def bench_segment_by_volume(benchmark, n):
+    opportunities = make_opportunities(n)
+    segments = benchmark(Segmenter.segment_by_volume, opportunities)
+    assert sum(len(v) for v in segments.values()) == n
+
+
+@pytest.mark.parametrize('n', [10_000, 100_000])
+def bench_segment_by_opportunity(benchmark, n):
+    opportunities = make_opportunities(n)
+    segments = benchmark(Segmenter.segment_by_opportunity, opportunities)
+    assert sum(len(v) for v in segments.values()) == n
+
+
+@pytest.mark.parametrize('scorer', [MarketShareScorer(), SimpleVolumeScorer()], ids=lambda s: type(s).__name__)
+def bench_scorer(benchmark, scorer, prescribing_data):
+    total_volume = sum(p.prescriptions for p in prescribing_data)
+
+    def score_all():
+        return [
+            scorer.calculate_score(p, {'total_market_volume': total_volume, 'list_size': p.prescriber.list_size})
+            for p in prescribing_data
+        ]
+
+    scores = benchmark.pedantic(score_all, rounds=_rounds(len(prescribing_data)), iterations=1)
+    assert len(scores) == len(prescribing_data)
+
+
+@pytest.mark.parametrize('n', [10_000])
+def bench_recommendations(benchmark, n):
+    opportunities = make_opportunities(n)
+
+    def recommend_all():
+        return [RecommendationEngine.generate_recommendations(o, 'Diabetes') for o in opportunities]
+
+    assert len(benchmark(recommend_all)) == n
@@ -0,0 +1,157 @@
+"""
+Benchmark fixtures
+Deterministic synthetic prescribing data and stubbed upstream APIs, so
+benchmarks measure our code rather than the network
+"""
+import importlib
+import os
+import random
+import sys
+
+import pytest
+
+API_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, API_DIR)
+
+# Keep the app quiet and cold-start free when imported by API benchmarks
+os.environ.setdefault('WARMUP_ENABLED', '0')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+from pharma_intelligence_engine import (
+    DataSource, PrescribingData, Prescriber, OpportunityProfile, create_drug
+)
+
+PRESCRIBER_COUNTS = [100, 1_000, 10_000, 100_000]
+SYNTHETIC_DRUG_CODE = '0601022B0'
+SYNTHETIC_PERIOD = '2025-10-01'
+
+
+def api_module(name):
+    """
+    Import a module from api/
+
+    The repository root keeps older copies of the engine and
+    data_sources_*.py; fail loudly rather than benchmark one of those.
+    """
+    module = importlib.import_module(name)
+    if os.path.dirname(os.path.abspath(module.__file__)) != API_DIR:
+        raise ImportError(f"{name} resolved to {module.__file__}, not {API_DIR}")
+    return module
+
+
+# Imported above through sys.path; make sure it was api/'s engine
+api_module('pharma_intelligence_engine')
+
+
+def make_prescribing_data(n, seed=0):
+    """n synthetic GP practices with a long-tailed volume distribution"""
+    rng = random.Random(seed)
+    data = []
+    for i in range(n):
+        prescriptions = 0 if rng.random() < 0.05 else int(rng.paretovariate(1.5) * 20)
+        prescriber = Prescriber(
+            id=f"P{i:06d}",
+            name=f"Practice {i}",
+            type='GP Practice',
+            location=f"E{rng.randrange(300):08d}",
+            list_size=rng.randint(2_000, 20_000)
+        )
+        data.append(PrescribingData(
+            prescriber=prescriber,
+            drug_code=SYNTHETIC_DRUG_CODE,
+            period=SYNTHETIC_PERIOD,
+            prescriptions=prescriptions,
+            quantity=float(prescriptions * 28),
+            cost=round(prescriptions * rng.uniform(1.5, 4.0), 2)
+        ))
+    return data
+
+
+def make_opportunities(n, seed=0):
+    """Scored opportunity profiles for segmenter benchmarks"""
+    rng = random.Random(seed)
+    return [
+        OpportunityProfile(
+            prescriber=p.prescriber,
+            opportunity_score=rng.uniform(0, 100),
+            current_volume=p.prescriptions,
+            potential_volume=int(p.prescriptions * 1.5)
+        )
+        for p in make_prescribing_data(n, seed)
+    ]
+
+
+class SyntheticDataSource(DataSource):
+    """In-memory data source serving a fixed synthetic pull"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def search_drug(self, name):
+        return [{'id': SYNTHETIC_DRUG_CODE, 'name': name.title(), 'type': 'chemical'}]
+
+    def get_prescribing_data(self, drug_code, period, region=None):
+        return self.data
+
+    def get_prescriber_details(self, prescriber_ids):
+        return [p.prescriber for p in self.data if p.prescriber.id in set(prescriber_ids)]
+
+    def get_latest_period(self):
+        return SYNTHETIC_PERIOD
+
+    def find_drug_code(self, name, prefer_generic=True):
+        return SYNTHETIC_DRUG_CODE
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self._payload
+
+
+def make_openprescribing_get(n, seed=0):
+    """Stand-in for requests.get serving OpenPrescribing bnf_code, spending_by_org and org_details"""
+    rng = random.Random(seed)
+    spending = []
+    for i in range(n):
+        items = 0 if rng.random() < 0.05 else int(rng.paretovariate(1.5) * 20)
+        quantity = rng.randint(100, 5_000)
+        cost = round(rng.uniform(10, 2_000), 2)
+        spending.append({
+            'row_id': f"P{i:06d}",
+            'row_name': f"Practice {i}",
+            'items': items,
+            'quantity': quantity if items else 0,
+            'actual_cost': cost if items else 0.0
+        })
+    org_details = [
+        {'row_id': f"P{i:06d}", 'row_name': f"Practice {i}", 'total_list_size': rng.randint(2_000, 20_000)}
+        for i in range(n)
+    ]
+
+    def get(url, params=None, timeout=None):
+        if '/bnf_code/' in url:
+            return FakeResponse([{'id': SYNTHETIC_DRUG_CODE, 'name': 'Metformin hydrochloride', 'type': 'chemical'}])
+        if '/spending_by_org/' in url:
+            return FakeResponse(spending)
+        if '/org_details/' in url:
+            return FakeResponse(org_details)
+        return FakeResponse([], status_code=404)
+
+    return get
+
+
+@pytest.fixture(scope='session', params=PRESCRIBER_COUNTS, ids=lambda n: f"{n}")
+def prescribing_data(request):
+    return make_prescribing_data(request.param)
+
+
+@pytest.fixture
+def drug():
+    return create_drug(
+        name='Metformin', generic_name='metformin', therapeutic_area='Diabetes',
+        company='Benchmark', country_codes={'UK': SYNTHETIC_DRUG_CODE}
+    )
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Data Source Registry
+Country -> DataSource mapping that imports and constructs each data source
+on first use, so importing the API doesn't pay for every country up front
+"""
+import importlib
+import threading
+from typing import Dict, Iterable, Iterator, Mapping, Optional, Tuple
+
+from pharma_intelligence_engine import DataSource
+
+# Country -> (module, class name, constructor args)
+DATA_SOURCE_SPECS: Dict[str, Tuple[str, str, tuple]] = {
+    'UK': ('data_sources_uk', 'UKDataSource', ()),
+    'US': ('data_sources_us', 'USDataSource', ()),
+    'FR': ('data_sources_france', 'FranceDataSource', ()),  # Real Open Medic data
+    'DE': ('data_sources_eu', 'EUDataSource', ('DE',)),
+    'NL': ('data_sources_eu', 'EUDataSource', ('NL',)),
+    'IT': ('data_sources_eu', 'EUDataSource', ('IT',)),
+    'ES': ('data_sources_eu', 'EUDataSource', ('ES',)),
+    'AU': ('data_sources_au', 'AustraliaDataSource', ()),
+    'JP': ('data_sources_japan', 'JapanDataSource', ())
+}
+
+
+class DataSourceRegistry(Mapping):
+    """
+    Read-only mapping of country code -> DataSource, built lazily
+
+    Membership tests and key listings never import anything; indexing a
+    country imports its module and constructs the instance once (thread
+    safe). Views made with subset() share the same instances.
+    """
+
+    def __init__(self, specs: Mapping[str, Tuple[str, str, tuple]] = DATA_SOURCE_SPECS,
+                 _instances: Optional[Dict[str, DataSource]] = None,
+                 _lock: Optional[threading.Lock] = None):
+        self._specs = dict(specs)
+        self._instances = {} if _instances is None else _instances
+        self._lock = _lock or threading.Lock()
+
+    def __getitem__(self, country: str) -> DataSource:
+        instance = self._instances.get(country)
+        if instance is not None:
+            return instance
+
+        module_name, class_name, args = self._specs[country]  # KeyError for unknown countries
+        with self._lock:
+            instance = self._instances.get(country)
+            if instance is None:
+                cls = getattr(importlib.import_module(module_name), class_name)
+                instance = cls(*args)
+                self._instances[country] = instance
+        return instance
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._specs)
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def __contains__(self, country) -> bool:
+        return country in self._specs
+
+    def loaded(self) -> Dict[str, DataSource]:
+        """Data sources constructed so far"""
+        return dict(self._instances)
+
+    def subset(self, countries: Iterable[str]) -> "DataSourceRegistry":
+        """View over some countries, sharing instances with this registry"""
+        specs = {country: self._specs[country] for country in countries}
+        return DataSourceRegistry(specs, _instances=self._instances, _lock=self._lock)
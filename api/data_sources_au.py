@@ -9,12 +9,159 @@ Coverage: ~90% of all Australian prescriptions
 """
 import json
 import os
-from typing import List, Dict, Optional
+import logging
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 from pharma_intelligence_engine import (
-    DataSource, PrescribingData, Prescriber
+    DataSource, PrescribingData, PrescribingSeries, Prescriber
 )
 
+logger = logging.getLogger(__name__)
+
+# All-drug PBS store written by scripts/ingest_pbs.py; without it only the
+# per-drug pbs_*_real_data.json files are available
+PBS_STORE_PATH = os.environ.get(
+    'PBS_STORE_PATH', os.path.join(os.path.dirname(__file__), 'pbs_data', 'pbs_store.json')
+)
+
+# Drugs without real PBS data are estimated from metformin, scaled by typical usage
+ESTIMATE_SCALING = {
+    'atorvastatin': 1.2,  # More common than metformin
+    'rosuvastatin': 0.8,  # Less common
+    'apixaban': 0.3,      # Much less common
+    'empagliflozin': 0.2, # Newer drug
+}
+
+# Fuzzy drug-name matches remembered per source (names come from requests)
+DRUG_MATCH_CACHE_ENTRIES = 1024
+
+
+@dataclass
+class PBSSeries:
+    """
+    One drug's PBS monthly data, parsed once into dense (state × month) arrays
+    
+    Values are stored state-major at state_index[state] * len(months) +
+    month_index[month], so every lookup is a dict hit and an array index.
+    """
+    drug: str
+    atc_code: str
+    states: Tuple[str, ...]
+    months: Tuple[str, ...]  # YYYYMM, ascending
+    prescriptions: array     # 'q', len(states) * len(months)
+    cost: array              # 'd', same layout
+    state_index: Dict[str, int]
+    month_index: Dict[str, int]
+    latest_by_year: Dict[str, str]  # YYYY -> latest YYYYMM in that year
+    state_model: Dict[str, Dict]
+    metadata: Dict
+    
+    @classmethod
+    def from_json(cls, pbs_data: Dict) -> "PBSSeries":
+        """Parse a pbs_*_real_data.json document"""
+        monthly_data = pbs_data['monthly_data']
+        states = tuple(monthly_data)
+        months = tuple(sorted(set().union(*(state_months.keys() for state_months in monthly_data.values()))))
+        month_index = {month: i for i, month in enumerate(months)}
+        
+        prescriptions = array('q', bytes(8 * len(states) * len(months)))
+        cost = array('d', bytes(8 * len(states) * len(months)))
+        for row, state in enumerate(states):
+            offset = row * len(months)
+            for month, values in monthly_data[state].items():
+                prescriptions[offset + month_index[month]] = values['prescriptions']
+                cost[offset + month_index[month]] = values['cost']
+        
+        return cls(
+            drug=pbs_data['metadata'].get('drug', ''),
+            atc_code=pbs_data['metadata'].get('atc_code', ''),
+            states=states,
+            months=months,
+            prescriptions=prescriptions,
+            cost=cost,
+            state_index={state: i for i, state in enumerate(states)},
+            month_index=month_index,
+            latest_by_year={month[:4]: month for month in months},  # ascending, so last wins
+            state_model=pbs_data['state_model'],
+            metadata=pbs_data['metadata']
+        )
+    
+    @classmethod
+    def from_store(cls, atc_code: str, entry: Dict, store: Dict) -> "PBSSeries":
+        """Distribute one drug's national series from the PBS store across states"""
+        state_model = store['state_model']
+        months = tuple(store['months'])
+        states = tuple(state_model)
+        
+        prescriptions = array('q')
+        cost = array('d')
+        for state in states:
+            share = state_model[state]['weighted_share']
+            prescriptions.extend(int(national * share) for national in entry['prescriptions'])
+            cost.extend(national * share for national in entry['cost'])
+        
+        metadata = dict(store['metadata'], drug=entry['names'][0].title(), atc_code=atc_code)
+        return cls(
+            drug=metadata['drug'],
+            atc_code=atc_code,
+            states=states,
+            months=months,
+            prescriptions=prescriptions,
+            cost=cost,
+            state_index={state: i for i, state in enumerate(states)},
+            month_index={month: i for i, month in enumerate(months)},
+            latest_by_year={month[:4]: month for month in months},
+            state_model=state_model,
+            metadata=metadata
+        )
+    
+    @property
+    def latest_month(self) -> str:
+        return self.months[-1]
+    
+    def resolve_month(self, period: str) -> str:
+        """
+        Month key (YYYYMM) for a YYYY-MM or YYYY period
+        
+        Unknown months fall back to the latest month; a year gives its latest
+        month, or the overall latest if the year isn't covered.
+        """
+        if '-' in period:
+            year, month = period.split('-')
+            month_key = f"{year}{month}"
+            if month_key not in self.month_index:
+                logger.info("Month %s not in PBS dataset, using latest", month_key)
+                return self.latest_month
+            return month_key
+        return self.latest_by_year.get(period, self.latest_month)
+    
+    def value(self, state: str, month_key: str) -> Tuple[int, float]:
+        """(prescriptions, cost) for one state and month"""
+        i = self.state_index[state] * len(self.months) + self.month_index[month_key]
+        return self.prescriptions[i], self.cost[i]
+    
+    def month_span(self, start: str, end: str) -> Tuple[int, int]:
+        """
+        [first, last) month positions covered by a start..end period range
+        
+        Periods are YYYY, YYYY-MM or YYYY-MM-DD; a year start/end covers
+        the whole year.
+        """
+        first = start.replace('-', '')[:6] if len(start) > 4 else f"{start}01"
+        last = end.replace('-', '')[:6] if len(end) > 4 else f"{end}12"
+        return bisect_left(self.months, first), bisect_right(self.months, last)
+    
+    def rows(self, state: str, first: int, last: int) -> Tuple[List[int], List[float]]:
+        """(prescriptions, cost) for one state over month positions [first, last)"""
+        offset = self.state_index[state] * len(self.months)
+        return (self.prescriptions[offset + first:offset + last].tolist(),
+                self.cost[offset + first:offset + last].tolist())
+
 
 class AustraliaDataSource(DataSource):
     """
@@ -27,9 +174,8 @@ class AustraliaDataSource(DataSource):
     """
     
     def __init__(self):
-        self.pbs_data_cache = {}
-        self.pbs_data = None  # Initialize to None, will be set when data is loaded
-        self.cache = {}
+        self.pbs_data_cache: Dict[str, PBSSeries] = {}  # drug key -> parsed series, kept for the process
+        self.pbs_data: Optional[PBSSeries] = None  # First series loaded (for get_latest_period)
         
         # Available drugs with real PBS data
         self.available_drugs = {
@@ -37,50 +183,109 @@ class AustraliaDataSource(DataSource):
             'atorvastatin': {'atc': 'C10AA05', 'file': 'pbs_data/pbs_atorvastatin_real_data.json'},
             'rosuvastatin': {'atc': 'C10AA07', 'file': 'pbs_data/pbs_rosuvastatin_real_data.json'},
         }
+        # Exact lookups by drug name or ATC code; other names go through a bounded memo
+        self._drug_keys: Dict[str, str] = {key: key for key in self.available_drugs}
+        self._drug_keys.update({info['atc'].lower(): key for key, info in self.available_drugs.items()})
+        self._match_drug = lru_cache(maxsize=DRUG_MATCH_CACHE_ENTRIES)(self._longest_drug_match)
+        self._store: Optional[Dict] = None
+        self._store_checked = False
+        self._store_lock = threading.Lock()
         
         # State/Territory configuration (will be loaded with first drug)
         self.states = {}
         self.total_population = 25_620_000
     
-    def _load_pbs_data(self, drug_name):
-        """Load real PBS data for a specific drug"""
-        # Check cache first
-        if drug_name in self.pbs_data_cache:
-            return self.pbs_data_cache[drug_name]
+    def _load_store(self) -> Optional[Dict]:
+        """
+        Load the all-drug PBS store once, if present
+        
+        Every drug in it becomes available (by ATC code or any PBS drug name),
+        taking precedence over the per-drug files.
+        """
+        if self._store_checked:
+            return self._store
+        with self._store_lock:
+            if not self._store_checked:
+                self._store = self._read_store()
+                self._store_checked = True
+        return self._store
+    
+    def _read_store(self) -> Optional[Dict]:
+        if not os.path.exists(PBS_STORE_PATH):
+            logger.info("No PBS store at %s (run scripts/ingest_pbs.py); using per-drug files", PBS_STORE_PATH)
+            return None
+        
+        try:
+            with open(PBS_STORE_PATH, 'r') as f:
+                store = json.load(f)
+        except Exception as e:
+            logger.warning("Error loading PBS store: %s", e)
+            return None
         
-        # Find drug file
-        drug_info = None
-        for drug_key, info in self.available_drugs.items():
-            if drug_key in drug_name.lower():
-                drug_info = info
-                break
+        for atc_code, entry in store['drugs'].items():
+            names = [name.lower() for name in entry['names']]
+            self.available_drugs[names[0]] = {'atc': atc_code}
+            self._drug_keys[atc_code.lower()] = names[0]
+            for name in names:
+                self._drug_keys[name] = names[0]
         
-        if not drug_info:
+        logger.info("Loaded PBS store: %d drugs (%s to %s)", len(store['drugs']),
+                    store['metadata']['period_start'], store['metadata']['period_end'])
+        return store
+    
+    def _resolve_drug(self, drug_name: str) -> Optional[str]:
+        """available_drugs key for a drug name or ATC code (None if no real data)"""
+        self._load_store()
+        name = drug_name.lower()
+        if name in self._drug_keys:
+            return self._drug_keys[name]
+        return self._match_drug(name)
+    
+    def _longest_drug_match(self, name: str) -> Optional[str]:
+        """Longest drug name contained in the query, e.g. "metformin xr" -> metformin"""
+        return max((key for key in self.available_drugs if key in name), key=len, default=None)
+    
+    def _load_pbs_data(self, drug_name) -> Optional[PBSSeries]:
+        """Load real PBS data for a specific drug (parsed once, then served from memory)"""
+        drug_key = self._resolve_drug(drug_name)
+        if drug_key is None:
             return None
         
+        # Check cache first
+        if drug_key in self.pbs_data_cache:
+            return self.pbs_data_cache[drug_key]
+        
+        drug_info = self.available_drugs[drug_key]
+        if 'file' not in drug_info:
+            pbs_data = PBSSeries.from_store(drug_info['atc'], self._store['drugs'][drug_info['atc']], self._store)
+            self.pbs_data_cache[drug_key] = pbs_data
+            if self.pbs_data is None:
+                self.pbs_data = pbs_data
+            return pbs_data
+        
         data_path = os.path.join(os.path.dirname(__file__), drug_info['file'])
         
         try:
             with open(data_path, 'r') as f:
-                pbs_data = json.load(f)
+                pbs_data = PBSSeries.from_json(json.load(f))
             
             # Cache it
-            self.pbs_data_cache[drug_name] = pbs_data
+            self.pbs_data_cache[drug_key] = pbs_data
             
-            # Also set self.pbs_data for first drug loaded (for get_latest_data_date)
+            # Also set self.pbs_data for first drug loaded (for get_latest_period)
             if self.pbs_data is None:
                 self.pbs_data = pbs_data
             
-            print(f"✓ Loaded real PBS data for {pbs_data['metadata']['drug']}")
-            print(f"  Period: {pbs_data['metadata']['period_start']} to {pbs_data['metadata']['period_end']}")
+            logger.info("Loaded real PBS data for %s (%s to %s)", pbs_data.metadata['drug'],
+                        pbs_data.metadata['period_start'], pbs_data.metadata['period_end'])
             
             return pbs_data
             
         except FileNotFoundError:
-            print(f"⚠️  PBS data file not found: {data_path}")
+            logger.warning("PBS data file not found: %s", data_path)
             return None
         except Exception as e:
-            print(f"⚠️  Error loading PBS data: {e}")
+            logger.warning("Error loading PBS data: %s", e)
             return None
     
     def search_drug(self, name: str) -> List[Dict]:
@@ -121,6 +326,16 @@ class AustraliaDataSource(DataSource):
             if name_lower in drug or drug in name_lower:
                 return codes
         
+        # Any other drug in the PBS store
+        store = self._load_store()
+        if store:
+            drug_key = self._resolve_drug(name)
+            if drug_key is None:
+                drug_key = next((key for key in self.available_drugs if name_lower in key), None)
+            if drug_key is not None:
+                return [{'id': self.available_drugs[drug_key]['atc'], 'name': drug_key.title(),
+                         'type': 'atc', 'real_data': True}]
+        
         return []
     
     def get_prescribing_data(self, drug_code: str, period: str,
@@ -143,40 +358,18 @@ class AustraliaDataSource(DataSource):
             # Check if it's a known drug that we should estimate from
             known_drugs = ['atorvastatin', 'rosuvastatin', 'metformin']
             if any(d in drug_code.lower() for d in known_drugs):
-                print(f"ℹ️  Real data not yet loaded for {drug_code}, using estimation")
+                logger.info("Real PBS data not yet loaded for %s, using estimation", drug_code)
                 return self._estimate_for_other_drugs(drug_code, period, region)
             else:
-                print(f"ℹ️  No real data for {drug_code}, using estimation from metformin")
+                logger.info("No real PBS data for %s, using estimation from metformin", drug_code)
                 return self._estimate_for_other_drugs(drug_code, period, region)
         
         # Load states from first drug data
         if not self.states:
-            self.states = pbs_data['state_model']
+            self.states = pbs_data.state_model
         
         # Parse period (support YYYY or YYYY-MM format)
-        if '-' in period:
-            year, month = period.split('-')
-            month_key = f"{year}{month}"
-        else:
-            # If just year, use most recent month in that year
-            year = period
-            month_key = None
-        
-        # Get data from PBS dataset
-        monthly_data = pbs_data['monthly_data']
-        
-        # If specific month requested
-        if month_key:
-            if month_key not in list(monthly_data.values())[0]:
-                print(f"⚠️  Month {month_key} not in dataset, using latest")
-                month_key = sorted(list(monthly_data.values())[0].keys())[-1]
-        else:
-            # Use latest month in year or overall latest
-            available_months = sorted(list(monthly_data.values())[0].keys())
-            year_months = [m for m in available_months if m.startswith(year)]
-            month_key = year_months[-1] if year_months else available_months[-1]
-        
-        print(f"ℹ️  Using REAL PBS data for {pbs_data['metadata']['drug']} - month: {month_key}")
+        month_key = pbs_data.resolve_month(period)
         
         result = []
         for state_code, state_info in self.states.items():
@@ -184,7 +377,7 @@ class AustraliaDataSource(DataSource):
                 continue
             
             # Get real data for this state and month
-            state_data = monthly_data[state_code][month_key]
+            prescriptions, cost = pbs_data.value(state_code, month_key)
             
             prescriber = Prescriber(
                 id=f"AU-{state_code}",
@@ -197,35 +390,79 @@ class AustraliaDataSource(DataSource):
                 prescriber=prescriber,
                 drug_code=drug_code,
                 period=f"{month_key[:4]}-{month_key[4:]}",
-                prescriptions=state_data['prescriptions'],
-                quantity=state_data['prescriptions'] * 60,  # Assume 60 tablets per script
-                cost=state_data['cost']  # Cost in AUD (real from PBS)
+                prescriptions=prescriptions,
+                quantity=prescriptions * 60,  # Assume 60 tablets per script
+                cost=cost  # Cost in AUD (real from PBS)
             )
             
             result.append(prescribing)
         
         return result
     
-    def _estimate_for_other_drugs(self, drug_code: str, period: str, region: Optional[str]) -> List[PrescribingData]:
-        """Estimate data for other drugs based on metformin patterns"""
-        # Use metformin as baseline, scale by typical drug usage
-        scaling_factors = {
-            'atorvastatin': 1.2,  # More common than metformin
-            'rosuvastatin': 0.8,  # Less common
-            'apixaban': 0.3,      # Much less common
-            'empagliflozin': 0.2, # Newer drug
-        }
+    def get_prescribing_series(self, drug_code: str, start: str, end: str,
+                               region: Optional[str] = None) -> PrescribingSeries:
+        """
+        PBS monthly data by State/Territory for every month from start to end
         
-        # Get metformin data
-        metformin_data = self.get_prescribing_data('metformin', period, region)
+        Sliced straight from the parsed (state × month) arrays, so any range
+        costs one pass per state. Months outside the PBS dataset are left out
+        (get_prescribing_data would substitute the latest month). Drugs
+        without real data are estimated from metformin as in
+        get_prescribing_data.
+        """
+        pbs_data = self._load_pbs_data(drug_code)
+        scale = 1.0
+        if not pbs_data:
+            pbs_data = self._load_pbs_data('metformin')
+            scale = self._estimate_scale(drug_code)
+            if not pbs_data:
+                return PrescribingSeries(drug_code, [], [], [], [], [])
+        
+        if not self.states:
+            self.states = pbs_data.state_model
+        
+        first, last = pbs_data.month_span(start, end)
+        series = PrescribingSeries(
+            drug_code=drug_code,
+            periods=[f"{month[:4]}-{month[4:]}" for month in pbs_data.months[first:last]],
+            prescribers=[], prescriptions=[], quantity=[], cost=[]
+        )
+        for state_code, state_info in self.states.items():
+            if region and region.upper() != state_code:
+                continue
+            
+            prescriptions, cost = pbs_data.rows(state_code, first, last)
+            quantity = [count * 60 for count in prescriptions]  # Assume 60 tablets per script
+            if scale != 1.0:
+                prescriptions = [int(count * scale) for count in prescriptions]
+                quantity = [int(value * scale) for value in quantity]
+                cost = [value * scale for value in cost]
+            
+            series.prescribers.append(Prescriber(
+                id=f"AU-{state_code}",
+                name=f"State: {state_info['name']}",
+                type="State/Territory",
+                location=f"{state_info['name']}, Australia"
+            ))
+            series.prescriptions.append(prescriptions)
+            series.quantity.append(quantity)
+            series.cost.append(cost)
         
-        # Find scaling factor
+        return series
+    
+    def _estimate_scale(self, drug_code: str) -> float:
+        """Internal: Scaling factor applied to metformin data for an estimated drug"""
         drug_lower = drug_code.lower()
-        scale = 1.0
-        for drug, factor in scaling_factors.items():
+        for drug, factor in ESTIMATE_SCALING.items():
             if drug in drug_lower:
-                scale = factor
-                break
+                return factor
+        return 1.0
+    
+    def _estimate_for_other_drugs(self, drug_code: str, period: str, region: Optional[str]) -> List[PrescribingData]:
+        """Estimate data for other drugs based on metformin patterns"""
+        # Use metformin as baseline, scale by typical drug usage
+        metformin_data = self.get_prescribing_data('metformin', period, region)
+        scale = self._estimate_scale(drug_code)
         
         # Scale metformin data
         result = []
@@ -244,7 +481,7 @@ class AustraliaDataSource(DataSource):
     
     def _fallback_data(self, drug_code: str, period: str, region: Optional[str]) -> List[PrescribingData]:
         """Fallback to generated data if real PBS data not available"""
-        print(f"⚠️  Using fallback generated data")
+        logger.warning("Using fallback generated PBS data for %s", drug_code)
         
         # Basic population-based generation
         base_rate = 25  # prescriptions per 1,000 population per year
@@ -312,9 +549,7 @@ class AustraliaDataSource(DataSource):
         PBS data published monthly with ~2 month lag
         """
         if self.pbs_data:
-            # Get latest month from data
-            sample_state = list(self.pbs_data['monthly_data'].keys())[0]
-            latest_month = sorted(self.pbs_data['monthly_data'][sample_state].keys())[-1]
+            latest_month = self.pbs_data.latest_month
             return f"{latest_month[:4]}-{latest_month[4:]}"
         
         return "2025-06"  # Fallback
@@ -345,11 +580,11 @@ def test_australia_real_data():
     
     if not ds.pbs_data:
         print(f"\n❌ PBS data not loaded")
-        print(f"Run: python3 prepare_pbs_real_data.py")
+        print(f"Run: python3 scripts/ingest_pbs.py")
         return False
     
     print(f"\n✓ PBS data loaded successfully")
-    print(f"  Period: {ds.pbs_data['metadata']['period_start']} to {ds.pbs_data['metadata']['period_end']}")
+    print(f"  Period: {ds.pbs_data.metadata['period_start']} to {ds.pbs_data.metadata['period_end']}")
     
     # Test metformin (real data)
     print(f"\n1. Testing metformin (REAL PBS DATA):")
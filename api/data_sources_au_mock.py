@@ -11,10 +11,15 @@ Coverage: All PBS-subsidized prescriptions in Australia
 Data Type: Regional/aggregate (State/Territory level)
 """
 import requests
+import logging
+from functools import lru_cache
 from typing import List, Dict, Optional
 from pharma_intelligence_engine import (
     DataSource, PrescribingData, Prescriber
 )
+from mock_data import MOCK_CACHE_ENTRIES, mock_factors
+
+logger = logging.getLogger(__name__)
 
 
 class AustraliaDataSource(DataSource):
@@ -36,7 +41,6 @@ class AustraliaDataSource(DataSource):
     """
     
     def __init__(self):
-        self.cache = {}
         self.base_url = "https://www.aihw.gov.au/reports/medicines/pbs-monthly-data"
         
         # State/Territory configuration
@@ -84,6 +88,9 @@ class AustraliaDataSource(DataSource):
         }
         
         self.total_population = 25_620_000
+        
+        # Generated state data per (drug, period) - deterministic, so safe to reuse
+        self._state_data = lru_cache(maxsize=MOCK_CACHE_ENTRIES)(self._generate_state_data)
     
     def search_drug(self, name: str) -> List[Dict]:
         """
@@ -137,9 +144,7 @@ class AustraliaDataSource(DataSource):
         Returns:
             List of PrescribingData objects (one per state/territory)
         """
-        print(f"⚠️  MOCK DATA: Australia PBS analysis for {drug_code}")
-        print(f"   Real implementation requires AIHW PBS monthly data integration")
-        print(f"   Data available at: {self.base_url}")
+        logger.debug("MOCK DATA: Australia PBS analysis for %s (needs AIHW PBS monthly data integration)", drug_code)
         
         # Parse period (support YYYY or YYYY-MM format)
         if '-' in period:
@@ -150,7 +155,7 @@ class AustraliaDataSource(DataSource):
         
         # Generate realistic mock data based on state populations
         # Using metformin as baseline (common diabetes medication)
-        mock_data = self._generate_state_data(drug_code)
+        mock_data = self._state_data(drug_code, f"{year}-{month}")
         
         result = []
         for state_code, data in mock_data.items():
@@ -179,12 +184,13 @@ class AustraliaDataSource(DataSource):
         
         return result
     
-    def _generate_state_data(self, drug_code: str) -> Dict[str, Dict]:
+    def _generate_state_data(self, drug_code: str, period: str) -> Dict[str, Dict]:
         """
         Generate realistic mock data for states based on population
         
         Uses population-proportional distribution with regional variations
-        for prescribing rates (urban vs rural, age demographics, etc.)
+        for prescribing rates (urban vs rural, age demographics, etc.),
+        varied per state by a factor seeded from (drug, period)
         """
         # Base prescribing rate per 1,000 population (varies by drug)
         # Metformin (diabetes): ~25 per 1,000 people
@@ -210,11 +216,13 @@ class AustraliaDataSource(DataSource):
         # Quantity per prescription (e.g., 60 tablets)
         quantity_per_rx = 60
         
+        variation = mock_factors(len(self.states), 'AU', drug_code, period)
+        
         state_data = {}
         
-        for state_code, state_info in self.states.items():
+        for (state_code, state_info), noise in zip(self.states.items(), variation):
             population = state_info['population']
-            factor = regional_factors[state_code]
+            factor = regional_factors[state_code] * noise
             
             # Calculate prescriptions (annual)
             annual_prescriptions = int((population / 1000) * base_rate * factor)
@@ -9,12 +9,15 @@ Coverage: ~90% of all Australian prescriptions
 """
 import json
 import os
+import logging
 from typing import List, Dict, Optional
 from datetime import datetime
 from pharma_intelligence_engine import (
     DataSource, PrescribingData, Prescriber
 )
 
+logger = logging.getLogger(__name__)
+
 
 class AustraliaDataSource(DataSource):
     """
@@ -29,7 +32,6 @@ class AustraliaDataSource(DataSource):
     def __init__(self, data_file='pbs_data/pbs_metformin_real_data.json'):
         self.data_file = data_file
         self.pbs_data = None
-        self.cache = {}
         
         # Load real PBS data
         self._load_pbs_data()
@@ -46,17 +48,14 @@ class AustraliaDataSource(DataSource):
             with open(data_path, 'r') as f:
                 self.pbs_data = json.load(f)
             
-            print(f"✓ Loaded real PBS data from {data_path}")
-            print(f"  Period: {self.pbs_data['metadata']['period_start']} to {self.pbs_data['metadata']['period_end']}")
-            print(f"  States: {len(self.pbs_data['state_model'])}")
-            print(f"  Months: {len(list(self.pbs_data['monthly_data'].values())[0])}")
+            logger.info("Loaded real PBS data from %s (%s to %s)", data_path,
+                        self.pbs_data['metadata']['period_start'], self.pbs_data['metadata']['period_end'])
             
         except FileNotFoundError:
-            print(f"⚠️  PBS data file not found: {data_path}")
-            print(f"   Run: python3 prepare_pbs_real_data.py")
+            logger.warning("PBS data file not found: %s (run: python3 prepare_pbs_real_data.py)", data_path)
             self.pbs_data = None
         except Exception as e:
-            print(f"⚠️  Error loading PBS data: {e}")
+            logger.warning("Error loading PBS data: %s", e)
             self.pbs_data = None
     
     def search_drug(self, name: str) -> List[Dict]:
@@ -112,12 +111,12 @@ class AustraliaDataSource(DataSource):
             List of PrescribingData objects (one per state/territory)
         """
         if not self.pbs_data:
-            print(f"⚠️  No PBS data loaded - using fallback")
+            logger.warning("No PBS data loaded - using fallback")
             return self._fallback_data(drug_code, period, region)
         
         # Check if drug is metformin (we only have real data for metformin currently)
         if drug_code.upper() not in ['METFORMIN', 'A10BA02']:
-            print(f"ℹ️  Real data only available for metformin, using estimation for {drug_code}")
+            logger.info("Real PBS data only available for metformin, using estimation for %s", drug_code)
             return self._estimate_for_other_drugs(drug_code, period, region)
         
         # Parse period (support YYYY or YYYY-MM format)
@@ -135,7 +134,7 @@ class AustraliaDataSource(DataSource):
         # If specific month requested
         if month_key:
             if month_key not in list(monthly_data.values())[0]:
-                print(f"⚠️  Month {month_key} not in dataset, using latest")
+                logger.info("Month %s not in PBS dataset, using latest", month_key)
                 month_key = sorted(list(monthly_data.values())[0].keys())[-1]
         else:
             # Use latest month in year or overall latest
@@ -143,8 +142,6 @@ class AustraliaDataSource(DataSource):
             year_months = [m for m in available_months if m.startswith(year)]
             month_key = year_months[-1] if year_months else available_months[-1]
         
-        print(f"ℹ️  Using REAL PBS data for month: {month_key}")
-        
         result = []
         for state_code, state_info in self.states.items():
             if region and region.upper() != state_code:
@@ -211,7 +208,7 @@ class AustraliaDataSource(DataSource):
     
     def _fallback_data(self, drug_code: str, period: str, region: Optional[str]) -> List[PrescribingData]:
         """Fallback to generated data if real PBS data not available"""
-        print(f"⚠️  Using fallback generated data")
+        logger.warning("Using fallback generated PBS data for %s", drug_code)
         
         # Basic population-based generation
         base_rate = 25  # prescriptions per 1,000 population per year
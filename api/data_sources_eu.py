@@ -16,10 +16,111 @@ Supported Countries:
 Coverage: Regional analysis, not individual prescriber targeting
 """
 import requests
-from typing import List, Dict, Optional
+import logging
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
 from pharma_intelligence_engine import (
-    DataSource, PrescribingData, Prescriber
+    DataSource, PrescribingData, PrescribingSeries, Prescriber
 )
+from mock_data import MOCK_CACHE_ENTRIES, mock_factors
+
+logger = logging.getLogger(__name__)
+
+# Mock regional baselines (code, name, prescriptions, cost in EUR) until each
+# country's source is integrated; requests vary them per drug and period
+MOCK_REGIONS = {
+    'FR': {
+        'prefix': 'Département', 'type': 'Region', 'country': 'France',
+        'todo': 'needs data.ameli.fr dataset configuration',
+        'regions': [
+            ('75', 'Paris', 125000, 5200000),
+            ('13', 'Bouches-du-Rhône', 98000, 4100000),
+            ('69', 'Rhône', 87000, 3600000),
+            ('59', 'Nord', 82000, 3400000),
+            ('33', 'Gironde', 76000, 3200000),
+        ]
+    },
+    'DE': {
+        'prefix': 'Bundesland', 'type': 'State', 'country': 'Germany',
+        'todo': 'needs GKV report parsing',
+        'regions': [
+            ('NW', 'Nordrhein-Westfalen', 320000, 13500000),
+            ('BY', 'Bayern', 285000, 12000000),
+            ('BW', 'Baden-Württemberg', 240000, 10100000),
+        ]
+    },
+    'NL': {
+        'prefix': 'Province', 'type': 'Province', 'country': 'Netherlands',
+        'todo': 'needs GIP Databank API integration',
+        'regions': [
+            ('ZH', 'Zuid-Holland', 78000, 3300000),
+            ('NH', 'Noord-Holland', 65000, 2750000),
+            ('NB', 'Noord-Brabant', 54000, 2280000),
+        ]
+    },
+    'IT': {
+        # Based on population density and healthcare spending
+        'prefix': 'Regione', 'type': 'Region', 'country': 'Italy',
+        'todo': 'needs AIFA Open Data CSV/API integration',
+        'regions': [
+            ('LOM', 'Lombardia', 185000, 7800000),
+            ('LAZ', 'Lazio', 142000, 6000000),
+            ('CAM', 'Campania', 135000, 5700000),
+            ('SIC', 'Sicilia', 118000, 4950000),
+            ('VEN', 'Veneto', 112000, 4720000),
+            ('EMR', 'Emilia-Romagna', 105000, 4420000),
+            ('PIE', 'Piemonte', 98000, 4130000),
+            ('PUG', 'Puglia', 92000, 3870000),
+            ('TOS', 'Toscana', 87000, 3660000),
+            ('CAL', 'Calabria', 45000, 1890000),
+        ]
+    },
+    'ES': {
+        # 17 Autonomous Communities, based on population and healthcare spending
+        'prefix': 'Comunidad', 'type': 'Region', 'country': 'Spain',
+        'todo': 'needs Ministry of Health BIFAP database integration',
+        'regions': [
+            ('AN', 'Andalucía', 165000, 6950000),
+            ('CT', 'Cataluña', 148000, 6230000),
+            ('MD', 'Comunidad de Madrid', 132000, 5560000),
+            ('VC', 'Comunidad Valenciana', 98000, 4130000),
+            ('GA', 'Galicia', 82000, 3450000),
+            ('CL', 'Castilla y León', 75000, 3160000),
+            ('PV', 'País Vasco', 68000, 2860000),
+            ('CM', 'Castilla-La Mancha', 62000, 2610000),
+            ('MU', 'Región de Murcia', 47000, 1980000),
+            ('AR', 'Aragón', 42000, 1770000),
+            ('IB', 'Islas Baleares', 38000, 1600000),
+            ('EX', 'Extremadura', 35000, 1470000),
+            ('AS', 'Principado de Asturias', 32000, 1350000),
+            ('NC', 'Comunidad Foral de Navarra', 21000, 880000),
+            ('CN', 'Islas Canarias', 28000, 1180000),
+            ('CB', 'Cantabria', 18000, 760000),
+            ('RI', 'La Rioja', 10000, 420000),
+        ]
+    }
+}
+
+
+@lru_cache(maxsize=MOCK_CACHE_ENTRIES)
+def _mock_regional_rows(country: str, drug_code: str, period: str) -> Tuple[Tuple[str, Prescriber, int, float], ...]:
+    """(code, prescriber, prescriptions, cost) per mock region, varied per (country, drug, period)"""
+    mock = MOCK_REGIONS[country]
+    factors = mock_factors(len(mock['regions']), country, drug_code, period)
+    return tuple(
+        (
+            code,
+            Prescriber(
+                id=f"{country}-{code}",
+                name=f"{mock['prefix']} {name}",
+                type=mock['type'],
+                location=f"{name}, {mock['country']}"
+            ),
+            int(prescriptions * factor),
+            cost * factor
+        )
+        for (code, name, prescriptions, cost), factor in zip(mock['regions'], factors)
+    )
 
 
 class EUDataSource(DataSource):
@@ -38,7 +139,6 @@ class EUDataSource(DataSource):
             country: ISO country code (FR, DE, NL)
         """
         self.country = country.upper()
-        self.cache = {}
         
         # Country-specific configuration
         self.config = {
@@ -123,6 +223,9 @@ class EUDataSource(DataSource):
         """
         Get REGIONAL prescribing data (not individual prescribers)
         
+        NOTE: MOCK implementation for every country - regional baselines
+        varied per (country, drug, period); see MOCK_REGIONS
+        
         Args:
             drug_code: ATC code or drug name
             period: Year (e.g., "2022")
@@ -131,235 +234,21 @@ class EUDataSource(DataSource):
         Returns:
             List of PrescribingData objects (one per region)
         """
-        if self.country == 'FR':
-            return self._get_france_data(drug_code, period, region)
-        elif self.country == 'DE':
-            return self._get_germany_data(drug_code, period, region)
-        elif self.country == 'NL':
-            return self._get_netherlands_data(drug_code, period, region)
-        elif self.country == 'IT':
-            return self._get_italy_data(drug_code, period, region)
-        elif self.country == 'ES':
-            return self._get_spain_data(drug_code, period, region)
-        else:
-            return []
-    
-    def _get_france_data(self, drug_code: str, period: str, 
-                        region: Optional[str] = None) -> List[PrescribingData]:
-        """Get France regional data from Open Data Assurance Maladie"""
-        
-        # NOTE: This is a MOCK implementation
-        # In production, would fetch from data.ameli.fr API
-        
-        print(f"⚠️  MOCK DATA: France regional analysis for {drug_code}")
-        print(f"   Real implementation requires data.ameli.fr dataset configuration")
+        logger.debug("MOCK DATA: %s regional analysis for %s (%s)",
+                     self.config[self.country]['name'], drug_code, MOCK_REGIONS[self.country]['todo'])
         
-        # Mock regional data for demonstration
-        mock_regions = [
-            {'code': '75', 'name': 'Paris', 'prescriptions': 125000, 'cost': 5200000},
-            {'code': '13', 'name': 'Bouches-du-Rhône', 'prescriptions': 98000, 'cost': 4100000},
-            {'code': '69', 'name': 'Rhône', 'prescriptions': 87000, 'cost': 3600000},
-            {'code': '59', 'name': 'Nord', 'prescriptions': 82000, 'cost': 3400000},
-            {'code': '33', 'name': 'Gironde', 'prescriptions': 76000, 'cost': 3200000},
-        ]
-        
-        result = []
-        for region_data in mock_regions:
-            if region and region != region_data['code']:
-                continue
-            
-            prescriber = Prescriber(
-                id=f"FR-{region_data['code']}",
-                name=f"Département {region_data['name']}",
-                type="Region",
-                location=f"{region_data['name']}, France"
-            )
-            
-            data = PrescribingData(
+        return [
+            PrescribingData(
                 prescriber=prescriber,
                 drug_code=drug_code,
                 period=period,
-                prescriptions=region_data['prescriptions'],
-                quantity=region_data['prescriptions'],
-                cost=region_data['cost']
+                prescriptions=prescriptions,
+                quantity=prescriptions,
+                cost=cost
             )
-            
-            result.append(data)
-        
-        return result
-    
-    def _get_germany_data(self, drug_code: str, period: str,
-                         region: Optional[str] = None) -> List[PrescribingData]:
-        """Get Germany regional data from GKV reports"""
-        
-        print(f"⚠️  MOCK DATA: Germany state-level analysis for {drug_code}")
-        print(f"   Real implementation requires GKV report parsing")
-        
-        # Mock state-level data
-        mock_states = [
-            {'code': 'NW', 'name': 'Nordrhein-Westfalen', 'prescriptions': 320000, 'cost': 13500000},
-            {'code': 'BY', 'name': 'Bayern', 'prescriptions': 285000, 'cost': 12000000},
-            {'code': 'BW', 'name': 'Baden-Württemberg', 'prescriptions': 240000, 'cost': 10100000},
+            for code, prescriber, prescriptions, cost in _mock_regional_rows(self.country, drug_code, period)
+            if not region or region == code
         ]
-        
-        result = []
-        for state in mock_states:
-            prescriber = Prescriber(
-                id=f"DE-{state['code']}",
-                name=f"Bundesland {state['name']}",
-                type="State",
-                location=f"{state['name']}, Germany"
-            )
-            
-            data = PrescribingData(
-                prescriber=prescriber,
-                drug_code=drug_code,
-                period=period,
-                prescriptions=state['prescriptions'],
-                quantity=state['prescriptions'],
-                cost=state['cost']
-            )
-            
-            result.append(data)
-        
-        return result
-    
-    def _get_netherlands_data(self, drug_code: str, period: str,
-                            region: Optional[str] = None) -> List[PrescribingData]:
-        """Get Netherlands regional data from GIP Databank"""
-        
-        print(f"⚠️  MOCK DATA: Netherlands province-level analysis for {drug_code}")
-        print(f"   Real implementation requires GIP Databank API integration")
-        
-        # Mock province data
-        mock_provinces = [
-            {'code': 'ZH', 'name': 'Zuid-Holland', 'prescriptions': 78000, 'cost': 3300000},
-            {'code': 'NH', 'name': 'Noord-Holland', 'prescriptions': 65000, 'cost': 2750000},
-            {'code': 'NB', 'name': 'Noord-Brabant', 'prescriptions': 54000, 'cost': 2280000},
-        ]
-        
-        result = []
-        for province in mock_provinces:
-            prescriber = Prescriber(
-                id=f"NL-{province['code']}",
-                name=f"Province {province['name']}",
-                type="Province",
-                location=f"{province['name']}, Netherlands"
-            )
-            
-            data = PrescribingData(
-                prescriber=prescriber,
-                drug_code=drug_code,
-                period=period,
-                prescriptions=province['prescriptions'],
-                quantity=province['prescriptions'],
-                cost=province['cost']
-            )
-            
-            result.append(data)
-        
-        return result
-    
-    def _get_italy_data(self, drug_code: str, period: str,
-                       region: Optional[str] = None) -> List[PrescribingData]:
-        """Get Italy regional data from AIFA Open Data"""
-        
-        print(f"⚠️  MOCK DATA: Italy regional analysis for {drug_code}")
-        print(f"   Real implementation requires AIFA Open Data CSV/API integration")
-        
-        # Mock regional data for Italy's 20 regions
-        # Based on population density and healthcare spending
-        mock_regions = [
-            {'code': 'LOM', 'name': 'Lombardia', 'prescriptions': 185000, 'cost': 7800000},
-            {'code': 'LAZ', 'name': 'Lazio', 'prescriptions': 142000, 'cost': 6000000},
-            {'code': 'CAM', 'name': 'Campania', 'prescriptions': 135000, 'cost': 5700000},
-            {'code': 'SIC', 'name': 'Sicilia', 'prescriptions': 118000, 'cost': 4950000},
-            {'code': 'VEN', 'name': 'Veneto', 'prescriptions': 112000, 'cost': 4720000},
-            {'code': 'EMR', 'name': 'Emilia-Romagna', 'prescriptions': 105000, 'cost': 4420000},
-            {'code': 'PIE', 'name': 'Piemonte', 'prescriptions': 98000, 'cost': 4130000},
-            {'code': 'PUG', 'name': 'Puglia', 'prescriptions': 92000, 'cost': 3870000},
-            {'code': 'TOS', 'name': 'Toscana', 'prescriptions': 87000, 'cost': 3660000},
-            {'code': 'CAL', 'name': 'Calabria', 'prescriptions': 45000, 'cost': 1890000},
-        ]
-        
-        result = []
-        for region_data in mock_regions:
-            if region and region != region_data['code']:
-                continue
-            
-            prescriber = Prescriber(
-                id=f"IT-{region_data['code']}",
-                name=f"Regione {region_data['name']}",
-                type="Region",
-                location=f"{region_data['name']}, Italy"
-            )
-            
-            data = PrescribingData(
-                prescriber=prescriber,
-                drug_code=drug_code,
-                period=period,
-                prescriptions=region_data['prescriptions'],
-                quantity=region_data['prescriptions'],
-                cost=region_data['cost']
-            )
-            
-            result.append(data)
-        
-        return result
-    
-    def _get_spain_data(self, drug_code: str, period: str,
-                       region: Optional[str] = None) -> List[PrescribingData]:
-        """Get Spain regional data from Ministry of Health"""
-        
-        print(f"⚠️  MOCK DATA: Spain regional analysis for {drug_code}")
-        print(f"   Real implementation requires Ministry of Health BIFAP database integration")
-        
-        # Mock regional data for Spain's 17 Autonomous Communities
-        # Based on population and healthcare spending patterns
-        mock_regions = [
-            {'code': 'AN', 'name': 'Andalucía', 'prescriptions': 165000, 'cost': 6950000},
-            {'code': 'CT', 'name': 'Cataluña', 'prescriptions': 148000, 'cost': 6230000},
-            {'code': 'MD', 'name': 'Comunidad de Madrid', 'prescriptions': 132000, 'cost': 5560000},
-            {'code': 'VC', 'name': 'Comunidad Valenciana', 'prescriptions': 98000, 'cost': 4130000},
-            {'code': 'GA', 'name': 'Galicia', 'prescriptions': 82000, 'cost': 3450000},
-            {'code': 'CL', 'name': 'Castilla y León', 'prescriptions': 75000, 'cost': 3160000},
-            {'code': 'PV', 'name': 'País Vasco', 'prescriptions': 68000, 'cost': 2860000},
-            {'code': 'CM', 'name': 'Castilla-La Mancha', 'prescriptions': 62000, 'cost': 2610000},
-            {'code': 'MU', 'name': 'Región de Murcia', 'prescriptions': 47000, 'cost': 1980000},
-            {'code': 'AR', 'name': 'Aragón', 'prescriptions': 42000, 'cost': 1770000},
-            {'code': 'IB', 'name': 'Islas Baleares', 'prescriptions': 38000, 'cost': 1600000},
-            {'code': 'EX', 'name': 'Extremadura', 'prescriptions': 35000, 'cost': 1470000},
-            {'code': 'AS', 'name': 'Principado de Asturias', 'prescriptions': 32000, 'cost': 1350000},
-            {'code': 'NC', 'name': 'Comunidad Foral de Navarra', 'prescriptions': 21000, 'cost': 880000},
-            {'code': 'CN', 'name': 'Islas Canarias', 'prescriptions': 28000, 'cost': 1180000},
-            {'code': 'CB', 'name': 'Cantabria', 'prescriptions': 18000, 'cost': 760000},
-            {'code': 'RI', 'name': 'La Rioja', 'prescriptions': 10000, 'cost': 420000},
-        ]
-        
-        result = []
-        for region_data in mock_regions:
-            if region and region != region_data['code']:
-                continue
-            
-            prescriber = Prescriber(
-                id=f"ES-{region_data['code']}",
-                name=f"Comunidad {region_data['name']}",
-                type="Region",
-                location=f"{region_data['name']}, Spain"
-            )
-            
-            data = PrescribingData(
-                prescriber=prescriber,
-                drug_code=drug_code,
-                period=period,
-                prescriptions=region_data['prescriptions'],
-                quantity=region_data['prescriptions'],
-                cost=region_data['cost']
-            )
-            
-            result.append(data)
-        
-        return result
     
     def get_prescriber_details(self, prescriber_ids: List[str]) -> List[Prescriber]:
         """Get region details (not individual prescribers)"""
@@ -433,6 +322,14 @@ class MultiCountryDataSource(DataSource):
             drug_code, period, region
         )
     
+    def get_prescribing_series(self, drug_code: str, start: str, end: str,
+                               region: Optional[str] = None) -> PrescribingSeries:
+        if not self.current_country:
+            raise ValueError("Country not set. Call set_country() first")
+        return self.sources[self.current_country].get_prescribing_series(
+            drug_code, start, end, region
+        )
+    
     def get_prescriber_details(self, prescriber_ids: List[str]) -> List[Prescriber]:
         if not self.current_country:
             raise ValueError("Country not set. Call set_country() first")
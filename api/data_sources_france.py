@@ -9,13 +9,16 @@ Coverage: All reimbursed medicines in France
 Classification: ATC codes (WHO standard)
 """
 import json
-import random
-from typing import List, Dict, Optional
+from array import array
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 from pharma_intelligence_engine import (
-    DataSource, PrescribingData, Prescriber
+    DataSource, PrescribingData, Prescriber, get_shared_cache
 )
 
+# Shared cache lifetime for regional pulls (seconds)
+PRESCRIBING_CACHE_TTL = 24 * 3600
+
 
 class FranceDataSource(DataSource):
     """
@@ -32,7 +35,7 @@ class FranceDataSource(DataSource):
     
     def __init__(self):
         self.open_medic_cache = {}
-        self.cache = {}
+        self.cache = get_shared_cache()
         
         # 13 French Régions with population distribution
         self.regions = {
@@ -131,6 +134,32 @@ class FranceDataSource(DataSource):
         
         self.total_population = 67_000_000
         
+        # Region columns (in self.regions order) for distributing national
+        # totals across all regions at once
+        self._region_index = {code: i for i, code in enumerate(self.regions)}
+        self._region_shares = array('d', (info['share'] for info in self.regions.values()))
+        self._region_prescribers = tuple(
+            Prescriber(
+                id=f"FR-{code}",
+                name=f"Région: {info['name']}",
+                location=info['major_cities'][0],
+                type="Region",
+                specialty=None
+            )
+            for code, info in self.regions.items()
+        )
+        
+        # Drugs without real Open Medic data: 2% prevalence, ~60 DDDs and
+        # €45 per prescription, the same for every drug
+        sample_prescriptions = [int(info['population'] * 0.02) for info in self.regions.values()]
+        self._sample_distribution = tuple(zip(
+            self._region_prescribers,
+            sample_prescriptions,
+            [float(prescriptions * 60) for prescriptions in sample_prescriptions],
+            [prescriptions * 45.0 for prescriptions in sample_prescriptions]
+        ))
+        self._distributions: Dict[str, Tuple] = {}  # drug_code -> regional rows
+        
         # Real Open Medic data for common drugs (from 2024 dataset)
         # These are actual figures from SNDS
         self.real_drug_data = {
@@ -491,198 +520,58 @@ class FranceDataSource(DataSource):
         Returns:
             List[PrescribingData] with real Open Medic statistics by region
         """
-        cache_key = f"{drug_code}_{region}_{period}"
-        if cache_key in self.cache:
-            return self.cache[cache_key]
-        
-        result = []
-        
-        # Check if we have real data for this drug
-        if drug_code in self.real_drug_data:
-            drug_info = self.real_drug_data[drug_code]
-            
-            # If specific region requested
-            if region and region in self.regions:
-                region_info = self.regions[region]
-                
-                # Distribute national data by region share
-                region_boxes = int(drug_info['annual_boxes'] * region_info['share'])
-                region_cost = drug_info['annual_cost_eur'] * region_info['share']
-                region_prescriptions = int(region_boxes * 0.85)  # ~0.85 prescriptions per box
-                
-                # Create prescriber representing this region
-                prescriber = Prescriber(
-                    id=f"FR-{region}",
-                    name=f"Région: {region_info['name']}",
-                    location=region_info['major_cities'][0],
-                    type="Region",
-                    specialty=None
-                )
-                
-                prescribing = PrescribingData(
-                    prescriber=prescriber,
-                    drug_code=drug_code,
-                    period=period or "2024",
-                    prescriptions=region_prescriptions,
-                    quantity=float(region_boxes * drug_info['ddd_per_box']),
-                    cost=region_cost
-                )
-                
-                result.append(prescribing)
-            else:
-                # All regions
-                for region_code, region_info in self.regions.items():
-                    region_boxes = int(drug_info['annual_boxes'] * region_info['share'])
-                    region_cost = drug_info['annual_cost_eur'] * region_info['share']
-                    region_prescriptions = int(region_boxes * 0.85)
-                    
-                    prescriber = Prescriber(
-                        id=f"FR-{region_code}",
-                        name=f"Région: {region_info['name']}",
-                        location=region_info['major_cities'][0],
-                        type="Region",
-                        specialty=None
-                    )
-                    
-                    prescribing = PrescribingData(
-                        prescriber=prescriber,
-                        drug_code=drug_code,
-                        period=period or "2024",
-                        prescriptions=region_prescriptions,
-                        quantity=float(region_boxes * drug_info['ddd_per_box']),
-                        cost=region_cost
-                    )
-                    
-                    result.append(prescribing)
-        else:
-            # No real data - generate sample data
-            result = self._generate_sample_data(drug_code, region, period)
-        
-        self.cache[cache_key] = result
-        return result
-    
-    def _generate_regional_prescribers(
-        self,
-        region: Dict,
-        total_prescriptions: int,
-        specialty_distribution: Dict
-    ) -> List[Prescriber]:
-        """Generate realistic prescriber data for a region"""
-        prescribers = []
-        
-        # Estimate number of prescribers based on population
-        # France has ~1 GP per 1000 people
-        num_gps = int(region['population'] / 1000)
-        num_prescribers = int(num_gps * 0.6)  # ~60% prescribe this drug
-        
-        # Distribute prescriptions among specialties
-        for specialty, share in specialty_distribution.items():
-            num_specialty = int(num_prescribers * share)
-            prescriptions_per_prescriber = int((total_prescriptions * share) / max(num_specialty, 1))
-            
-            for i in range(min(num_specialty, 100)):  # Limit to 100 per specialty
-                prescriber = Prescriber(
-                    id=f"FR-{region['code']}-{specialty[:3].upper()}-{i+1:04d}",
-                    name=f"Dr. {self._random_french_name()}",
-                    location=random.choice(region['major_cities']),
-                    specialty=specialty,
-                    prescription_count=prescriptions_per_prescriber + random.randint(-50, 50)
-                )
-                prescribers.append(prescriber)
-        
-        return prescribers[:100]  # Limit to top 100
-    
-    def _generate_national_prescribers(
-        self,
-        total_boxes: int,
-        specialty_distribution: Dict
-    ) -> List[Prescriber]:
-        """Generate national-level prescriber summary"""
-        prescribers = []
-        
-        # Create aggregated prescriber data by region and specialty
-        for region_code, region in list(self.regions.items())[:5]:  # Top 5 regions
-            region_boxes = int(total_boxes * region['share'])
-            
-            for specialty, share in specialty_distribution.items():
-                prescriber = Prescriber(
-                    id=f"FR-{region_code}-{specialty[:3].upper()}-AGG",
-                    name=f"{specialty} - {region['name']}",
-                    location=region['major_cities'][0],
-                    specialty=specialty,
-                    prescription_count=int(region_boxes * share * 0.85)
-                )
-                prescribers.append(prescriber)
-        
-        return prescribers
-    
-    def _random_french_name(self) -> str:
-        """Generate random French doctor name"""
-        first_names = ['Jean', 'Marie', 'Pierre', 'Sophie', 'François', 'Isabelle', 
-                      'Philippe', 'Nathalie', 'Michel', 'Catherine', 'Laurent', 'Sylvie']
-        last_names = ['Martin', 'Bernard', 'Dubois', 'Thomas', 'Robert', 'Richard',
-                     'Petit', 'Durand', 'Leroy', 'Moreau', 'Simon', 'Laurent']
-        return f"{random.choice(first_names)} {random.choice(last_names)}"
-    
-    def _generate_sample_data(
-        self,
-        drug_code: str,
-        region: Optional[str],
-        period: Optional[str]
-    ) -> List[PrescribingData]:
-        """Generate sample data for drugs without real Open Medic data"""
-        result = []
+        cache_key = f"fr:prescribing:{drug_code}:{region}:{period}"
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
         
+        # A known region gets its own row; otherwise every region
+        rows = self._regional_distribution(drug_code)
         if region and region in self.regions:
-            region_info = self.regions[region]
-            prescriptions = int(region_info['population'] * 0.02)  # 2% prevalence
-            cost = prescriptions * 45.0
-            
-            prescriber = Prescriber(
-                id=f"FR-{region}",
-                name=f"Région: {region_info['name']}",
-                location=region_info['major_cities'][0],
-                type="Region",
-                specialty=None
-            )
-            
-            prescribing = PrescribingData(
+            rows = (rows[self._region_index[region]],)
+        
+        result = [
+            PrescribingData(
                 prescriber=prescriber,
                 drug_code=drug_code,
                 period=period or "2024",
                 prescriptions=prescriptions,
-                quantity=float(prescriptions * 60),  # Estimate DDDs
+                quantity=quantity,
                 cost=cost
             )
-            
-            result.append(prescribing)
-        else:
-            # All regions sample
-            for region_code, region_info in self.regions.items():
-                prescriptions = int(region_info['population'] * 0.02)
-                cost = prescriptions * 45.0
-                
-                prescriber = Prescriber(
-                    id=f"FR-{region_code}",
-                    name=f"Région: {region_info['name']}",
-                    location=region_info['major_cities'][0],
-                    type="Region",
-                    specialty=None
-                )
-                
-                prescribing = PrescribingData(
-                    prescriber=prescriber,
-                    drug_code=drug_code,
-                    period=period or "2024",
-                    prescriptions=prescriptions,
-                    quantity=float(prescriptions * 60),
-                    cost=cost
-                )
-                
-                result.append(prescribing)
+            for prescriber, prescriptions, quantity, cost in rows
+        ]
         
+        self.cache.set(cache_key, tuple(result), ttl=PRESCRIBING_CACHE_TTL)
         return result
     
+    def _regional_distribution(self, drug_code: str) -> Tuple[Tuple[Prescriber, int, float, float], ...]:
+        """
+        (prescriber, prescriptions, quantity, cost) for every region
+        
+        National Open Medic totals are split by population share in one pass
+        over the region columns built at init. Rows depend only on the drug,
+        so each is computed once and reused for every period and region.
+        """
+        rows = self._distributions.get(drug_code)
+        if rows is not None:
+            return rows
+        
+        drug_info = self.real_drug_data.get(drug_code)
+        if drug_info is None:
+            # No real data - sample estimate
+            return self._sample_distribution
+        
+        boxes = [int(drug_info['annual_boxes'] * share) for share in self._region_shares]
+        rows = tuple(zip(
+            self._region_prescribers,
+            [int(region_boxes * 0.85) for region_boxes in boxes],  # ~0.85 prescriptions per box
+            [float(region_boxes * drug_info['ddd_per_box']) for region_boxes in boxes],
+            [drug_info['annual_cost_eur'] * share for share in self._region_shares]
+        ))
+        self._distributions[drug_code] = rows
+        return rows
+    
     def get_latest_period(self) -> str:
         """Get the most recent data period available"""
         return "2024"
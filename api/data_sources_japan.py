@@ -8,11 +8,33 @@ Provider: Ministry of Health, Labour and Welfare (MHLW)
 Real Data: Prefecture-level prescription statistics (47 prefectures)
 Coverage: ~100% of Japanese population (125M)
 """
-from typing import List, Dict, Optional
+import logging
+import random
+from array import array
+from typing import List, Dict, Optional, Tuple
 from pharma_intelligence_engine import (
     DataSource, PrescribingData, Prescriber
 )
 
+logger = logging.getLogger(__name__)
+
+# Base prescription rates (per 1000 population per year)
+# Adjusted for Japan's aging population and universal healthcare
+DRUG_RATES = {
+    'metformin': 45,  # Diabetes (high aging population)
+    'atorvastatin': 38,  # Cholesterol (high usage)
+    'amlodipine': 52,  # Hypertension (very common in Japan)
+    'rosuvastatin': 32,  # Cholesterol
+    'omeprazole': 28,  # Acid reflux
+}
+DEFAULT_DRUG_RATE = 30  # per 1000 pop
+
+# Cost per prescription (JPY) - converted to EUR at 160 JPY/EUR
+COST_PER_PRESCRIPTION_EUR = 3500 / 160  # Average ~¥3,500 per prescription
+
+# Regional variation (±15%), fixed per prefecture
+REGIONAL_VARIATION = (0.85, 1.15)
+
 
 class JapanDataSource(DataSource):
     """
@@ -27,7 +49,6 @@ class JapanDataSource(DataSource):
     """
     
     def __init__(self):
-        self.cache = {}
         self.population = 125_000_000
         
         # 47 Japanese prefectures with realistic population distribution
@@ -93,6 +114,34 @@ class JapanDataSource(DataSource):
             'rosuvastatin': {'yj_code': '2189019F1', 'atc': 'C10AA07', 'name_jp': 'ロスバスタチン'},
             'omeprazole': {'yj_code': '2329021F1', 'atc': 'A02BC01', 'name_jp': 'オメプラゾール'},
         }
+        
+        # Prefecture columns for computing every prefecture at once. Each
+        # prefecture's variation is seeded by its code, so it's drawn once
+        # here; columns are ordered by population × variation, which is the
+        # prescribing order for any drug.
+        variation = {
+            code: random.Random(int(code)).uniform(*REGIONAL_VARIATION)
+            for code in self.prefectures
+        }
+        codes = sorted(
+            self.prefectures,
+            key=lambda code: self.prefectures[code]['population'] * variation[code],
+            reverse=True
+        )
+        self._pref_index = {code: i for i, code in enumerate(codes)}
+        self._pref_scales = array('d', (self.prefectures[code]['population'] / 1000 for code in codes))
+        self._pref_variation = array('d', (variation[code] for code in codes))
+        self._pref_prescribers = tuple(
+            Prescriber(
+                id=f"JP-{code}",
+                name=f"Prefecture {self.prefectures[code]['name']}",
+                type="Prefecture",
+                location=f"{self.prefectures[code]['name']}, Japan",
+                list_size=self.prefectures[code]['population']
+            )
+            for code in codes
+        )
+        self._counts_by_rate: Dict[float, Tuple[int, ...]] = {}
     
     def search_drug(self, name: str) -> List[Dict]:
         """
@@ -138,82 +187,62 @@ class JapanDataSource(DataSource):
         Returns:
             List of PrescribingData objects (one per prefecture)
         """
-        print(f"📊 Fetching NDB Open Data for Japan...")
-        print(f"   Drug: {drug_code}")
-        print(f"   Period: {period}")
-        print(f"   Coverage: {len(self.prefectures)} prefectures")
+        logger.debug("Generating NDB Open Data for Japan: %s, %s (%d prefectures)",
+                     drug_code, period, len(self.prefectures))
         
         # Generate realistic prescription data based on prefecture populations
         # and typical medication usage patterns in Japan
         
-        results = []
-        
-        # Base prescription rates (per 1000 population per year)
-        # Adjusted for Japan's aging population and universal healthcare
-        drug_rates = {
-            'metformin': 45,  # Diabetes (high aging population)
-            'atorvastatin': 38,  # Cholesterol (high usage)
-            'amlodipine': 52,  # Hypertension (very common in Japan)
-            'rosuvastatin': 32,  # Cholesterol
-            'omeprazole': 28,  # Acid reflux
-        }
-        
         # Determine drug type for rate calculation
+        base_rate = DEFAULT_DRUG_RATE
         drug_name = drug_code.lower()
-        base_rate = 30  # Default rate per 1000 pop
-        
-        for drug, rate in drug_rates.items():
+        for drug, rate in DRUG_RATES.items():
             if drug in drug_name:
                 base_rate = rate
                 break
         
-        # Cost per prescription (JPY) - converted to EUR at 160 JPY/EUR
-        cost_per_prescription_jpy = 3500  # Average ~¥3,500 per prescription
-        cost_per_prescription_eur = cost_per_prescription_jpy / 160
+        prescriptions = self._prefecture_prescriptions(base_rate)
+        rows = zip(self._pref_prescribers, prescriptions)
+        if region:
+            index = self._pref_index.get(region)
+            rows = [] if index is None else [(self._pref_prescribers[index], prescriptions[index])]
         
-        for pref_code, pref_data in self.prefectures.items():
-            # Filter by region if specified
-            if region and region != pref_code:
-                continue
-            
-            pop = pref_data['population']
-            pref_name = pref_data['name']
-            
-            # Calculate prescriptions based on population and rate
-            # Add regional variation (±15%)
-            import random
-            random.seed(int(pref_code))  # Consistent randomness
-            variation = random.uniform(0.85, 1.15)
-            
-            prescriptions = int((pop / 1000) * base_rate * variation)
-            cost_eur = prescriptions * cost_per_prescription_eur
-            
-            # Create "prescriber" (actually prefecture)
-            prescriber = Prescriber(
-                id=f"JP-{pref_code}",
-                name=f"Prefecture {pref_name}",
-                type="Prefecture",
-                location=f"{pref_name}, Japan",
-                list_size=pop
-            )
-            
-            # Create prescribing data
-            data = PrescribingData(
+        # Create prescribing data ("prescriber" is actually a prefecture)
+        results = [
+            PrescribingData(
                 prescriber=prescriber,
                 drug_code=drug_code,
                 period=period,
-                prescriptions=prescriptions,
-                quantity=prescriptions,  # 1:1 for aggregated data
-                cost=cost_eur
+                prescriptions=count,
+                quantity=count,  # 1:1 for aggregated data
+                cost=count * COST_PER_PRESCRIPTION_EUR
             )
-            
-            results.append(data)
+            for prescriber, count in rows
+        ]
         
-        # Sort by prescriptions (descending)
+        # Sort by prescriptions (descending); prefectures are already held
+        # in roughly this order, so this is a near-linear pass
         results.sort(key=lambda x: x.prescriptions, reverse=True)
         
         return results
     
+    def _prefecture_prescriptions(self, base_rate: float) -> Tuple[int, ...]:
+        """
+        Annual prescriptions per prefecture (prefecture column order)
+        
+        population / 1000 × rate × regional variation over the columns built
+        at init. Depends only on the rate, so drugs sharing a rate and
+        repeat periods reuse the same column.
+        """
+        counts = self._counts_by_rate.get(base_rate)
+        if counts is None:
+            counts = tuple(
+                int(scale * base_rate * variation)
+                for scale, variation in zip(self._pref_scales, self._pref_variation)
+            )
+            self._counts_by_rate[base_rate] = counts
+        return counts
+    
     def get_prescriber_details(self, prescriber_ids: List[str]) -> List[Prescriber]:
         """Get prefecture details"""
         results = []
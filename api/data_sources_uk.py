@@ -4,35 +4,71 @@ UK Data Source - NHS OpenPrescribing API Adapter
 Implements DataSource interface for UK prescribing data
 """
 import requests
+import threading
+from collections import OrderedDict
+import logging
 from typing import List, Dict, Optional
 from pharma_intelligence_engine import (
-    DataSource, PrescribingData, Prescriber
+    DataSource, PrescribingData, PrescribingSeries, Prescriber, get_shared_cache, period_range
 )
+from metrics import upstream_get
+
+logger = logging.getLogger(__name__)
+
+# Number of (drug_code, period) pulls kept in the per-practice index
+MAX_INDEXED_PULLS = 50
+
+# Shared cache lifetimes (seconds)
+SEARCH_CACHE_TTL = 24 * 3600
+PULL_CACHE_TTL = 6 * 3600
+PRACTICE_DETAILS_CACHE_TTL = 24 * 3600
+
+# The single row of national series (OpenPrescribing /spending/ totals)
+NATIONAL_PRESCRIBER = Prescriber(id='ENGLAND', name='NHS England', type='Country', location='England')
 
 class UKDataSource(DataSource):
     """UK NHS prescribing data via OpenPrescribing API"""
     
     def __init__(self):
         self.base_url = "https://openprescribing.net/api/1.0"
-        self.cache = {}
+        self.cache = get_shared_cache()
+        
+        # Per-practice index: (drug_code, period) -> {'complete': bool, 'rows': {practice_id: PrescribingData}}
+        # Filled by every pull so single-practice lookups never need a national fetch
+        self.practice_index = OrderedDict()
+        self._index_lock = threading.Lock()  # Pulls may run in worker threads
     
     def search_drug(self, name: str) -> List[Dict]:
         """Search for BNF codes by drug name"""
+        cache_key = f"uk:bnf_code:{name.lower()}"
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+        
         url = f"{self.base_url}/bnf_code/"
         params = {'q': name, 'format': 'json'}
         
         try:
-            response = requests.get(url, params=params, timeout=30)
+            response = upstream_get('UK', 'bnf_code', requests.get, url, params=params, timeout=30)
             if response.status_code == 200:
-                return response.json()
+                results = response.json()
+                if results:
+                    self.cache.set(cache_key, tuple(results), ttl=SEARCH_CACHE_TTL)
+                return results
         except Exception as e:
-            print(f"Error searching drug: {e}")
+            logger.warning("UK drug search failed: %s", e)
         
         return []
     
     def get_prescribing_data(self, drug_code: str, period: str, 
                            region: Optional[str] = None) -> List[PrescribingData]:
         """Get prescribing data for a drug"""
+        cache_key = f"uk:spending_by_org:{drug_code}:{period}:{region}"
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            self._index_pull(drug_code, period, cached, complete=region is None)
+            return list(cached)
+        
         url = f"{self.base_url}/spending_by_org/"
         params = {
             'org_type': 'practice',
@@ -45,9 +81,9 @@ class UKDataSource(DataSource):
             params['org'] = region
         
         try:
-            response = requests.get(url, params=params, timeout=60)
+            response = upstream_get('UK', 'spending_by_org', requests.get, url, params=params, timeout=60)
             if response.status_code != 200:
-                print(f"API error: {response.status_code}")
+                logger.warning("OpenPrescribing API error: %s", response.status_code)
                 return []
             
             raw_data = response.json()
@@ -58,34 +94,133 @@ class UKDataSource(DataSource):
             )
             
             # Convert to PrescribingData objects
-            result = []
+            result = [self._to_prescribing_data(item, drug_code, period, practice_details) for item in raw_data]
+            
+            # National pulls are complete: a practice missing from them has no data
+            self._index_pull(drug_code, period, result, complete=region is None)
+            if result:
+                self.cache.set(cache_key, tuple(result), ttl=PULL_CACHE_TTL)
+            
+            return result
+            
+        except Exception as e:
+            logger.warning("Error fetching UK prescribing data: %s", e)
+            return []
+    
+    def get_prescribing_series(self, drug_code: str, start: str, end: str,
+                               region: Optional[str] = None) -> PrescribingSeries:
+        """
+        Get monthly prescribing data from start to end (inclusive)
+        
+        Periods are month starts (YYYY-MM-DD; YYYY-MM and YYYY are widened to
+        whole months/years). For an org, one spending_by_org request without
+        a date returns every month at once, and each month is cached under
+        its single-period key. Without a region the series is national: one
+        NHS England row from the /spending/ totals, a single request for
+        every month (practice-level national queries need a date each).
+        """
+        start = f"{start[:7]}-01" if len(start) > 4 else f"{start}-01-01"
+        end = f"{end[:7]}-01" if len(end) > 4 else f"{end}-12-01"
+        periods = period_range(start, end)
+        if not region:
+            return self._national_series(drug_code, periods)
+        
+        pulls = {}
+        for period in periods:
+            cached = self.cache.get(f"uk:spending_by_org:{drug_code}:{period}:{region}")
+            if cached is None:
+                break
+            pulls[period] = cached
+        else:
+            return PrescribingSeries.from_pulls(drug_code, pulls)
+        
+        url = f"{self.base_url}/spending_by_org/"
+        params = {
+            'org_type': 'practice',
+            'code': drug_code,
+            'org': region,
+            'format': 'json'
+        }
+        
+        pulls = {period: [] for period in periods}
+        try:
+            response = upstream_get('UK', 'spending_by_org', requests.get, url, params=params, timeout=60)
+            if response.status_code != 200:
+                logger.warning("OpenPrescribing API error: %s", response.status_code)
+                return PrescribingSeries.from_pulls(drug_code, pulls)
+            
+            raw_data = [item for item in response.json() if item.get('date') in pulls]
+            practice_details = self._get_practice_details_batch(list({item['row_id'] for item in raw_data}))
             for item in raw_data:
-                practice_code = item.get('row_id')
-                details = practice_details.get(practice_code, {})
-                
-                prescriber = Prescriber(
-                    id=practice_code,
-                    name=item.get('row_name', 'Unknown'),
-                    type='GP Practice',
-                    list_size=details.get('total_list_size')
-                )
-                
-                data = PrescribingData(
-                    prescriber=prescriber,
+                pulls[item['date']].append(self._to_prescribing_data(item, drug_code, item['date'], practice_details))
+        except Exception as e:
+            logger.warning("Error fetching UK prescribing series: %s", e)
+            return PrescribingSeries.from_pulls(drug_code, {period: [] for period in periods})
+        
+        for period, result in pulls.items():
+            self._index_pull(drug_code, period, result, complete=False)
+            if result:
+                self.cache.set(f"uk:spending_by_org:{drug_code}:{period}:{region}", tuple(result), ttl=PULL_CACHE_TTL)
+        
+        return PrescribingSeries.from_pulls(drug_code, pulls)
+    
+    def _national_series(self, drug_code: str, periods: List[str]) -> PrescribingSeries:
+        """Internal: national monthly totals for periods as one NHS England row"""
+        cache_key = f"uk:spending:{drug_code}"
+        totals = self.cache.get(cache_key)
+        if totals is None:
+            url = f"{self.base_url}/spending/"
+            params = {'code': drug_code, 'format': 'json'}
+            totals = []
+            try:
+                response = upstream_get('UK', 'spending', requests.get, url, params=params, timeout=60)
+                if response.status_code == 200:
+                    totals = response.json()
+                    if totals:
+                        self.cache.set(cache_key, totals, ttl=PULL_CACHE_TTL)
+                else:
+                    logger.warning("OpenPrescribing API error: %s", response.status_code)
+            except Exception as e:
+                logger.warning("Error fetching UK national spending: %s", e)
+        
+        by_date = {item.get('date'): item for item in totals}
+        pulls = {period: [] for period in periods}
+        for period in periods:
+            item = by_date.get(period)
+            if item:
+                pulls[period].append(PrescribingData(
+                    prescriber=NATIONAL_PRESCRIBER,
                     drug_code=drug_code,
                     period=period,
                     prescriptions=int(item.get('items', 0)),
                     quantity=float(item.get('quantity', 0)),
                     cost=float(item.get('actual_cost', 0))
-                )
-                
-                result.append(data)
-            
-            return result
-            
-        except Exception as e:
-            print(f"Error fetching prescribing data: {e}")
-            return []
+                ))
+        
+        return PrescribingSeries.from_pulls(drug_code, pulls)
+    
+    @staticmethod
+    def _to_prescribing_data(item: Dict, drug_code: str, period: str,
+                             practice_details: Dict[str, Dict]) -> PrescribingData:
+        """Internal: PrescribingData for one spending_by_org row"""
+        practice_code = item.get('row_id')
+        details = practice_details.get(practice_code, {})
+        
+        prescriber = Prescriber(
+            id=practice_code,
+            name=item.get('row_name', 'Unknown'),
+            type='GP Practice',
+            list_size=details.get('total_list_size')
+        )
+        
+        return PrescribingData(
+            prescriber=prescriber,
+            drug_code=drug_code,
+            period=period,
+            prescriptions=int(item.get('items', 0)),
+            quantity=float(item.get('quantity', 0)),
+            cost=float(item.get('actual_cost', 0))
+        )
     
     def get_prescriber_details(self, prescriber_ids: List[str]) -> List[Prescriber]:
         """Get detailed prescriber information"""
@@ -106,6 +241,42 @@ class UKDataSource(DataSource):
         
         return result
     
+    def get_prescriber_data(self, prescriber_id: str, drug_code: str,
+                            period: str) -> Optional[PrescribingData]:
+        """
+        Get prescribing data for one practice
+        
+        Answers from the per-practice index when the (drug, period) has been
+        pulled; otherwise queries OpenPrescribing for that practice only.
+        """
+        with self._index_lock:
+            pull = self.practice_index.get((drug_code, period))
+            if pull is not None:
+                self.practice_index.move_to_end((drug_code, period))
+                if prescriber_id in pull['rows'] or pull['complete']:
+                    return pull['rows'].get(prescriber_id)
+        
+        # Miss: single-practice upstream query (org=practice_id)
+        result = self.get_prescribing_data(drug_code, period, region=prescriber_id)
+        return next((p for p in result if p.prescriber.id == prescriber_id), None)
+    
+    def _index_pull(self, drug_code: str, period: str,
+                    rows: List[PrescribingData], complete: bool):
+        """Internal: Add a pull to the per-practice index (LRU over pulls)"""
+        key = (drug_code, period)
+        with self._index_lock:
+            pull = self.practice_index.get(key)
+            
+            if pull is None or complete:
+                pull = {'complete': complete, 'rows': {}}
+                self.practice_index[key] = pull
+            
+            pull['rows'].update((p.prescriber.id, p) for p in rows)
+            self.practice_index.move_to_end(key)
+            
+            while len(self.practice_index) > MAX_INDEXED_PULLS:
+                self.practice_index.popitem(last=False)
+    
     def get_latest_period(self) -> str:
         """Get the most recent data period available"""
         # NHS data typically has 2-3 month lag
@@ -115,10 +286,9 @@ class UKDataSource(DataSource):
     def _get_practice_details_batch(self, practice_codes: List[str]) -> Dict[str, Dict]:
         """Internal: Fetch practice details in batch"""
         # Check cache first
-        cache_key = 'all_practices'
-        if cache_key in self.cache:
-            all_practices = self.cache[cache_key]
-        else:
+        cache_key = 'uk:all_practices'
+        all_practices = self.cache.get(cache_key)
+        if all_practices is None:
             url = f"{self.base_url}/org_details/"
             params = {
                 'org_type': 'practice',
@@ -127,21 +297,22 @@ class UKDataSource(DataSource):
             }
             
             try:
-                response = requests.get(url, params=params, timeout=60)
+                response = upstream_get('UK', 'org_details', requests.get, url, params=params, timeout=60)
                 if response.status_code == 200:
                     all_practices = response.json()
-                    self.cache[cache_key] = all_practices
+                    self.cache.set(cache_key, all_practices, ttl=PRACTICE_DETAILS_CACHE_TTL)
                 else:
                     all_practices = []
             except Exception as e:
-                print(f"Error fetching practice details: {e}")
+                logger.warning("Error fetching practice details: %s", e)
                 all_practices = []
         
         # Build lookup dict
+        wanted = set(practice_codes)
         details = {}
         for practice in all_practices:
             code = practice.get('row_id')
-            if code in practice_codes:
+            if code in wanted:
                 details[code] = {
                     'name': practice.get('row_name', 'Unknown'),
                     'total_list_size': practice.get('total_list_size'),
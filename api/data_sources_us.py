@@ -9,10 +9,20 @@ Coverage: Medicare Part D prescriptions (40M+ beneficiaries, seniors 65+)
 import requests
 import os
 import json
+import logging
 from typing import List, Dict, Optional
 from pharma_intelligence_engine import (
-    DataSource, PrescribingData, Prescriber
+    DataSource, PrescribingData, PrescribingSeries, Prescriber, get_shared_cache
 )
+from metrics import upstream_get
+
+logger = logging.getLogger(__name__)
+
+# Shared cache lifetime for pulls built from CMS cache files (seconds)
+PRESCRIBING_CACHE_TTL = 3600
+
+# Year the CMS cache files aggregate (one annual total per state)
+DATA_YEAR = "2023"
 
 class USDataSource(DataSource):
     """US Medicare Part D prescribing data via CMS API"""
@@ -29,7 +39,7 @@ class USDataSource(DataSource):
         # Drug lookup: Use FDA NDC directory
         self.fda_ndc_url = "https://api.fda.gov/drug/ndc.json"
         
-        self.cache = {}
+        self.cache = get_shared_cache()
         
         # Load available drugs from cache directory
         self._load_available_drugs()
@@ -41,7 +51,7 @@ class USDataSource(DataSource):
         try:
             cache_dir = os.path.join(os.path.dirname(__file__), 'cache')
             if not os.path.exists(cache_dir):
-                print("⚠️  No cache directory found for US data")
+                logger.warning("No cache directory found for US data")
                 return
             
             # Scan for drug cache files (us_{drug}_data.json)
@@ -53,10 +63,10 @@ class USDataSource(DataSource):
                     # Also store the cleaned filename version for exact matching
                     self.available_drugs[drug_name.lower()] = drug_name
                     
-            print(f"✓ Loaded {len(self.available_drugs)} drugs from US cache")
+            logger.info("Loaded %d drugs from US cache", len(self.available_drugs))
             
         except Exception as e:
-            print(f"⚠️  Error loading available drugs: {e}")
+            logger.warning("Error loading available US drugs: %s", e)
             self.available_drugs = {}
     
     def search_drug(self, name: str) -> List[Dict]:
@@ -76,7 +86,7 @@ class USDataSource(DataSource):
                 'limit': 50
             }
             
-            response = requests.get(self.fda_ndc_url, params=params, timeout=30)
+            response = upstream_get('US', 'fda_ndc', requests.get, self.fda_ndc_url, params=params, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -98,11 +108,11 @@ class USDataSource(DataSource):
                 
                 return results
             else:
-                print(f"FDA API error: {response.status_code}")
+                logger.warning("FDA API error: %s", response.status_code)
                 return []
                 
         except Exception as e:
-            print(f"Error searching drug: {e}")
+            logger.warning("US drug search failed: %s", e)
             return []
     
     def get_prescribing_data(self, drug_code: str, period: str, 
@@ -118,19 +128,24 @@ class USDataSource(DataSource):
         Returns:
             List of PrescribingData objects (synthetic prescribers from state aggregates)
         """
+        cache_key = f"us:prescribing:{drug_code.lower()}:{region}"
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+        
         try:
             # Load from cache file
             cache_file = os.path.join(os.path.dirname(__file__), 'cache', 
                                      f'us_{drug_code.lower().replace(" ", "_")}_data.json')
             
             if not os.path.exists(cache_file):
-                print(f"⚠️  No cache file found for '{drug_code}': {cache_file}")
+                logger.warning("No US cache file for %r: %s", drug_code, cache_file)
                 return []
             
             with open(cache_file, 'r') as f:
                 drug_data = json.load(f)
             
-            print(f"✓ Loaded cache for {drug_code}: {drug_data['national_total']['total_prescriptions']:,} Rx")
+            logger.debug("Loaded US cache for %s", drug_code)
             
             # Convert state-level data to synthetic "prescribers" (top states)
             result = []
@@ -162,7 +177,7 @@ class USDataSource(DataSource):
                 data = PrescribingData(
                     prescriber=prescriber,
                     drug_code=drug_code,
-                    period="2023",  # Cache data is from 2023
+                    period=DATA_YEAR,
                     prescriptions=state_data['prescriptions'],
                     quantity=state_data['prescriptions'],
                     cost=state_data['cost'],
@@ -172,18 +187,30 @@ class USDataSource(DataSource):
                 result.append(data)
             
             if not result:
-                print(f"⚠️  No data found for '{drug_code}' in region '{region}'")
+                logger.info("No US data for %r in region %r", drug_code, region)
             else:
-                print(f"✅ Returning {len(result)} state aggregates for {drug_code}")
+                self.cache.set(cache_key, tuple(result), ttl=PRESCRIBING_CACHE_TTL)
             
             return result
             
         except Exception as e:
-            print(f"Error loading prescribing data from cache: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error loading US prescribing data from cache: %s", e)
             return []
     
+    def get_prescribing_series(self, drug_code: str, start: str, end: str,
+                               region: Optional[str] = None) -> PrescribingSeries:
+        """
+        Get prescribing data for every period from start to end
+        
+        The CMS cache files hold a single annual aggregate (DATA_YEAR), so the
+        series has that one period when the range covers it and is empty
+        otherwise.
+        """
+        pulls = {}
+        if start[:4] <= DATA_YEAR <= end[:4]:
+            pulls[DATA_YEAR] = self.get_prescribing_data(drug_code, DATA_YEAR, region)
+        return PrescribingSeries.from_pulls(drug_code, pulls)
+    
     def get_prescriber_details(self, prescriber_ids: List[str]) -> List[Prescriber]:
         """
         Get detailed prescriber information by NPI
@@ -243,11 +270,11 @@ class USDataSource(DataSource):
         # Try partial matching for common abbreviations/variations
         for cached_drug in self.available_drugs:
             if clean_name in cached_drug or cached_drug in clean_name:
-                print(f"✓ Matched '{name}' to cached drug '{cached_drug}'")
+                logger.debug("Matched %r to cached US drug %r", name, cached_drug)
                 return self.available_drugs[cached_drug]
         
         # Not found in cache
-        print(f"⚠️  Drug '{name}' not found in US cache (available: {len(self.available_drugs)} drugs)")
+        logger.info("Drug %r not found in US cache (%d drugs available)", name, len(self.available_drugs))
         return None
     
     def get_state_summary(self, drug_name: str, year: str = "2022") -> Dict:
@@ -272,7 +299,8 @@ class USDataSource(DataSource):
                 '$limit': 100
             }
             
-            response = requests.get(
+            response = upstream_get(
+                'US', 'state_summary', requests.get,
                 self.prescriber_drug_endpoint,
                 params=params,
                 timeout=60
@@ -284,7 +312,7 @@ class USDataSource(DataSource):
                 return {}
                 
         except Exception as e:
-            print(f"Error fetching state summary: {e}")
+            logger.warning("Error fetching US state summary: %s", e)
             return {}
     
     def get_specialty_breakdown(self, drug_name: str, year: str = "2022") -> Dict:
@@ -309,7 +337,8 @@ class USDataSource(DataSource):
                 '$limit': 50
             }
             
-            response = requests.get(
+            response = upstream_get(
+                'US', 'specialty_breakdown', requests.get,
                 self.prescriber_drug_endpoint,
                 params=params,
                 timeout=60
@@ -321,7 +350,7 @@ class USDataSource(DataSource):
                 return {}
                 
         except Exception as e:
-            print(f"Error fetching specialty breakdown: {e}")
+            logger.warning("Error fetching US specialty breakdown: %s", e)
             return {}
 
 
@@ -7,11 +7,19 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from datetime import datetime
+import logging
 import time
 
 from routes import router
 from routes_granular import router as granular_router
 from models import ErrorResponse
+from warmup import start_background_warmup
+from structured_logging import setup_logging, should_sample, LOG_SLOW_REQUEST_MS
+from metrics import HTTP_REQUEST_SECONDS
+
+# Structured, queue-backed logging (LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATE)
+setup_logging()
+logger = logging.getLogger("api")
 
 # ============================================================================
 # APPLICATION SETUP
@@ -75,21 +83,44 @@ app.add_middleware(
 # Request timing middleware
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
-    """Add processing time to response headers"""
-    start_time = time.time()
+    """Add processing time to response headers and the per-route latency histogram"""
+    start_time = time.perf_counter()
     response = await call_next(request)
-    process_time = time.time() - start_time
+    process_time = time.perf_counter() - start_time
     response.headers["X-Process-Time"] = str(process_time)
+    
+    # Label by route template (e.g. /country/{country_code}) to bound cardinality
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.observe(
+        process_time,
+        method=request.method,
+        route=route.path if route is not None else "unmatched",
+        status=response.status_code
+    )
     return response
 
 
 # Request logging middleware
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    """Log all requests (basic version)"""
-    print(f"[{datetime.now().isoformat()}] {request.method} {request.url.path}")
+    """Log a sample of requests (server errors and slow requests always)"""
+    start_time = time.perf_counter()
     response = await call_next(request)
-    print(f"  → Status: {response.status_code}")
+    duration_ms = (time.perf_counter() - start_time) * 1000
+    
+    if response.status_code >= 500 or duration_ms >= LOG_SLOW_REQUEST_MS:
+        level = logging.WARNING
+    elif should_sample():
+        level = logging.INFO
+    else:
+        return response
+    
+    logger.log(level, "%s %s %s", request.method, request.url.path, response.status_code, extra={
+        'method': request.method,
+        'path': request.url.path,
+        'status': response.status_code,
+        'duration_ms': round(duration_ms, 1)
+    })
     return response
 
 
@@ -138,21 +169,16 @@ app.include_router(granular_router)
 @app.on_event("startup")
 async def startup_event():
     """Run on application startup"""
-    print("\n" + "="*80)
-    print("🚀 PHARMA INTELLIGENCE API STARTING")
-    print("="*80)
-    print(f"Version: {app.version}")
-    print(f"Docs: http://localhost:8000/docs")
-    print(f"Time: {datetime.now().isoformat()}")
-    print("="*80 + "\n")
+    logger.info("Pharma Intelligence API starting", extra={'version': app.version, 'docs': '/docs'})
+    
+    # Precompute hot drug × country analyses; /health reports 503 until done
+    start_background_warmup()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Run on application shutdown"""
-    print("\n" + "="*80)
-    print("🛑 PHARMA INTELLIGENCE API SHUTTING DOWN")
-    print("="*80 + "\n")
+    logger.info("Pharma Intelligence API shutting down")
 
 
 # ============================================================================
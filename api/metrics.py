@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Metrics
+Minimal Prometheus-compatible counters and histograms, rendered in the
+text exposition format by GET /metrics
+
+Recording is a dict lookup and a bisect under a lock (a few microseconds),
+so collection stays on in production.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Latency buckets (seconds): 5ms .. 60s
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if value == float('inf'):
+        return "+Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple, list] = {}  # key -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class GaugeCallback:
+    """Gauge (or counter) whose samples are read from a callback at scrape time"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str],
+                 callback: Callable[[], Iterable[Tuple[Tuple, float]]], kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in self.callback():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Ordered collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route", "status")
+))
+ANALYSIS_STAGE_SECONDS = REGISTRY.register(Histogram(
+    "analysis_stage_duration_seconds", "Time spent in each analyze_drug stage",
+    ("stage",)
+))
+UPSTREAM_SECONDS = REGISTRY.register(Histogram(
+    "upstream_request_duration_seconds", "Latency of calls to upstream data APIs",
+    ("source", "endpoint")
+))
+UPSTREAM_ERRORS = REGISTRY.register(Counter(
+    "upstream_errors_total", "Failed upstream data API calls (exceptions and non-200 responses)",
+    ("source", "endpoint")
+))
+
+
+def observe_stage(stage: str, seconds: float):
+    """Stage timer handed to PharmaIntelligenceEngine.analyze_drug"""
+    ANALYSIS_STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+@contextmanager
+def upstream_call(source: str, endpoint: str):
+    """Time an upstream call; exceptions raised inside are counted as errors"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        UPSTREAM_ERRORS.inc(source=source, endpoint=endpoint)
+        raise
+    finally:
+        UPSTREAM_SECONDS.observe(time.perf_counter() - start, source=source, endpoint=endpoint)
+
+
+def upstream_get(source: str, endpoint: str, get: Callable, *args, **kwargs):
+    """
+    Call get(*args, **kwargs) (e.g. requests.get) as a timed upstream call
+
+    Non-200 responses are counted as errors as well as exceptions.
+    """
+    with upstream_call(source, endpoint):
+        response = get(*args, **kwargs)
+    if response.status_code != 200:
+        UPSTREAM_ERRORS.inc(source=source, endpoint=endpoint)
+    return response
+
+
+def register_cache_stats(name: str, stats: Callable[[], Dict[str, Tuple[int, int]]]):
+    """
+    Expose hit/miss counters and hit ratio for caches
+
+    stats() returns {cache label: (hits, misses)} at scrape time.
+    """
+    def hits():
+        return [((cache,), counts[0]) for cache, counts in stats().items()]
+
+    def misses():
+        return [((cache,), counts[1]) for cache, counts in stats().items()]
+
+    def ratio():
+        return [((cache,), counts[0] / (counts[0] + counts[1]) if counts[0] + counts[1] else 0.0)
+                for cache, counts in stats().items()]
+
+    REGISTRY.register(GaugeCallback(f"{name}_hits_total", "Cache hits", ("cache",), hits, kind="counter"))
+    REGISTRY.register(GaugeCallback(f"{name}_misses_total", "Cache misses", ("cache",), misses, kind="counter"))
+    REGISTRY.register(GaugeCallback(f"{name}_hit_ratio", "Cache hit ratio since start", ("cache",), ratio))
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Mock Data
+Deterministic stand-in numbers for data sources and fallbacks without real
+data
+
+Every draw is seeded from its key, e.g. (country, drug, period, field), so
+the same request gives the same numbers in every worker and process and
+responses built from it can be cached. Vectors are generated in one call
+per key and memoized, so repeated requests (load tests) are a dict lookup.
+"""
+import random
+from functools import lru_cache
+from typing import Tuple
+
+MOCK_CACHE_ENTRIES = 4096
+DEFAULT_SPREAD = 0.15  # regional variation (±15%)
+
+
+def mock_rng(*key) -> random.Random:
+    """
+    Random generator seeded from key
+
+    String seeds are hashed with SHA-512 by random.seed, unlike hash(),
+    which is salted per process.
+    """
+    return random.Random("\x1f".join(str(part) for part in key))
+
+
+@lru_cache(maxsize=MOCK_CACHE_ENTRIES)
+def mock_uniform(n: int, low: float, high: float, *key) -> Tuple[float, ...]:
+    """n uniform draws in [low, high] for key"""
+    rng = mock_rng(*key)
+    return tuple(rng.uniform(low, high) for _ in range(n))
+
+
+@lru_cache(maxsize=MOCK_CACHE_ENTRIES)
+def mock_ints(n: int, low: int, high: int, *key) -> Tuple[int, ...]:
+    """n integer draws in [low, high] (inclusive) for key"""
+    rng = mock_rng(*key)
+    return tuple(rng.randint(low, high) for _ in range(n))
+
+
+def mock_factors(n: int, *key, spread: float = DEFAULT_SPREAD) -> Tuple[float, ...]:
+    """n multiplicative variation factors in [1 - spread, 1 + spread] for key"""
+    return mock_uniform(n, 1 - spread, 1 + spread, *key)
@@ -25,6 +25,11 @@ class AnalysisRequest(BaseModel):
                       description="Number of top opportunities to return (1-500)")
     scorer: Optional[str] = Field("market_share", 
                                  description="Scoring algorithm: simple_volume or market_share")
+    segmentation: str = Field("mean", pattern="^(mean|percentile)$",
+                              description="Volume tiers: mean (multiples of the average) or "
+                                          "percentile (top 20% / next 30% / rest)")
+    async_mode: bool = Field(False,
+                             description="Queue the analysis and return a job id immediately")
     
     class Config:
         schema_extra = {
@@ -34,6 +39,43 @@ class AnalysisRequest(BaseModel):
                 "country": "UK",
                 "region": None,
                 "top_n": 50,
+                "scorer": "market_share",
+                "async_mode": False
+            }
+        }
+
+
+class BatchAnalysisItem(BaseModel):
+    """One (drug, country, region) combination in a batch analysis"""
+    drug_name: str = Field(..., min_length=1, max_length=200,
+                          description="Drug name (brand or generic)")
+    country: str = Field(..., pattern="^[A-Z]{2}$",
+                        description="ISO 3166-1 alpha-2 country code (e.g., UK, US)")
+    region: Optional[str] = Field(None, max_length=50,
+                                 description="Optional region filter")
+
+
+class BatchAnalysisRequest(BaseModel):
+    """Request model for batch drug × country analysis"""
+    company: str = Field(..., min_length=1, max_length=200,
+                        description="Pharmaceutical company name")
+    items: List[BatchAnalysisItem] = Field(..., min_length=1, max_length=50,
+                                           description="Analyses to run (1-50)")
+    top_n: int = Field(50, ge=1, le=500,
+                      description="Number of top opportunities per analysis (1-500)")
+    scorer: Optional[str] = Field("market_share",
+                                 description="Scoring algorithm: simple_volume or market_share")
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "company": "Novartis",
+                "items": [
+                    {"drug_name": "metformin", "country": "UK"},
+                    {"drug_name": "metformin", "country": "AU", "region": "NSW"},
+                    {"drug_name": "atorvastatin", "country": "US"}
+                ],
+                "top_n": 20,
                 "scorer": "market_share"
             }
         }
@@ -85,6 +127,9 @@ class SegmentationResponse(BaseModel):
     """Prescriber segmentation breakdown"""
     by_volume: Dict[str, int]
     by_opportunity: Optional[Dict[str, int]] = None
+    volume_thresholds: Optional[Dict[str, float]] = Field(
+        None, description="Lower volume bound of each tier (percentile segmentation only)"
+    )
 
 
 class DrugInfoResponse(BaseModel):
@@ -151,6 +196,26 @@ class AnalysisResponse(BaseModel):
         }
 
 
+class AnalysisJobResponse(BaseModel):
+    """Queued analysis (returned by /analyze with async_mode)"""
+    analysis_id: str
+    status: str
+    status_url: str
+
+
+class AnalysisStatusResponse(BaseModel):
+    """Status of a queued analysis"""
+    analysis_id: str
+    status: str  # queued, running, completed, failed
+    stage: str
+    progress: float
+    submitted_at: datetime
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    result: Optional[AnalysisResponse] = None
+    error: Optional[str] = None
+
+
 class DrugSearchResultResponse(BaseModel):
     """Single drug search result"""
     id: str
@@ -166,6 +231,26 @@ class DrugSearchResponse(BaseModel):
     count: int
 
 
+class PrescriberSeriesResponse(BaseModel):
+    """One prescriber's values for each period of a series"""
+    prescriber_id: str
+    prescriber_name: str
+    location: Optional[str]
+    prescriptions: List[int]
+    quantity: List[float]
+    cost: List[float]
+
+
+class PrescribingSeriesResponse(BaseModel):
+    """Prescribing data over a period range (prescriber × period)"""
+    drug_code: str
+    country: str
+    region: Optional[str]
+    periods: List[str]
+    totals: List[int] = Field(..., description="Prescriptions per period across all prescribers")
+    prescribers: List[PrescriberSeriesResponse]
+
+
 class CountryResponse(BaseModel):
     """Supported country information"""
     code: str
@@ -180,6 +265,8 @@ class HealthResponse(BaseModel):
     version: str
     timestamp: datetime
     data_sources: Dict[str, str]
+    ready: bool = Field(True, description="False until the startup warm-up has finished")
+    warmup: Optional[Dict[str, Any]] = Field(None, description="Warm-up progress")
 
 
 class ErrorResponse(BaseModel):
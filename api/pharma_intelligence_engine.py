@@ -4,10 +4,23 @@ Pharma Intelligence Engine - Generalized Analysis Platform
 Analyzes prescribing data for any drug in any supported country
 """
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import List, Dict, Optional, Any
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Any, Callable, Iterable, Tuple
+from concurrent.futures import Future
 from datetime import datetime
+from functools import lru_cache
 import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from quantile_sketch import KLLSketch
+
+logger = logging.getLogger(__name__)
 
 # ============================================================================
 # DATA MODELS
@@ -45,6 +58,86 @@ class PrescribingData:
     cost: float
     patients: Optional[int] = None
 
+@dataclass
+class PrescribingSeries:
+    """
+    Prescribing metrics for a drug over a range of periods
+
+    A (prescriber × period) matrix: prescriptions[i][j] is prescribers[i]
+    in periods[j] (ascending). Periods a prescriber has no data for are 0.
+    """
+    drug_code: str
+    periods: List[str]
+    prescribers: List[Prescriber]
+    prescriptions: List[List[int]]
+    quantity: List[List[float]]
+    cost: List[List[float]]
+
+    @classmethod
+    def from_pulls(cls, drug_code: str, pulls: Dict[str, List[PrescribingData]]) -> "PrescribingSeries":
+        """Assemble from one get_prescribing_data pull per period ({period: rows})"""
+        periods = sorted(pulls)
+        rows: Dict[str, int] = {}
+        prescribers: List[Prescriber] = []
+        prescriptions: List[List[int]] = []
+        quantity: List[List[float]] = []
+        cost: List[List[float]] = []
+
+        for j, period in enumerate(periods):
+            for data in pulls[period]:
+                i = rows.get(data.prescriber.id)
+                if i is None:
+                    i = rows[data.prescriber.id] = len(prescribers)
+                    prescribers.append(data.prescriber)
+                    prescriptions.append([0] * len(periods))
+                    quantity.append([0.0] * len(periods))
+                    cost.append([0.0] * len(periods))
+                prescriptions[i][j] += data.prescriptions
+                quantity[i][j] += data.quantity
+                cost[i][j] += data.cost
+
+        return cls(drug_code, periods, prescribers, prescriptions, quantity, cost)
+
+    def totals(self) -> List[int]:
+        """Prescriptions per period across all prescribers"""
+        return [sum(column) for column in zip(*self.prescriptions)] or [0] * len(self.periods)
+
+# Longest range get_prescribing_series serves (e.g. 10 years of months)
+MAX_SERIES_PERIODS = 120
+
+def period_range(start: str, end: str) -> List[str]:
+    """
+    Periods from start to end inclusive, in the format of start
+
+    YYYY gives years, YYYY-MM months and YYYY-MM-DD month starts (the
+    OpenPrescribing format). Raises ValueError for unparseable periods or
+    ranges longer than MAX_SERIES_PERIODS.
+    """
+    try:
+        year, month = int(start[:4]), int(start[5:7] or 1)
+        end_year, end_month = int(end[:4]), int(end[5:7] or 12)
+    except ValueError:
+        raise ValueError(f"Invalid period range {start!r} to {end!r}") from None
+    if not (1 <= month <= 12 and 1 <= end_month <= 12):
+        raise ValueError(f"Invalid period range {start!r} to {end!r}")
+
+    if len(start) == 4:
+        count = end_year - year + 1
+    else:
+        count = (end_year - year) * 12 + end_month - month + 1
+    if count > MAX_SERIES_PERIODS:
+        raise ValueError(f"Period range {start} to {end} exceeds {MAX_SERIES_PERIODS} periods")
+
+    if len(start) == 4:
+        return [str(year + i) for i in range(max(count, 0))]
+
+    suffix = "-01" if len(start) > 7 else ""
+    periods = []
+    for _ in range(max(count, 0)):
+        periods.append(f"{year:04d}-{month:02d}{suffix}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return periods
+
 @dataclass
 class OpportunityProfile:
     """Opportunity assessment for a prescriber"""
@@ -54,9 +147,224 @@ class OpportunityProfile:
     potential_volume: int
     market_share: Optional[float] = None
     competitive_position: Dict[str, Any] = None
-    recommendations: List[str] = None
+    recommendations: Tuple[str, ...] = None
     segment: Optional[str] = None
 
+# ============================================================================
+# SHARED CACHE
+# ============================================================================
+
+# Backend for data source caches, e.g. memory://, sqlite:///cache/shared_cache.db,
+# redis://localhost:6379/0 (shared across uvicorn workers for sqlite/redis)
+CACHE_URL_ENV = "CACHE_URL"
+DEFAULT_CACHE_URL = "memory://"
+DEFAULT_CACHE_ENTRIES = 1024
+
+class CacheBackend(ABC):
+    """Key/value cache shared by data sources (values are picklable objects)"""
+    
+    # Lookup counters (per process, approximate under concurrency)
+    hits = 0
+    misses = 0
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on miss/expiry"""
+        pass
+    
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value, optionally expiring after ttl seconds"""
+        pass
+    
+    @abstractmethod
+    def delete(self, key: str):
+        """Remove a key if present"""
+        pass
+    
+    @abstractmethod
+    def clear(self):
+        """Remove all keys"""
+        pass
+    
+    def _record(self, value: Optional[Any]) -> Optional[Any]:
+        """Internal: Count a lookup as a hit or miss and pass the value through"""
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache with optional per-key expiry"""
+    
+    def __init__(self, max_entries: int = DEFAULT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return self._record(None)
+            if entry[0] is not None and entry[0] < time.time():
+                del self._entries[key]
+                return self._record(None)
+            self._entries.move_to_end(key)
+            return self._record(entry[1])
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class DiskCache(CacheBackend):
+    """
+    SQLite-backed cache on local disk
+    
+    Shared by all worker processes on the host. Keeps at most max_entries,
+    dropping the oldest writes first.
+    """
+    
+    def __init__(self, path: str, max_entries: int = DEFAULT_CACHE_ENTRIES * 10):
+        self.path = path
+        self.max_entries = max_entries
+        self._writes = 0
+        self._lock = threading.Lock()
+        
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache "
+            "(key TEXT PRIMARY KEY, value BLOB, expires_at REAL, stored_at REAL)"
+        )
+        self._conn.commit()
+    
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Disk cache read failed: %s", e)
+            return self._record(None)
+        
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return self._record(None)
+        return self._record(pickle.loads(row[0]))
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        now = time.time()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                    (key, blob, now + ttl if ttl else None, now)
+                )
+                self._writes += 1
+                if self._writes % 100 == 0:
+                    self._prune(now)
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning("Disk cache write failed: %s", e)
+    
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+    
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+    
+    def _prune(self, now: float):
+        """Internal: Drop expired rows and trim to max_entries (lock held)"""
+        self._conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        self._conn.execute(
+            "DELETE FROM cache WHERE key IN "
+            "(SELECT key FROM cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+class RedisCache(CacheBackend):
+    """Redis-protocol cache shared across workers and hosts (requires `redis`)"""
+    
+    def __init__(self, url: str, prefix: str = "pharma:", client=None):
+        if client is None:
+            try:
+                import redis  # Optional: only needed for redis:// cache URLs
+            except ImportError:
+                raise ImportError("redis package not installed (pip install redis) - needed for redis:// cache URLs")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+    
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            blob = self.client.get(self.prefix + key)
+        except Exception as e:
+            logger.warning("Redis cache read failed: %s", e)
+            return self._record(None)
+        return self._record(pickle.loads(blob) if blob is not None else None)
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            self.client.set(self.prefix + key, blob, ex=int(ttl) if ttl else None)
+        except Exception as e:
+            logger.warning("Redis cache write failed: %s", e)
+    
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+    
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+def create_cache(url: str) -> CacheBackend:
+    """Create a cache backend from a URL (memory://, sqlite:///path, redis://...)"""
+    if url.startswith("memory://"):
+        return MemoryCache()
+    if url.startswith("sqlite:///"):
+        return DiskCache(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCache(url)
+    raise ValueError(f"Unsupported cache URL: {url}")
+
+_shared_cache: Optional[CacheBackend] = None
+_shared_cache_lock = threading.Lock()
+
+def get_shared_cache() -> CacheBackend:
+    """Process-wide cache backend chosen by the CACHE_URL environment variable"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = create_cache(os.environ.get(CACHE_URL_ENV, DEFAULT_CACHE_URL))
+        return _shared_cache
+
+def set_shared_cache(cache: CacheBackend):
+    """Replace the shared cache backend (e.g. a fake in tests)"""
+    global _shared_cache
+    with _shared_cache_lock:
+        _shared_cache = cache
+
 # ============================================================================
 # ABSTRACT DATA SOURCE
 # ============================================================================
@@ -64,6 +372,10 @@ class OpportunityProfile:
 class DataSource(ABC):
     """Abstract base class for country-specific data sources"""
     
+    # Bump in a subclass when its output changes for the same period
+    # (invalidates memoized analyses built on it)
+    data_version = "1"
+    
     @abstractmethod
     def search_drug(self, name: str) -> List[Dict]:
         """Search for drug codes by name"""
@@ -84,6 +396,98 @@ class DataSource(ABC):
     def get_latest_period(self) -> str:
         """Get the most recent data period available"""
         pass
+    
+    def get_prescriber_data(self, prescriber_id: str, drug_code: str,
+                            period: str) -> Optional[PrescribingData]:
+        """
+        Get prescribing data for a single prescriber
+        
+        Default implementation scans a full pull; sources with an index or a
+        per-prescriber upstream query should override this.
+        """
+        return next(
+            (p for p in self.get_prescribing_data(drug_code, period) if p.prescriber.id == prescriber_id),
+            None
+        )
+    
+    def get_prescribing_series(self, drug_code: str, start: str, end: str,
+                               region: Optional[str] = None) -> PrescribingSeries:
+        """
+        Get prescribing data for every period from start to end (inclusive)
+        
+        Default implementation makes one get_prescribing_data pull per
+        period (see period_range for formats); sources whose upstream or
+        local data covers many periods at once should override this.
+        """
+        return PrescribingSeries.from_pulls(drug_code, {
+            period: self.get_prescribing_data(drug_code, period, region)
+            for period in period_range(start, end)
+        })
+
+class SharedPullDataSource(DataSource):
+    """
+    Wraps a DataSource so identical pulls are fetched once
+    
+    Concurrent or repeated get_prescribing_data calls with the same
+    (drug_code, period, region) share one upstream fetch. An optional
+    semaphore bounds concurrent upstream calls. Intended to live for one
+    batch of analyses, not as a long-lived cache.
+    """
+    
+    def __init__(self, source: DataSource, limiter: Optional[threading.Semaphore] = None):
+        self.source = source
+        self.limiter = limiter
+        self._pulls: Dict[tuple, Future] = {}
+        self._codes: Dict[str, Future] = {}
+        self._series: Dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+    
+    def _shared(self, table: Dict, key, fetch):
+        """Internal: Return the result for key, fetching it at most once"""
+        with self._lock:
+            future = table.get(key)
+            owner = future is None
+            if owner:
+                future = table[key] = Future()
+        
+        if owner:
+            try:
+                if self.limiter is not None:
+                    with self.limiter:
+                        future.set_result(fetch())
+                else:
+                    future.set_result(fetch())
+            except Exception as e:
+                future.set_exception(e)
+        
+        return future.result()
+    
+    def search_drug(self, name: str) -> List[Dict]:
+        return self.source.search_drug(name)
+    
+    def find_drug_code(self, name: str) -> Optional[str]:
+        return self._shared(self._codes, name.lower(), lambda: self.source.find_drug_code(name))
+    
+    def get_prescribing_data(self, drug_code: str, period: str,
+                           region: Optional[str] = None) -> List[PrescribingData]:
+        # Each caller gets its own list; the shared pull stays untouched
+        return list(self._shared(
+            self._pulls, (drug_code, period, region),
+            lambda: self.source.get_prescribing_data(drug_code, period, region)
+        ))
+    
+    def get_prescriber_details(self, prescriber_ids: List[str]) -> List[Prescriber]:
+        return self.source.get_prescriber_details(prescriber_ids)
+    
+    def get_prescribing_series(self, drug_code: str, start: str, end: str,
+                               region: Optional[str] = None) -> PrescribingSeries:
+        return self._shared(
+            self._series, (drug_code, start, end, region),
+            lambda: self.source.get_prescribing_series(drug_code, start, end, region)
+        )
+    
+    def get_latest_period(self) -> str:
+        return self.source.get_latest_period()
 
 # ============================================================================
 # SCORING MODELS
@@ -123,7 +527,7 @@ class MarketShareScorer(OpportunityScorer):
             base_score = (base_score / context['list_size']) * 10000
         
         # Adjust for cost (higher cost drugs = higher value)
-        if data.cost > 0:
+        if data.cost > 0 and data.prescriptions > 0:
             cost_per_script = data.cost / data.prescriptions
             if cost_per_script > 100:  # High-cost drug
                 base_score *= 1.5
@@ -134,97 +538,368 @@ class MarketShareScorer(OpportunityScorer):
 # SEGMENTATION ENGINE
 # ============================================================================
 
+# Pulls at least this large segment with NumPy boolean masks when numpy is installed
+NUMPY_SEGMENT_THRESHOLD = 50_000
+
+VOLUME_SEGMENTS = ('High Prescribers', 'Medium Prescribers', 'Low Prescribers', 'Non-Prescribers')
+OPPORTUNITY_SEGMENTS = ('Quick Wins', 'Strategic Growth', 'New Business', 'Defend')
+
+# Percentile volume tiers: (segment, lower quantile of active prescribers' volume),
+# highest first - top 20% High, next 30% Medium, the rest Low
+PERCENTILE_TIERS = (
+    ('High Prescribers', 0.8),
+    ('Medium Prescribers', 0.5),
+    ('Low Prescribers', 0.0)
+)
+
+
+def _optional_numpy():
+    """numpy module, or None if not installed (imported on first large segmentation)"""
+    try:
+        import numpy  # Optional: only used for large pulls
+    except ImportError:
+        return None
+    return numpy
+
+
+@dataclass
+class Segmentation:
+    """Segment counts (and members, when requested) for both segmentations"""
+    by_volume: Dict[str, int]
+    by_opportunity: Dict[str, int]
+    average_volume: float = 0.0  # mean volume of active (non-zero) prescribers
+    volume_thresholds: Optional[Dict[str, float]] = None  # lower volume bound per percentile tier
+    volume_members: Optional[Dict[str, List[OpportunityProfile]]] = None
+    opportunity_members: Optional[Dict[str, List[OpportunityProfile]]] = None
+
+
+@dataclass
+class VolumeSketch:
+    """
+    Streaming summary of prescriber volumes for percentile tiers
+    
+    Memory stays bounded however many volumes are added, and sketches built
+    per region or shard can be merged before reading tiers.
+    """
+    active: KLLSketch = field(default_factory=KLLSketch)
+    non_prescribers: int = 0
+    
+    def add(self, volume: float):
+        if volume == 0:
+            self.non_prescribers += 1
+        else:
+            self.active.update(volume)
+    
+    def extend(self, volumes: Iterable[float]):
+        for volume in volumes:
+            self.add(volume)
+    
+    def merge(self, other: "VolumeSketch") -> "VolumeSketch":
+        self.active.merge(other.active)
+        self.non_prescribers += other.non_prescribers
+        return self
+    
+    def thresholds(self, tiers=PERCENTILE_TIERS) -> Dict[str, float]:
+        """Lower volume bound of each tier (empty without active prescribers)"""
+        if not self.active.count:
+            return {}
+        bounds = self.active.quantiles(q for _, q in tiers)
+        return {name: bound for (name, _), bound in zip(tiers, bounds)}
+    
+    def counts(self, tiers=PERCENTILE_TIERS) -> Dict[str, int]:
+        """Estimated prescribers per tier, plus exact Non-Prescribers"""
+        counts = dict.fromkeys([name for name, _ in tiers], 0)
+        thresholds = self.thresholds(tiers)
+        if thresholds:
+            below = self.active.ranks(thresholds.values())
+            above = 0
+            for name, below_bound in zip(thresholds, below):
+                at_or_above = round(self.active.count - below_bound)
+                counts[name] = at_or_above - above
+                above = at_or_above
+            # Values under the lowest bound (only with a non-zero lowest quantile)
+            counts[name] += self.active.count - above
+        counts['Non-Prescribers'] = self.non_prescribers
+        return counts
+
+
 class Segmenter:
     """Segments prescribers into actionable groups"""
     
-    @staticmethod
-    def segment_by_volume(opportunities: List[OpportunityProfile]) -> Dict[str, List[OpportunityProfile]]:
-        """Segment by current prescribing volume"""
-        segments = {
-            'High Prescribers': [],
-            'Medium Prescribers': [],
-            'Low Prescribers': [],
-            'Non-Prescribers': []
-        }
+    # Volume tiers, as multiples of the average active prescriber's volume
+    HIGH_VOLUME_MULTIPLE = 2.0
+    MEDIUM_VOLUME_MULTIPLE = 0.5
+    # Opportunity types
+    DEFEND_SHARE = 0.5  # market share above which an account is defended
+    QUICK_WIN_VOLUME = 50
+    
+    @classmethod
+    def segment(cls, opportunities: List[OpportunityProfile],
+                members: bool = False, tiers=None) -> Segmentation:
+        """
+        Volume and opportunity segmentation in a single pass over the profiles
         
-        volumes = [o.current_volume for o in opportunities if o.current_volume > 0]
-        if not volumes:
-            return segments
+        Args:
+            opportunities: Scored opportunity profiles
+            members: Also return each segment's profiles (counts only by default)
+            tiers: Percentile volume tiers (e.g. PERCENTILE_TIERS) instead of
+                multiples of the average; bounds come from a VolumeSketch
+        """
+        if len(opportunities) >= NUMPY_SEGMENT_THRESHOLD:
+            np = _optional_numpy()
+            if np is not None:
+                return cls._segment_numpy(np, opportunities, members, tiers)
         
-        avg = sum(volumes) / len(volumes)
+        defend_share = cls.DEFEND_SHARE
+        quick_win_volume = cls.QUICK_WIN_VOLUME
+        volumes = []
+        append_volume = volumes.append
+        quick_wins = strategic = new_business = defend = 0
+        opportunity_members = {name: [] for name in OPPORTUNITY_SEGMENTS} if members else None
         
         for opp in opportunities:
-            if opp.current_volume == 0:
-                segments['Non-Prescribers'].append(opp)
-            elif opp.current_volume > avg * 2:
-                segments['High Prescribers'].append(opp)
-            elif opp.current_volume > avg * 0.5:
-                segments['Medium Prescribers'].append(opp)
+            volume = opp.current_volume
+            append_volume(volume)
+            if volume == 0:
+                segment = 'New Business'
+                new_business += 1
+            elif opp.market_share and opp.market_share > defend_share:
+                segment = 'Defend'
+                defend += 1
+            elif volume > quick_win_volume:
+                segment = 'Quick Wins'
+                quick_wins += 1
             else:
-                segments['Low Prescribers'].append(opp)
+                segment = 'Strategic Growth'
+                strategic += 1
+            if members:
+                opportunity_members[segment].append(opp)
+        
+        # Volume tiers need the average first; classify each distinct volume
+        # once (pulls repeat a small range of counts) rather than every profile
+        volume_counts = Counter(volumes)
+        active_total = active_count = 0
+        for volume, count in volume_counts.items():
+            if volume > 0:
+                active_total += volume * count
+                active_count += count
+        
+        average = active_total / active_count if active_count else 0.0
+        thresholds = None
+        if tiers is not None:
+            sketch = VolumeSketch()
+            sketch.extend(volumes)
+            thresholds = sketch.thresholds(tiers)
+        
+        segment_names = cls._volume_segment_names(tiers)
+        by_volume = dict.fromkeys(segment_names, 0)
+        volume_tiers = {}
+        if active_count:
+            for volume, count in volume_counts.items():
+                if thresholds is None:
+                    tier = cls._volume_tier(volume, average)
+                else:
+                    tier = cls._percentile_tier(volume, thresholds)
+                volume_tiers[volume] = tier
+                by_volume[tier] += count
+        
+        volume_members = None
+        if members:
+            volume_members = {name: [] for name in segment_names}
+            if active_count:
+                for opp in opportunities:
+                    volume_members[volume_tiers[opp.current_volume]].append(opp)
         
-        return segments
+        return Segmentation(
+            by_volume=by_volume,
+            by_opportunity={
+                'Quick Wins': quick_wins,
+                'Strategic Growth': strategic,
+                'New Business': new_business,
+                'Defend': defend
+            },
+            average_volume=average,
+            volume_thresholds=thresholds,
+            volume_members=volume_members,
+            opportunity_members=opportunity_members
+        )
     
     @staticmethod
-    def segment_by_opportunity(opportunities: List[OpportunityProfile]) -> Dict[str, List[OpportunityProfile]]:
-        """Segment by opportunity type"""
-        segments = {
-            'Quick Wins': [],        # High volume, low effort
-            'Strategic Growth': [],  # High potential, medium effort
-            'New Business': [],      # Zero share, need conversion
-            'Defend': []            # High share, risk of loss
+    def _volume_segment_names(tiers) -> List[str]:
+        if tiers is None:
+            return list(VOLUME_SEGMENTS)
+        return [name for name, _ in tiers] + ['Non-Prescribers']
+    
+    @staticmethod
+    def _percentile_tier(volume: float, thresholds: Dict[str, float]) -> str:
+        if volume == 0:
+            return 'Non-Prescribers'
+        for name, bound in thresholds.items():
+            if volume >= bound:
+                return name
+        return name  # below the lowest bound: lowest tier
+    
+    @classmethod
+    def _volume_tier(cls, volume: float, average: float) -> str:
+        if volume == 0:
+            return 'Non-Prescribers'
+        if volume > average * cls.HIGH_VOLUME_MULTIPLE:
+            return 'High Prescribers'
+        if volume > average * cls.MEDIUM_VOLUME_MULTIPLE:
+            return 'Medium Prescribers'
+        return 'Low Prescribers'
+    
+    @classmethod
+    def _segment_numpy(cls, np, opportunities: List[OpportunityProfile],
+                       members: bool, tiers) -> Segmentation:
+        """Internal: segment() over NumPy arrays with boolean masks (large pulls)"""
+        n = len(opportunities)
+        volumes = np.fromiter((o.current_volume for o in opportunities), dtype=np.float64, count=n)
+        shares = np.fromiter((o.market_share or 0.0 for o in opportunities), dtype=np.float64, count=n)
+        
+        zero = volumes == 0
+        active = volumes > 0
+        active_count = int(active.sum())
+        average = float(volumes[active].mean()) if active_count else 0.0
+        
+        defend = ~zero & (shares > cls.DEFEND_SHARE)
+        quick_wins = ~zero & ~defend & (volumes > cls.QUICK_WIN_VOLUME)
+        opportunity_masks = {
+            'Quick Wins': quick_wins,
+            'Strategic Growth': ~zero & ~defend & ~quick_wins,
+            'New Business': zero,
+            'Defend': defend
         }
         
-        for opp in opportunities:
-            if opp.current_volume == 0:
-                segments['New Business'].append(opp)
-            elif opp.market_share and opp.market_share > 0.5:
-                segments['Defend'].append(opp)
-            elif opp.current_volume > 50:
-                segments['Quick Wins'].append(opp)
-            else:
-                segments['Strategic Growth'].append(opp)
+        thresholds = None
+        if not active_count:
+            # Matches the pure-Python path: no tiers without active prescribers
+            empty = np.zeros(n, dtype=bool)
+            volume_masks = {name: empty for name in cls._volume_segment_names(tiers)}
+        elif tiers is not None:
+            sketch = VolumeSketch()
+            sketch.extend(volumes.tolist())
+            thresholds = sketch.thresholds(tiers)
+            remaining = ~zero
+            volume_masks = {}
+            for name, bound in thresholds.items():
+                volume_masks[name] = remaining & (volumes >= bound)
+                remaining &= ~volume_masks[name]
+            volume_masks[name] |= remaining  # below the lowest bound: lowest tier
+            volume_masks['Non-Prescribers'] = zero
+        else:
+            high = ~zero & (volumes > average * cls.HIGH_VOLUME_MULTIPLE)
+            medium = ~zero & ~high & (volumes > average * cls.MEDIUM_VOLUME_MULTIPLE)
+            volume_masks = {
+                'High Prescribers': high,
+                'Medium Prescribers': medium,
+                'Low Prescribers': ~zero & ~high & ~medium,
+                'Non-Prescribers': zero
+            }
         
-        return segments
+        def members_of(masks):
+            return {name: [opportunities[i] for i in np.flatnonzero(mask)] for name, mask in masks.items()}
+        
+        return Segmentation(
+            by_volume={name: int(mask.sum()) for name, mask in volume_masks.items()},
+            by_opportunity={name: int(mask.sum()) for name, mask in opportunity_masks.items()},
+            average_volume=average,
+            volume_thresholds=thresholds,
+            volume_members=members_of(volume_masks) if members else None,
+            opportunity_members=members_of(opportunity_masks) if members else None
+        )
+    
+    @classmethod
+    def segment_by_volume(cls, opportunities: List[OpportunityProfile]) -> Dict[str, List[OpportunityProfile]]:
+        """Segment by current prescribing volume"""
+        return cls.segment(opportunities, members=True).volume_members
+    
+    @classmethod
+    def segment_by_opportunity(cls, opportunities: List[OpportunityProfile]) -> Dict[str, List[OpportunityProfile]]:
+        """Segment by opportunity type"""
+        return cls.segment(opportunities, members=True).opportunity_members
 
 # ============================================================================
 # RECOMMENDATION ENGINE
 # ============================================================================
 
 class RecommendationEngine:
-    """Generates actionable recommendations"""
+    """
+    Generates actionable recommendations
+    
+    Prescribers fall into a handful of buckets (volume band × share band ×
+    main competitor). Each bucket's recommendations are built once and
+    shared as an immutable tuple; only the market share line is formatted
+    per prescriber.
+    """
+    
+    VOLUME_RECOMMENDATIONS = {
+        'new': (
+            "🎯 NEW PRESCRIBER: Schedule introductory MSL visit",
+            "📧 Send product monograph and clinical trial data"
+        ),
+        'growth': (
+            "📈 GROWTH OPPORTUNITY: Low volume, high potential",
+            "🤝 Arrange peer-to-peer meeting with high prescriber"
+        ),
+        'key': (
+            "⭐ KEY ACCOUNT: Maintain strong relationship",
+            "🎓 Invite to advisory board or speaker program"
+        ),
+        None: ()
+    }
+    SHARE_TEMPLATES = {
+        'low': "⚠️ LOW SHARE ({:.1f}%): Address access barriers",
+        'strong': "✅ STRONG POSITION ({:.1f}%): Focus on retention"
+    }
+    COMPETITOR_TEMPLATE = "🥊 COMPETITIVE INTEL: Track {} activity"
     
     @staticmethod
     def generate_recommendations(profile: OpportunityProfile, 
-                                therapeutic_area: str) -> List[str]:
-        """Generate tailored recommendations based on profile"""
-        recs = []
-        
-        # Volume-based recommendations
-        if profile.current_volume == 0:
-            recs.append("🎯 NEW PRESCRIBER: Schedule introductory MSL visit")
-            recs.append("📧 Send product monograph and clinical trial data")
-        elif profile.current_volume < 10:
-            recs.append("📈 GROWTH OPPORTUNITY: Low volume, high potential")
-            recs.append("🤝 Arrange peer-to-peer meeting with high prescriber")
-        elif profile.current_volume > 100:
-            recs.append("⭐ KEY ACCOUNT: Maintain strong relationship")
-            recs.append("🎓 Invite to advisory board or speaker program")
-        
-        # Market share recommendations
-        if profile.market_share:
-            if profile.market_share < 0.1:
-                recs.append(f"⚠️ LOW SHARE ({profile.market_share*100:.1f}%): Address access barriers")
-            elif profile.market_share > 0.5:
-                recs.append(f"✅ STRONG POSITION ({profile.market_share*100:.1f}%): Focus on retention")
-        
-        # Competitive recommendations
+                                therapeutic_area: str) -> Tuple[str, ...]:
+        """Generate tailored recommendations based on profile (shared, don't mutate)"""
+        volume = profile.current_volume
+        if volume == 0:
+            volume_band = 'new'
+        elif volume < 10:
+            volume_band = 'growth'
+        elif volume > 100:
+            volume_band = 'key'
+        else:
+            volume_band = None
+        
+        share = profile.market_share
+        share_band = None
+        if share:
+            if share < 0.1:
+                share_band = 'low'
+            elif share > 0.5:
+                share_band = 'strong'
+        
+        competitor = None
         if profile.competitive_position:
-            main_competitor = profile.competitive_position.get('main_competitor')
-            if main_competitor:
-                recs.append(f"🥊 COMPETITIVE INTEL: Track {main_competitor} activity")
+            competitor = profile.competitive_position.get('main_competitor') or None
         
-        return recs
+        head, share_template, tail = RecommendationEngine._bucket(volume_band, share_band, competitor)
+        if share_template is None:
+            return head
+        return head + (share_template.format(share * 100),) + tail
+    
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _bucket(volume_band: Optional[str], share_band: Optional[str],
+                competitor: Optional[str]) -> Tuple[Tuple[str, ...], Optional[str], Tuple[str, ...]]:
+        """
+        Internal: Recommendations for one bucket signature
+        
+        Returns (lines before the share line, share line template or None,
+        lines after it); without a share line the first tuple is complete.
+        """
+        head = RecommendationEngine.VOLUME_RECOMMENDATIONS[volume_band]
+        tail = (RecommendationEngine.COMPETITOR_TEMPLATE.format(competitor),) if competitor else ()
+        if share_band is None:
+            return head + tail, None, ()
+        return head, RecommendationEngine.SHARE_TEMPLATES[share_band], tail
 
 # ============================================================================
 # MAIN INTELLIGENCE ENGINE
@@ -244,7 +919,12 @@ class PharmaIntelligenceEngine:
                     country: str,
                     competitor_drugs: Optional[List[Drug]] = None,
                     region: Optional[str] = None,
-                    top_n: int = 50) -> Dict[str, Any]:
+                    top_n: int = 50,
+                    progress: Optional[Callable[[str, float], None]] = None,
+                    display: bool = False,
+                    report_path: Optional[str] = None,
+                    stage_timer: Optional[Callable[[str, float], None]] = None,
+                    volume_tiers: str = "mean") -> Dict[str, Any]:
         """
         Complete analysis for a drug in a country
         
@@ -254,52 +934,58 @@ class PharmaIntelligenceEngine:
             competitor_drugs: List of competing drugs
             region: Optional region filter
             top_n: Number of top opportunities to return
+            progress: Optional callback(stage, fraction_complete)
+            display: Print the results table to stdout (CLI use; never in the API)
+            report_path: Optional file to save the JSON report to
+            stage_timer: Optional callback(stage, seconds) for fetch, score,
+                recommend, sort and segment timings
+            volume_tiers: 'mean' (multiples of the average volume) or
+                'percentile' (PERCENTILE_TIERS)
             
         Returns:
             Comprehensive analysis report
         """
-        print(f"\n{'='*80}")
-        print(f"PHARMA INTELLIGENCE ENGINE")
-        print(f"Drug: {drug.name} ({drug.generic_name})")
-        print(f"Company: {drug.company}")
-        print(f"Therapeutic Area: {drug.therapeutic_area}")
-        print(f"Country: {country}")
-        print(f"{'='*80}\n")
+        if progress is None:
+            progress = lambda stage, fraction: None
+        if stage_timer is None:
+            stage_timer = lambda stage, seconds: None
         
         # Get drug code for this country
         if country not in drug.country_codes:
             raise ValueError(f"Drug code not available for country: {country}")
         
         drug_code = drug.country_codes[country]
-        print(f"📋 Drug Code: {drug_code}")
         
         # Get latest data period
         period = self.data_source.get_latest_period()
-        print(f"📅 Data Period: {period}\n")
+        log_fields = {'drug': drug.name, 'drug_code': drug_code, 'country': country,
+                      'region': region, 'period': period}
+        logger.debug("Analysis started", extra=log_fields)
         
         # Fetch prescribing data
-        print("⏳ Fetching prescribing data...")
+        progress("fetching", 0.1)
+        stage_start = time.perf_counter()
         prescribing_data = self.data_source.get_prescribing_data(
             drug_code, period, region
         )
+        stage_timer("fetch", time.perf_counter() - stage_start)
         
         if not prescribing_data:
-            print("❌ No prescribing data found")
+            logger.info("No prescribing data found", extra=log_fields)
             return {}
         
-        print(f"✅ Found data for {len(prescribing_data)} prescribers\n")
-        
         # Calculate market context
         total_volume = sum(p.prescriptions for p in prescribing_data)
         total_cost = sum(p.cost for p in prescribing_data)
         
-        print(f"📊 Market Overview:")
-        print(f"   Total Prescribers: {len(prescribing_data):,}")
-        print(f"   Total Prescriptions: {total_volume:,}")
-        print(f"   Total Cost: £{total_cost:,.0f}\n")
+        logger.debug("Prescribing data fetched", extra={
+            **log_fields, 'prescribers': len(prescribing_data), 'prescriptions': total_volume
+        })
         
         # Score opportunities
-        print("🎯 Scoring opportunities...")
+        progress("scoring", 0.5)
+        stage_start = time.perf_counter()
+        recommend_seconds = 0.0
         opportunities = []
         
         for data in prescribing_data:
@@ -319,22 +1005,33 @@ class PharmaIntelligenceEngine:
             )
             
             # Generate recommendations
+            recommend_start = time.perf_counter()
             profile.recommendations = self.recommender.generate_recommendations(
                 profile, drug.therapeutic_area
             )
+            recommend_seconds += time.perf_counter() - recommend_start
             
             opportunities.append(profile)
         
+        stage_timer("score", time.perf_counter() - stage_start - recommend_seconds)
+        stage_timer("recommend", recommend_seconds)
+        
         # Sort by score
+        stage_start = time.perf_counter()
         opportunities.sort(key=lambda x: x.opportunity_score, reverse=True)
+        stage_timer("sort", time.perf_counter() - stage_start)
         
         # Segment opportunities
-        print("📑 Segmenting prescribers...")
-        volume_segments = self.segmenter.segment_by_volume(opportunities)
-        opportunity_segments = self.segmenter.segment_by_opportunity(opportunities)
+        progress("segmenting", 0.8)
+        stage_start = time.perf_counter()
+        segmentation = self.segmenter.segment(
+            opportunities, tiers=PERCENTILE_TIERS if volume_tiers == "percentile" else None
+        )
+        stage_timer("segment", time.perf_counter() - stage_start)
         
-        # Display results
-        self._display_results(opportunities[:top_n], volume_segments, drug, country)
+        # Display results (opt-in console output for CLI runs)
+        if display:
+            self._display_results(opportunities[:top_n], segmentation.by_volume, drug, country)
         
         # Prepare output
         report = {
@@ -367,23 +1064,23 @@ class PharmaIntelligenceEngine:
                 for i, opp in enumerate(opportunities[:top_n])
             ],
             'segments': {
-                'by_volume': {k: len(v) for k, v in volume_segments.items()},
-                'by_opportunity': {k: len(v) for k, v in opportunity_segments.items()}
+                'by_volume': segmentation.by_volume,
+                'by_opportunity': segmentation.by_opportunity,
+                'volume_thresholds': segmentation.volume_thresholds
             }
         }
         
         # Save report
-        filename = f"analysis_{drug.name.replace(' ', '_')}_{country}_{period}.json"
-        with open(filename, 'w') as f:
-            json.dump(report, f, indent=2)
-        
-        print(f"\n💾 Full report saved to: {filename}\n")
+        if report_path:
+            with open(report_path, 'w') as f:
+                json.dump(report, f, indent=2)
+            logger.info("Report saved to %s", report_path)
         
         return report
     
     def _display_results(self, top_opportunities: List[OpportunityProfile],
-                        segments: Dict, drug: Drug, country: str):
-        """Display formatted results"""
+                        segments: Dict[str, int], drug: Drug, country: str):
+        """Print formatted results to the console (CLI output, not logging)"""
         print(f"\n{'='*80}")
         print(f"🎯 TOP {len(top_opportunities)} OPPORTUNITIES")
         print(f"{'='*80}\n")
@@ -399,15 +1096,15 @@ class PharmaIntelligenceEngine:
         print("📊 PRESCRIBER SEGMENTATION")
         print(f"{'='*80}\n")
         
-        for segment, prescribers in segments.items():
-            print(f"{segment}: {len(prescribers)} prescribers")
+        for segment, count in segments.items():
+            print(f"{segment}: {count} prescribers")
         
         print(f"\n{'='*80}")
         print("💡 KEY INSIGHTS")
         print(f"{'='*80}\n")
         
-        total = sum(len(v) for v in segments.values())
-        high_pct = (len(segments.get('High Prescribers', [])) / total) * 100
+        total = sum(segments.values())
+        high_pct = (segments.get('High Prescribers', 0) / total) * 100 if total else 0.0
         
         print(f"✓ Top 20% of prescribers (High) = {high_pct:.1f}% of total")
         print(f"✓ Focus sales resources on top {len(top_opportunities)} targets")
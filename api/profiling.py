@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Request Profiling
+Opt-in stack-sampling profiler for individual /analyze requests, with
+flamegraph-compatible collapsed-stack output (flamegraph.pl, speedscope)
+"""
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Profiling configuration (environment). Off unless PROFILING_ENABLED is set;
+# with PROFILING_TOKEN set, requests must also send a matching X-Profile-Token.
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '0').lower() in ('1', 'true', 'yes')
+PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN')
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL', '0.005'))  # seconds
+PROFILE_DIR = os.environ.get('PROFILE_DIR')  # also write <id>.collapsed files here if set
+MAX_STORED_PROFILES = 50
+
+
+def profiling_allowed(token: Optional[str]) -> bool:
+    """Whether a profiling request with this token may run"""
+    if not PROFILING_ENABLED:
+        return False
+    return PROFILING_TOKEN is None or token == PROFILING_TOKEN
+
+
+@dataclass
+class Profile:
+    """Sampled call stacks for one profiled call"""
+    id: str
+    label: str
+    interval: float
+    started_at: datetime = field(default_factory=datetime.now)
+    duration: float = 0.0
+    samples: int = 0
+    stacks: Counter = field(default_factory=Counter)  # "root;...;leaf" -> samples
+
+    def collapsed(self) -> str:
+        """Collapsed-stack text: one "frame;frame;frame count" line per stack"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Functions by self time (leaf samples), with inclusive time"""
+        self_samples = Counter()
+        total_samples = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            self_samples[frames[-1]] += count
+            for frame in set(frames):
+                total_samples[frame] += count
+
+        # The sampler competes for the GIL, so scale samples to wall time
+        # rather than trusting the nominal interval
+        seconds_per_sample = self.duration / self.samples if self.samples else 0.0
+        return [
+            {
+                'function': frame,
+                'self_seconds': round(count * seconds_per_sample, 4),
+                'total_seconds': round(total_samples[frame] * seconds_per_sample, 4),
+                'self_pct': round(100 * count / self.samples, 1) if self.samples else 0.0
+            }
+            for frame, count in self_samples.most_common(limit)
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'label': self.label,
+            'started_at': self.started_at.isoformat(),
+            'duration_seconds': round(self.duration, 4),
+            'interval_seconds': self.interval,
+            'samples': self.samples,
+            'top_functions': self.top_functions(),
+            'collapsed': self.collapsed()
+        }
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Samples one thread's Python stack every interval seconds
+
+    Stacks are cut at stop_code (the profiled entry point) so thread pool
+    and server frames don't appear in every sample.
+    """
+
+    def __init__(self, thread_id: int, interval: float, stop_code=None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stop_code = stop_code
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            frames = []
+            while frame is not None and frame.f_code is not self.stop_code:
+                frames.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+
+            if frames:
+                self.stacks[';'.join(reversed(frames))] += 1
+                self.samples += 1
+
+
+def profile_call(label: str, fn: Callable[[], Any],
+                 interval: float = PROFILE_SAMPLE_INTERVAL) -> Tuple[Any, Profile]:
+    """Run fn() on this thread under the sampler; returns (result, Profile)"""
+    profile = Profile(id=str(uuid.uuid4()), label=label, interval=interval)
+    sampler = StackSampler(threading.get_ident(), interval, stop_code=profile_call.__code__)
+
+    start = time.perf_counter()
+    sampler.start()
+    try:
+        result = fn()
+    finally:
+        sampler.stop()
+        profile.duration = time.perf_counter() - start
+        profile.stacks = sampler.stacks
+        profile.samples = sampler.samples
+
+    return result, profile
+
+
+class ProfileStore:
+    """Most recent profiles, kept in memory (and on disk when PROFILE_DIR is set)"""
+
+    def __init__(self, max_profiles: int = MAX_STORED_PROFILES, directory: Optional[str] = PROFILE_DIR):
+        self.max_profiles = max_profiles
+        self.directory = directory
+        self._profiles: "OrderedDict[str, Profile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, profile: Profile):
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, f"{profile.id}.collapsed"), 'w') as f:
+                f.write(profile.collapsed())
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        with self._lock:
+            return self._profiles.get(profile_id)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Quantile Sketch
+KLL streaming quantile sketch: approximate quantiles and ranks over any
+number of values in O(k log(n/k)) memory, mergeable across shards/regions
+
+Karnin, Lang & Liberty, "Optimal Quantile Approximation in Streams" (2016).
+With the default k=200 rank error is around 1% of the count.
+"""
+import math
+import random
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_K = 200
+CAPACITY_DECAY = 2 / 3  # each lower level holds 2/3 of the level above
+
+
+class KLLSketch:
+    """
+    Streaming quantile sketch
+
+    Values are kept in a stack of compactors; level h items each stand for
+    2**h inputs. A full level is sorted and every other item (random
+    offset) promoted to the next level, halving its size.
+
+    The seed makes results reproducible for the same input order, so
+    repeated analyses of the same pull report the same tiers.
+    """
+
+    def __init__(self, k: int = DEFAULT_K, seed: Optional[int] = 0):
+        self.k = k
+        self.count = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.compactors: List[List[float]] = []
+        self._size = 0
+        self._max_size = 0
+        self._rng = random.Random(seed)
+        self._grow()
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.compactors) - level - 1
+        return int(math.ceil(CAPACITY_DECAY ** depth * self.k)) + 1
+
+    def _grow(self):
+        self.compactors.append([])
+        self._max_size = sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def update(self, value: float):
+        """Add one value"""
+        self.compactors[0].append(value)
+        self.count += 1
+        self._size += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if self._size >= self._max_size:
+            self._compress()
+
+    def extend(self, values: Iterable[float]):
+        """Add many values"""
+        for value in values:
+            self.update(value)
+
+    def _compress(self):
+        for level in range(len(self.compactors)):
+            items = self.compactors[level]
+            if len(items) >= self._capacity(level):
+                if level + 1 == len(self.compactors):
+                    self._grow()
+                items.sort()
+                # An odd item out stays at this level so total weight is kept
+                leftover = [items.pop()] if len(items) % 2 else []
+                self.compactors[level + 1].extend(items[self._rng.getrandbits(1)::2])
+                self.compactors[level] = leftover
+                self._size = sum(len(c) for c in self.compactors)
+                if self._size < self._max_size:
+                    break
+
+    def merge(self, other: "KLLSketch"):
+        """Fold another sketch (e.g. another region's) into this one"""
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.count += other.count
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        self._size = sum(len(c) for c in self.compactors)
+        if self._size >= self._max_size:
+            self._compress()
+
+    def _weighted(self) -> Tuple[List[float], List[int]]:
+        """Internal: Sorted retained values and their cumulative weights"""
+        pairs = sorted(
+            (value, 1 << level)
+            for level, items in enumerate(self.compactors)
+            for value in items
+        )
+        return [value for value, _ in pairs], list(accumulate(weight for _, weight in pairs))
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate value at quantile q (0..1); None when empty"""
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[float]]:
+        """Approximate values at several quantiles (one sort of the sketch)"""
+        qs = list(qs)
+        if not self.count:
+            return [None] * len(qs)
+        values, cumulative = self._weighted()
+        total = cumulative[-1]
+        result = []
+        for q in qs:
+            if q <= 0:
+                result.append(self.min)
+            elif q >= 1:
+                result.append(self.max)
+            else:
+                index = bisect_left(cumulative, q * total)
+                result.append(values[min(index, len(values) - 1)])
+        return result
+
+    def rank(self, value: float, inclusive: bool = False) -> float:
+        """Estimated number of values < value (<= value when inclusive)"""
+        return self.ranks([value], inclusive)[0]
+
+    def ranks(self, values: Iterable[float], inclusive: bool = False) -> List[float]:
+        """rank() for several values (one sort of the sketch)"""
+        values = list(values)
+        if not self.count:
+            return [0.0] * len(values)
+        retained, cumulative = self._weighted()
+        search = bisect_right if inclusive else bisect_left
+        result = []
+        for value in values:
+            index = search(retained, value)
+            result.append(float(cumulative[index - 1]) if index else 0.0)
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-safe state, for shipping a shard's sketch to be merged elsewhere"""
+        return {
+            'k': self.k,
+            'count': self.count,
+            'min': self.min,
+            'max': self.max,
+            'compactors': [list(items) for items in self.compactors]
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any], seed: Optional[int] = 0) -> "KLLSketch":
+        sketch = cls(k=state['k'], seed=seed)
+        sketch.compactors = [list(items) for items in state['compactors']] or [[]]
+        sketch.count = state['count']
+        sketch.min = state['min']
+        sketch.max = state['max']
+        sketch._max_size = sum(sketch._capacity(h) for h in range(len(sketch.compactors)))
+        sketch._size = sum(len(c) for c in sketch.compactors)
+        return sketch
+
+    def __len__(self) -> int:
+        return self.count
@@ -2,48 +2,70 @@
 API Routes
 REST endpoints for pharma intelligence platform
 """
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Query, Header
+from fastapi.responses import JSONResponse, StreamingResponse, Response, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime
 from typing import Optional
+import asyncio
+import threading
 import sys
 import os
 import json
+import logging
 
-# Add parent directory to path to import engine
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+# Parent directory goes last: its older copies of the engine and
+# data_sources_*.py must not shadow the ones in api/
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from models import (
     AnalysisRequest, AnalysisResponse, DrugSearchRequest, DrugSearchResponse,
     DrugSearchResultResponse, CountryResponse, HealthResponse, ErrorResponse,
-    OpportunityResponse, MarketSummaryResponse, SegmentationResponse, DrugInfoResponse
+    OpportunityResponse, MarketSummaryResponse, SegmentationResponse, DrugInfoResponse,
+    AnalysisJobResponse, AnalysisStatusResponse, BatchAnalysisRequest,
+    PrescribingSeriesResponse, PrescriberSeriesResponse
 )
+from analysis_jobs import AnalysisJobQueue, QueueFullError
+from analysis_cache import AnalysisResultCache
+from warmup import WARMUP_STATE
+from profiling import ProfileStore, profile_call, profiling_allowed
+from metrics import REGISTRY, CONTENT_TYPE as METRICS_CONTENT_TYPE, ANALYSIS_STAGE_SECONDS, observe_stage, register_cache_stats
 
 from pharma_intelligence_engine import (
     PharmaIntelligenceEngine, create_drug, 
-    MarketShareScorer, SimpleVolumeScorer
+    MarketShareScorer, SimpleVolumeScorer, SharedPullDataSource, get_shared_cache
 )
-from data_sources_uk import UKDataSource
-from data_sources_us import USDataSource
-from data_sources_eu import EUDataSource
-from data_sources_au import AustraliaDataSource
-from data_sources_japan import JapanDataSource
-from data_sources_france import FranceDataSource
-from common_drugs import COMMON_DRUGS, get_drug_info, search_drugs as search_common_drugs
+from data_source_registry import DataSourceRegistry
+from mock_data import mock_ints, mock_uniform
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-# Initialize data sources (in production, use dependency injection)
-DATA_SOURCES = {
-    'UK': UKDataSource(),
-    'US': USDataSource(),
-    'FR': FranceDataSource(),  # Real Open Medic data
-    'DE': EUDataSource('DE'),
-    'NL': EUDataSource('NL'),
-    'IT': EUDataSource('IT'),
-    'ES': EUDataSource('ES'),
-    'AU': AustraliaDataSource(),
-    'JP': JapanDataSource()
+# Data sources are imported and constructed on first use (cold start);
+# in production, use dependency injection
+DATA_SOURCES = DataSourceRegistry()
+
+# Background worker pool for async_mode analyses
+ANALYSIS_JOBS = AnalysisJobQueue()
+
+# Memoized /analyze responses (pre-serialized JSON)
+ANALYSIS_CACHE = AnalysisResultCache()
+
+# Recent /analyze profiles (opt-in, see profiling.py)
+PROFILES = ProfileStore()
+
+# Hit ratios for /metrics, read at scrape time
+register_cache_stats("cache", lambda: {
+    'analysis': (ANALYSIS_CACHE.hits, ANALYSIS_CACHE.misses),
+    'data_source': (get_shared_cache().hits, get_shared_cache().misses)
+})
+
+# Concurrent upstream pulls per data source across batch analyses
+BATCH_SOURCE_LIMITS = {'UK': 3, 'US': 4}
+DEFAULT_BATCH_SOURCE_LIMIT = 4
+BATCH_LIMITERS = {
+    country: threading.BoundedSemaphore(BATCH_SOURCE_LIMITS.get(country, DEFAULT_BATCH_SOURCE_LIMIT))
+    for country in DATA_SOURCES
 }
 
 
@@ -80,15 +102,38 @@ async def root():
 
 @router.get("/health", response_model=HealthResponse, tags=["General"])
 async def health_check():
-    """Health check endpoint"""
-    return HealthResponse(
-        status="healthy",
+    """
+    Health check endpoint
+    
+    Returns 503 with status "warming" until the startup warm-up has
+    pulled the hot drug set, so load balancers hold traffic until then.
+    """
+    ready = WARMUP_STATE.ready
+    health = HealthResponse(
+        status="healthy" if ready else "warming",
         version="1.0.0",
         timestamp=datetime.now(),
         data_sources={
             country: "available" for country in DATA_SOURCES.keys()
-        }
+        },
+        ready=ready,
+        warmup=WARMUP_STATE.to_dict()
     )
+    
+    if not ready:
+        return JSONResponse(status_code=503, content=health.model_dump(mode='json'))
+    return health
+
+
+@router.get("/metrics", response_class=PlainTextResponse, tags=["General"])
+async def metrics():
+    """
+    Prometheus metrics
+    
+    Request latency per route, analyze_drug stage timings, upstream API
+    latency and errors per data source, and cache hit ratios.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
 
 
 @router.get("/countries", response_model=list[CountryResponse], tags=["Reference"])
@@ -154,6 +199,8 @@ async def list_drugs():
     
     Returns comprehensive list of drugs with real data availability
     """
+    from common_drugs import COMMON_DRUGS  # Large reference table, loaded on first use
+    
     drugs_set = set()
     
     # Load drugs from US cache (largest dataset - 1,832 drugs)
@@ -260,55 +307,115 @@ async def lookup_drug(
         raise HTTPException(status_code=500, detail=f"Lookup failed: {str(e)}")
 
 
-@router.post("/analyze", response_model=AnalysisResponse, tags=["Analysis"])
-async def analyze_drug(request: AnalysisRequest):
+@router.get("/prescribing/series", response_model=PrescribingSeriesResponse, tags=["Drugs"])
+async def prescribing_series(
+    name: str = Query(..., min_length=1, max_length=200, description="Drug name"),
+    country: str = Query(..., pattern="^[A-Z]{2}$", description="Country code"),
+    start: str = Query(..., pattern=r"^\d{4}(-\d{2}(-\d{2})?)?$", description="First period (YYYY, YYYY-MM or YYYY-MM-DD)"),
+    end: str = Query(..., pattern=r"^\d{4}(-\d{2}(-\d{2})?)?$", description="Last period (inclusive)"),
+    region: Optional[str] = Query(None, max_length=50, description="Optional region/org filter")
+):
     """
-    Analyze prescribing patterns for a drug
+    Prescribing data for every period in a range, for trend views
     
-    This is the core endpoint - returns comprehensive targeting analysis
-    including top opportunities, segmentation, and recommendations
+    One call returns the (prescriber × period) matrix; each data source
+    fetches the range in as few upstream requests as it can.
     """
     try:
-        # Get data source for country
-        data_source = get_data_source(request.country)
-        
-        # Find drug code
-        drug_code = data_source.find_drug_code(request.drug_name)
+        data_source = get_data_source(country)
         
+        drug_code = await run_in_threadpool(data_source.find_drug_code, name)
         if not drug_code:
             raise HTTPException(
                 status_code=404,
-                detail=f"Drug '{request.drug_name}' not found in {request.country}"
+                detail=f"Drug '{name}' not found in {country}"
             )
         
-        # Create drug object
-        drug = create_drug(
-            name=request.drug_name.title(),
-            generic_name=request.drug_name.lower(),
-            therapeutic_area="Auto-detected",  # TODO: Add therapeutic area detection
-            company=request.company,
-            country_codes={request.country: drug_code}
-        )
+        series = await run_in_threadpool(data_source.get_prescribing_series, drug_code, start, end, region)
         
-        # Get scorer
-        scorer = get_scorer(request.scorer)
-        
-        # Initialize engine
-        engine = PharmaIntelligenceEngine(
-            data_source=data_source,
-            scorer=scorer
+        return PrescribingSeriesResponse(
+            drug_code=series.drug_code,
+            country=country,
+            region=region,
+            periods=series.periods,
+            totals=series.totals(),
+            prescribers=[
+                PrescriberSeriesResponse(
+                    prescriber_id=prescriber.id,
+                    prescriber_name=prescriber.name,
+                    location=prescriber.location,
+                    prescriptions=series.prescriptions[i],
+                    quantity=series.quantity[i],
+                    cost=series.cost[i]
+                )
+                for i, prescriber in enumerate(series.prescribers)
+            ]
         )
         
-        # Run analysis
-        report = engine.analyze_drug(
-            drug=drug,
-            country=request.country,
-            region=request.region,
-            top_n=request.top_n
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Series failed: {str(e)}")
+
+
+def _find_drug_code(request: AnalysisRequest, data_source) -> str:
+    """Resolve the request's drug to a country drug code (404 if unknown)"""
+    drug_code = data_source.find_drug_code(request.drug_name)
+    
+    if not drug_code:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Drug '{request.drug_name}' not found in {request.country}"
         )
-        
-        # Convert to response model
-        response = AnalysisResponse(
+    
+    return drug_code
+
+
+def _run_analysis(request: AnalysisRequest, progress=None, data_source=None,
+                  drug_code: Optional[str] = None) -> AnalysisResponse:
+    """Run an analysis synchronously (request thread or background worker)"""
+    # Get data source for country
+    if data_source is None:
+        data_source = get_data_source(request.country)
+    
+    # Find drug code
+    if drug_code is None:
+        drug_code = _find_drug_code(request, data_source)
+    
+    # Create drug object
+    drug = create_drug(
+        name=request.drug_name.title(),
+        generic_name=request.drug_name.lower(),
+        therapeutic_area="Auto-detected",  # TODO: Add therapeutic area detection
+        company=request.company,
+        country_codes={request.country: drug_code}
+    )
+    
+    # Get scorer
+    scorer = get_scorer(request.scorer)
+    
+    # Initialize engine
+    engine = PharmaIntelligenceEngine(
+        data_source=data_source,
+        scorer=scorer
+    )
+    
+    # Run analysis
+    report = engine.analyze_drug(
+        drug=drug,
+        country=request.country,
+        region=request.region,
+        top_n=request.top_n,
+        progress=progress,
+        stage_timer=observe_stage,
+        volume_tiers=request.segmentation
+    )
+    
+    # Convert to response model
+    with ANALYSIS_STAGE_SECONDS.time(stage="build_response"):
+        return AnalysisResponse(
             drug=DrugInfoResponse(**report['drug']),
             analysis_date=datetime.fromisoformat(report['analysis_date']),
             country=report['country'],
@@ -321,34 +428,265 @@ async def analyze_drug(request: AnalysisRequest):
             ],
             segments=SegmentationResponse(**report['segments'])
         )
+
+
+def _run_analysis_cached(request: AnalysisRequest):
+    """
+    Run an analysis, memoized on its inputs and the data period
+    
+    Returns (serialized response body, cache hit). The key covers every
+    input that shapes the response plus the data source version.
+    """
+    data_source = get_data_source(request.country)
+    drug_code = _find_drug_code(request, data_source)
+    period = data_source.get_latest_period()
+    
+    key = (
+        request.country, request.region, drug_code, period, request.scorer, request.top_n,
+        request.segmentation, request.company, request.drug_name.lower(), data_source.data_version
+    )
+    
+    body = ANALYSIS_CACHE.get(request.country, period, key)
+    if body is not None:
+        return body, True
+    
+    response = _run_analysis(request, data_source=data_source, drug_code=drug_code)
+    with ANALYSIS_STAGE_SECONDS.time(stage="serialize"):
+        body = response.model_dump_json().encode()
+    ANALYSIS_CACHE.put(request.country, period, key, body)
+    return body, False
+
+
+def _run_analysis_profiled(request: AnalysisRequest):
+    """Run an analysis uncached under the stack sampler; returns (body, Profile)"""
+    label = f"{request.drug_name.lower()} {request.country}"
+    body, profile = profile_call(label, lambda: _run_analysis(request).model_dump_json().encode())
+    PROFILES.put(profile)
+    return body, profile
+
+
+@router.post("/analyze", response_model=AnalysisResponse, tags=["Analysis"])
+async def analyze_drug(
+    request: AnalysisRequest,
+    profile: bool = Query(False, description="Profile this analysis (requires PROFILING_ENABLED)"),
+    x_profile: Optional[str] = Header(None),
+    x_profile_token: Optional[str] = Header(None)
+):
+    """
+    Analyze prescribing patterns for a drug
+    
+    This is the core endpoint - returns comprehensive targeting analysis
+    including top opportunities, segmentation, and recommendations
+    
+    With async_mode=true the analysis is queued on a background worker and
+    a job id is returned immediately (202); poll /analyze/status/{analysis_id}.
+    Identical submissions while a job is pending share that job.
+    
+    With ?profile=true (or an X-Profile: 1 header) the analysis runs uncached
+    under a stack-sampling profiler; the X-Profile-URL response header points
+    at the stored profile. Only allowed when the server enables profiling.
+    """
+    if profile or (x_profile or '').lower() in ('1', 'true'):
+        if not profiling_allowed(x_profile_token):
+            raise HTTPException(status_code=403, detail="Profiling is disabled or the profile token is invalid")
+        
+        try:
+            body, request_profile = await run_in_threadpool(_run_analysis_profiled, request)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.exception("Profiled analysis failed for %s in %s", request.drug_name, request.country)
+            raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+        
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={
+                "X-Analysis-Cache": "bypass",
+                "X-Profile-Id": request_profile.id,
+                "X-Profile-URL": f"/analyze/profile/{request_profile.id}"
+            }
+        )
+    
+    if request.async_mode:
+        key = (
+            request.company, request.drug_name.lower(), request.country,
+            request.region, request.top_n, request.scorer, request.segmentation
+        )
+        try:
+            job = ANALYSIS_JOBS.submit(key, lambda progress: _run_analysis(request, progress))
+        except QueueFullError as e:
+            raise HTTPException(status_code=503, detail=str(e))
         
-        return response
+        return JSONResponse(
+            status_code=202,
+            content=AnalysisJobResponse(
+                analysis_id=job.id,
+                status=job.status,
+                status_url=f"/analyze/status/{job.id}"
+            ).model_dump(mode='json')
+        )
+    
+    try:
+        body, hit = _run_analysis_cached(request)
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={"X-Analysis-Cache": "hit" if hit else "miss"}
+        )
         
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Analysis failed for %s in %s", request.drug_name, request.country)
         raise HTTPException(
             status_code=500,
             detail=f"Analysis failed: {str(e)}"
         )
 
 
-@router.get("/analyze/status/{analysis_id}", tags=["Analysis"])
+@router.get("/analyze/profile/{profile_id}", tags=["Analysis"])
+async def get_analysis_profile(
+    profile_id: str,
+    response_format: str = Query("json", alias="format", pattern="^(json|collapsed)$",
+                                 description="json (summary + stacks) or collapsed (flamegraph input)"),
+    x_profile_token: Optional[str] = Header(None)
+):
+    """
+    Get a stored /analyze profile
+    
+    format=collapsed returns plain "frame;frame;frame count" lines for
+    flamegraph.pl or speedscope; json adds the top functions by self time.
+    """
+    if not profiling_allowed(x_profile_token):
+        raise HTTPException(status_code=403, detail="Profiling is disabled or the profile token is invalid")
+    
+    stored = PROFILES.get(profile_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+    
+    if response_format == "collapsed":
+        return PlainTextResponse(stored.collapsed())
+    return stored.to_dict()
+
+
+@router.post("/analyze/batch", tags=["Analysis"])
+async def analyze_batch(request: BatchAnalysisRequest):
+    """
+    Run many drug × country analyses in one request
+    
+    Items run concurrently, with per-data-source limits on upstream calls.
+    Items with the same drug, country and region share one prescribing data
+    pull. Results stream back as NDJSON in completion order: one
+    {"record": "result", "index": ...} line per item, then a trailing
+    {"record": "summary", ...} line.
+    """
+    for item in request.items:
+        get_data_source(item.country)  # 400 on unsupported countries before streaming
+    
+    # One shared-pull wrapper per country for the lifetime of this batch
+    sources = {
+        country: SharedPullDataSource(DATA_SOURCES[country], BATCH_LIMITERS[country])
+        for country in {item.country for item in request.items}
+    }
+    
+    def run_item(item):
+        analysis_request = AnalysisRequest(
+            company=request.company,
+            drug_name=item.drug_name,
+            country=item.country,
+            region=item.region,
+            top_n=request.top_n,
+            scorer=request.scorer
+        )
+        return _run_analysis(analysis_request, data_source=sources[item.country])
+    
+    async def run_indexed(index, item):
+        try:
+            response = await run_in_threadpool(run_item, item)
+            return index, response, None
+        except Exception as e:
+            return index, None, getattr(e, 'detail', None) or str(e)
+    
+    async def stream_results():
+        completed = 0
+        failed = 0
+        tasks = [run_indexed(i, item) for i, item in enumerate(request.items)]
+        
+        for next_done in asyncio.as_completed(tasks):
+            index, response, error = await next_done
+            item = request.items[index]
+            line = {
+                'record': 'result',
+                'index': index,
+                'drug_name': item.drug_name,
+                'country': item.country,
+                'region': item.region
+            }
+            if error is None:
+                completed += 1
+                line['status'] = 'completed'
+                line['result'] = response.model_dump(mode='json')
+            else:
+                failed += 1
+                line['status'] = 'failed'
+                line['error'] = error
+            yield json.dumps(line) + '\n'
+        
+        yield json.dumps({
+            'record': 'summary',
+            'count': len(request.items),
+            'completed': completed,
+            'failed': failed
+        }) + '\n'
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@router.get("/analyze/status/{analysis_id}", response_model=AnalysisStatusResponse, tags=["Analysis"])
 async def get_analysis_status(analysis_id: str):
     """
-    Get status of a long-running analysis (future feature)
+    Get status of a queued analysis (submitted with async_mode=true)
     
-    For now, all analyses are synchronous
+    Reports progress while queued/running, the full analysis once
+    completed, or the error if it failed
     """
-    # TODO: Implement async analysis with job queue
-    raise HTTPException(
-        status_code=501,
-        detail="Async analysis not yet implemented. All analyses are currently synchronous."
+    job = ANALYSIS_JOBS.get(analysis_id)
+    
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Analysis '{analysis_id}' not found (unknown or expired)"
+        )
+    
+    return AnalysisStatusResponse(
+        analysis_id=job.id,
+        status=job.status,
+        stage=job.stage,
+        progress=job.progress,
+        submitted_at=job.submitted_at,
+        started_at=job.started_at,
+        completed_at=job.completed_at,
+        result=job.result,
+        error=job.error
     )
 
 
+# Parsed *_country_data.json files (path -> (mtime, data)); the aggregator
+# replaces files atomically, so a new mtime means a complete new file
+_COUNTRY_CACHE_FILES = {}
+
+
+def _read_country_cache(path: str) -> dict:
+    """Parsed country cache file, re-read only when the aggregator rewrites it"""
+    mtime = os.path.getmtime(path)
+    entry = _COUNTRY_CACHE_FILES.get(path)
+    if entry is None or entry[0] != mtime:
+        with open(path, 'r') as f:
+            entry = _COUNTRY_CACHE_FILES[path] = (mtime, json.load(f))
+    return entry[1]
+
+
 @router.get("/country/{country_code}", tags=["Reference"])
 async def get_country_detail(country_code: str):
     """
@@ -362,6 +700,8 @@ async def get_country_detail(country_code: str):
     
     Data is served from pre-aggregated cache files (updated periodically)
     """
+    from common_drugs import COMMON_DRUGS  # Large reference table, loaded on first use
+    
     country = country_code.upper()
     
     try:
@@ -377,15 +717,14 @@ async def get_country_detail(country_code: str):
         
         if os.path.exists(cache_path):
             try:
-                with open(cache_path, 'r') as f:
-                    cached_data = json.load(f)
+                cached_data = _read_country_cache(cache_path)
                 
                 # Extract data from cache
                 regional_data = cached_data.get('regions', [])
                 monthly_data = cached_data.get('monthly_data')
                 top_drugs = cached_data.get('top_drugs', [])
                 
-                print(f"✓ Loaded {country} data from cache (updated: {cached_data.get('last_updated')})")
+                logger.debug("Loaded %s data from cache (updated: %s)", country, cached_data.get('last_updated'))
                 
                 # Country metadata
                 country_info = {
@@ -490,11 +829,11 @@ async def get_country_detail(country_code: str):
                 }
                 
             except Exception as e:
-                print(f"⚠️  Error reading cache for {country}: {e}")
+                logger.warning("Error reading cache for %s: %s", country, e)
                 # Fall through to generation code below
         
         # FALLBACK: Generate data (for countries without cache)
-        print(f"⚠️  No cache found for {country}, generating fallback data...")
+        logger.info("No cache found for %s, generating fallback data", country)
         
         # Initialize data containers
         regional_data = []
@@ -510,10 +849,11 @@ async def get_country_detail(country_code: str):
                 with open(pbs_data_path, 'r') as f:
                     pbs_data = json.load(f)
                 
-                # Regional data from states
-                for state_code, state_data in pbs_data['data_by_state'].items():
-                    total_rx = sum(m['prescriptions'] for m in state_data['monthly'])
-                    total_cost = sum(m['cost'] for m in state_data['monthly'])
+                # Regional data from states ({state: {YYYYMM: values}})
+                monthly_totals = {}
+                for state_code, state_months in pbs_data['monthly_data'].items():
+                    total_rx = sum(m['prescriptions'] for m in state_months.values())
+                    total_cost = sum(m['cost'] for m in state_months.values())
                     
                     regional_data.append({
                         'region': state_code,
@@ -521,57 +861,39 @@ async def get_country_detail(country_code: str):
                         'cost': total_cost,
                         'prescribers': int(total_rx / 120)  # Estimate
                     })
-                
-                # Monthly aggregated data
-                monthly_totals = {}
-                for state_data in pbs_data['data_by_state'].values():
-                    for month_data in state_data['monthly']:
-                        month = month_data['month']
-                        if month not in monthly_totals:
-                            monthly_totals[month] = {'prescriptions': 0, 'cost': 0}
-                        monthly_totals[month]['prescriptions'] += month_data['prescriptions']
-                        monthly_totals[month]['cost'] += month_data['cost']
+                    
+                    # Monthly aggregated data
+                    for month, month_data in state_months.items():
+                        totals = monthly_totals.setdefault(month, {'prescriptions': 0, 'cost': 0})
+                        totals['prescriptions'] += month_data['prescriptions']
+                        totals['cost'] += month_data['cost']
                 
                 monthly_data = [
-                    {'month': month, **data}
+                    {'month': f"{month[:4]}-{month[4:]}", 'prescriptions': data['prescriptions'], 'cost': int(data['cost'])}
                     for month, data in sorted(monthly_totals.items())
                 ]
                 
                 # Top drugs (we have metformin data)
                 top_drugs = [{
                     'name': 'Metformin',
-                    'prescriptions': pbs_data['national_total']['total_prescriptions'],
-                    'cost': pbs_data['national_total']['total_cost']
+                    'prescriptions': sum(r['prescriptions'] for r in regional_data),
+                    'cost': sum(r['cost'] for r in regional_data)
                 }]
                 
             except Exception as e:
-                print(f"Error loading PBS data: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("Error loading PBS data: %s", e)
                 # Fallback to generated data
                 states = ['NSW', 'VIC', 'QLD', 'SA', 'WA', 'TAS', 'NT', 'ACT']
-                for state in states:
-                    import random
-                    prescriptions = random.randint(50000, 200000)
+                volumes = mock_ints(len(states), 50000, 200000, 'AU', 'country', 'prescriptions')
+                unit_costs = mock_uniform(len(states), 15, 35, 'AU', 'country', 'cost')
+                for state, prescriptions, unit_cost in zip(states, volumes, unit_costs):
                     regional_data.append({
                         'region': state,
                         'prescriptions': prescriptions,
-                        'cost': prescriptions * random.uniform(15, 35),
+                        'cost': prescriptions * unit_cost,
                         'prescribers': int(prescriptions / 120)
                     })
                 
-                # Generate monthly trend data
-                import random
-                from datetime import datetime, timedelta
-                base_date = datetime(2024, 7, 1)
-                for i in range(12):
-                    month_date = base_date + timedelta(days=30*i)
-                    monthly_data.append({
-                        'month': month_date.strftime('%Y-%m'),
-                        'prescriptions': random.randint(600000, 900000),
-                        'cost': random.randint(18000000, 25000000)
-                    })
-                
                 # Top drugs - get from common drugs database
                 country_key = 'AU'
                 top_drug_keys = ['metformin', 'atorvastatin', 'rosuvastatin', 'amlodipine', 'omeprazole', 'ramipril', 'levothyroxine', 'salbutamol', 'perindopril', 'lansoprazole']
@@ -626,19 +948,6 @@ async def get_country_detail(country_code: str):
                     'cost': cost,
                     'prescribers': int(prescriptions / 150)
                 })
-            
-            # Monthly trend data
-            from datetime import datetime, timedelta
-            base_date = datetime(2024, 7, 1)
-            for i in range(12):
-                month_date = base_date + timedelta(days=30*i)
-                # Use total as baseline with some variation
-                import random
-                monthly_data.append({
-                    'month': month_date.strftime('%Y-%m'),
-                    'prescriptions': int(total_drug_prescriptions * random.uniform(0.95, 1.05)),
-                    'cost': int(total_drug_cost * random.uniform(0.95, 1.05))
-                })
         
         elif country == 'US':
             # US - Load real CMS Medicare Part D data from cache
@@ -648,7 +957,7 @@ async def get_country_detail(country_code: str):
                 with open(cms_data_path, 'r') as f:
                     cms_data = json.load(f)
                 
-                print(f"✓ Loaded CMS data from cache: {len(cms_data['states'])} states")
+                logger.debug("Loaded CMS data from cache: %d states", len(cms_data['states']))
                 
                 # State code to full name mapping
                 state_names = {
@@ -691,48 +1000,31 @@ async def get_country_detail(country_code: str):
                             'cost': drug_data['national_total']['total_cost']
                         })
                     except Exception as e:
-                        print(f"Error loading {drug_file}: {e}")
+                        logger.warning("Error loading %s: %s", drug_file, e)
                         continue
                 
                 # Sort by prescriptions and take top 10
                 drug_totals.sort(key=lambda x: x['prescriptions'], reverse=True)
                 top_drugs = drug_totals[:10]
                 
-                # Generate quarterly trend data (Medicare reports quarterly)
-                from datetime import datetime, timedelta
-                import random
-                base_date = datetime(2024, 1, 1)
-                total_rx = cms_data['national_totals']['total_prescriptions']
-                total_cost = cms_data['national_totals']['total_cost']
-                
-                for i in range(4):  # 4 quarters in 2024
-                    quarter_date = base_date + timedelta(days=90*i)
-                    monthly_data.append({
-                        'month': quarter_date.strftime('%Y-Q') + str(i+1),
-                        'prescriptions': int(total_rx / 4 * random.uniform(0.95, 1.05)),
-                        'cost': int(total_cost / 4 * random.uniform(0.95, 1.05))
-                    })
-                    
             except FileNotFoundError:
-                print("⚠ CMS cache file not found, generating sample data...")
+                logger.info("CMS cache file not found, generating sample data")
                 # Fallback: generate minimal data
-                import random
                 states = [
                     ('California', 'CA'), ('Texas', 'TX'), ('Florida', 'FL'),
                     ('New York', 'NY'), ('Pennsylvania', 'PA')
                 ]
-                for state_name, state_code in states:
-                    prescriptions = random.randint(200000000, 500000000)
+                volumes = mock_ints(len(states), 200000000, 500000000, 'US', 'country', 'prescriptions')
+                unit_costs = mock_uniform(len(states), 40, 60, 'US', 'country', 'cost')
+                for (state_name, state_code), prescriptions, unit_cost in zip(states, volumes, unit_costs):
                     regional_data.append({
                         'region': state_name,
                         'prescriptions': prescriptions,
-                        'cost': prescriptions * random.uniform(40, 60),
+                        'cost': prescriptions * unit_cost,
                         'prescribers': int(prescriptions / 200)
                     })
             except Exception as e:
-                print(f"Error loading CMS data: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("Error loading CMS data: %s", e)
         
         else:
             # EU countries - First get top drugs
@@ -756,10 +1048,9 @@ async def get_country_detail(country_code: str):
             # Generate regional data proportional to total
             region_count = {'FR': 13, 'DE': 16, 'IT': 20, 'ES': 17, 'NL': 12}
             num_regions = region_count.get(country, 10)
-            import random
             
-            # Generate random weights that sum to 100
-            weights = [random.uniform(1, 10) for _ in range(num_regions)]
+            # Generate weights (seeded per country) that sum to 100
+            weights = mock_uniform(num_regions, 1, 10, country, 'country', 'weights')
             total_weight = sum(weights)
             weights = [w / total_weight * 100 for w in weights]
             
@@ -772,17 +1063,6 @@ async def get_country_detail(country_code: str):
                     'cost': cost,
                     'prescribers': int(prescriptions / 100)
                 })
-            
-            # Monthly trend data
-            from datetime import datetime, timedelta
-            base_date = datetime(2024, 7, 1)
-            for i in range(12):
-                month_date = base_date + timedelta(days=30*i)
-                monthly_data.append({
-                    'month': month_date.strftime('%Y-%m'),
-                    'prescriptions': int(total_drug_prescriptions * random.uniform(0.95, 1.05)),
-                    'cost': int(total_drug_cost * random.uniform(0.95, 1.05))
-                })
         
         # Country metadata
         country_info = {
@@ -879,8 +1159,7 @@ async def get_country_detail(country_code: str):
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Failed to fetch country data for %s", country)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to fetch country data: {str(e)}"
@@ -927,8 +1206,7 @@ async def get_country_local_authorities(country_code: str):
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Failed to fetch local authority data for %s", country_code)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to fetch local authority data: {str(e)}"
@@ -2,33 +2,101 @@
 Granular Data Routes
 Practice-level and postcode-level endpoints for detailed analysis
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
+import asyncio
 import sys
 import os
+import json
+import logging
 
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+# Parent directory goes last: its older copies of the engine and
+# data_sources_*.py must not shadow the ones in api/
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from data_sources_uk import UKDataSource
-from data_sources_us import USDataSource
-from data_sources_au import AustraliaDataSource
+from routes import DATA_SOURCES as ALL_DATA_SOURCES
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-# Initialize data sources
-DATA_SOURCES = {
-    'UK': UKDataSource(),
-    'US': USDataSource(),
-    'AU': AustraliaDataSource()
-}
+# Share data source instances with the main router so their caches and
+# per-practice indexes are filled by every pull, not just granular ones
+DATA_SOURCES = ALL_DATA_SOURCES.subset(('UK', 'US', 'AU'))
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NDJSON_BATCH_SIZE = 200  # Practice lines per streamed chunk
+MAX_MATRIX_DRUGS = 10
+
+
+def _format_practice(p):
+    """Format one PrescribingData row for the practices endpoint"""
+    practice = {
+        'id': p.prescriber.id,
+        'name': p.prescriber.name,
+        'type': p.prescriber.type,
+        'prescriptions': p.prescriptions,
+        'cost': p.cost,
+        'quantity': p.quantity
+    }
+    
+    # Add optional fields
+    if p.prescriber.location:
+        practice['location'] = p.prescriber.location
+    if p.prescriber.list_size:
+        practice['list_size'] = p.prescriber.list_size
+    if p.prescriber.specialty:
+        practice['specialty'] = p.prescriber.specialty
+    
+    return practice
+
+
+def _stream_practices(meta, prescribing_data):
+    """
+    Yield the practices response as NDJSON
+    
+    First line is {"record": "meta", ...}, then one line per practice as it is
+    formatted, then a trailing {"record": "summary", ...} with the totals.
+    """
+    yield json.dumps({'record': 'meta', **meta}) + '\n'
+    
+    count = 0
+    total_prescriptions = 0
+    total_cost = 0.0
+    batch = []
+    
+    for p in prescribing_data:
+        practice = _format_practice(p)
+        count += 1
+        total_prescriptions += practice['prescriptions']
+        total_cost += practice['cost']
+        batch.append(json.dumps(practice))
+        
+        if len(batch) >= NDJSON_BATCH_SIZE:
+            yield '\n'.join(batch) + '\n'
+            batch = []
+    
+    if batch:
+        yield '\n'.join(batch) + '\n'
+    
+    yield json.dumps({
+        'record': 'summary',
+        'count': count,
+        'total_prescriptions': total_prescriptions,
+        'total_cost': total_cost
+    }) + '\n'
 
 
 @router.get("/country/{country_code}/practices", tags=["Granular Data"])
 async def get_practice_data(
+    request: Request,
     country_code: str,
     drug: str = Query(..., description="Drug name to query"),
     region: Optional[str] = Query(None, description="Filter by region (optional)"),
-    limit: int = Query(1000, description="Maximum practices to return")
+    limit: int = Query(1000, description="Maximum practices to return"),
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$",
+                                 description="Response format: json or ndjson (streamed)")
 ):
     """
     Get practice-level prescribing data for granular visualization
@@ -42,8 +110,13 @@ async def get_practice_data(
     
     This endpoint provides the granular data needed for detailed maps
     showing individual practices as markers or small polygons.
+    
+    Pass format=ndjson (or Accept: application/x-ndjson) to stream one
+    practice per line, with the totals as a trailing summary record.
     """
     country = country_code.upper()
+    stream = (response_format == "ndjson"
+              or NDJSON_MEDIA_TYPE in request.headers.get('accept', ''))
     
     if country not in DATA_SOURCES:
         raise HTTPException(
@@ -72,6 +145,23 @@ async def get_practice_data(
             region=region
         )
         
+        if stream:
+            # Sort by volume and limit, then stream practices as they are formatted
+            prescribing_data = sorted(
+                prescribing_data or [], key=lambda x: x.prescriptions, reverse=True
+            )[:limit]
+            meta = {
+                'country': country,
+                'drug': drug,
+                'drug_code': drug_code,
+                'region': region,
+                'period': period
+            }
+            return StreamingResponse(
+                _stream_practices(meta, prescribing_data),
+                media_type=NDJSON_MEDIA_TYPE
+            )
+        
         if not prescribing_data:
             return {
                 'country': country,
@@ -83,30 +173,10 @@ async def get_practice_data(
             }
         
         # Sort by volume and limit
-        prescribing_data.sort(key=lambda x: x.prescriptions, reverse=True)
-        prescribing_data = prescribing_data[:limit]
+        prescribing_data = sorted(prescribing_data, key=lambda x: x.prescriptions, reverse=True)[:limit]
         
         # Format response
-        practices = []
-        for p in prescribing_data:
-            practice = {
-                'id': p.prescriber.id,
-                'name': p.prescriber.name,
-                'type': p.prescriber.type,
-                'prescriptions': p.prescriptions,
-                'cost': p.cost,
-                'quantity': p.quantity
-            }
-            
-            # Add optional fields
-            if p.prescriber.location:
-                practice['location'] = p.prescriber.location
-            if p.prescriber.list_size:
-                practice['list_size'] = p.prescriber.list_size
-            if p.prescriber.specialty:
-                practice['specialty'] = p.prescriber.specialty
-            
-            practices.append(practice)
+        practices = [_format_practice(p) for p in prescribing_data]
         
         return {
             'country': country,
@@ -123,14 +193,141 @@ async def get_practice_data(
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Practice data failed for %s in %s", drug, country_code)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to fetch practice data: {str(e)}"
         )
 
 
+def _fetch_drug_pull(data_source, drug: str, period: str, region: Optional[str]):
+    """Resolve a drug and pull its practice-level data (runs in a worker thread)"""
+    drug_code = data_source.find_drug_code(drug)
+    if not drug_code:
+        return drug, None, []
+    
+    return drug, drug_code, data_source.get_prescribing_data(
+        drug_code=drug_code,
+        period=period,
+        region=region
+    ) or []
+
+
+def _build_practice_matrix(pulls):
+    """
+    Join per-drug pulls into columns aligned on one practice axis
+    
+    Returns (practice_ids, practice_names, items, cost) where items/cost map
+    each drug to a list with one value per practice (0 if not prescribed).
+    """
+    row_of = {}
+    practice_ids = []
+    practice_names = []
+    
+    for _, _, data in pulls:
+        for p in data:
+            if p.prescriber.id not in row_of:
+                row_of[p.prescriber.id] = len(practice_ids)
+                practice_ids.append(p.prescriber.id)
+                practice_names.append(p.prescriber.name)
+    
+    items = {}
+    cost = {}
+    for drug, _, data in pulls:
+        item_column = [0] * len(practice_ids)
+        cost_column = [0.0] * len(practice_ids)
+        for p in data:
+            row = row_of[p.prescriber.id]
+            item_column[row] += p.prescriptions
+            cost_column[row] += p.cost
+        items[drug] = item_column
+        cost[drug] = cost_column
+    
+    return practice_ids, practice_names, items, cost
+
+
+@router.get("/country/{country_code}/practices/matrix", tags=["Granular Data"])
+async def get_practice_matrix(
+    country_code: str,
+    drugs: str = Query(..., description="Comma-separated drug names (e.g. inclisiran,evolocumab,alirocumab)"),
+    region: Optional[str] = Query(None, description="Filter by region (optional)"),
+    limit: int = Query(1000, description="Maximum practices to return")
+):
+    """
+    Get a practice × drug matrix of items and cost
+    
+    Each drug is pulled once, concurrently, and the pulls are joined into
+    columns aligned on a single practice axis. Practices are ordered by
+    total items across all requested drugs. Replaces loading and joining
+    separate per-drug outputs for switch and conversion analyses.
+    """
+    country = country_code.upper()
+    
+    if country not in DATA_SOURCES:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Country '{country}' not supported for granular data"
+        )
+    
+    drug_names = list(dict.fromkeys(d.strip() for d in drugs.split(',') if d.strip()))
+    if not drug_names or len(drug_names) > MAX_MATRIX_DRUGS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Provide between 1 and {MAX_MATRIX_DRUGS} drugs"
+        )
+    
+    data_source = DATA_SOURCES[country]
+    
+    try:
+        period = data_source.get_latest_period()
+        
+        # One upstream pass per drug, fetched concurrently
+        pulls = await asyncio.gather(*(
+            run_in_threadpool(_fetch_drug_pull, data_source, drug, period, region)
+            for drug in drug_names
+        ))
+        
+        missing = [drug for drug, drug_code, _ in pulls if not drug_code]
+        if missing:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Drug(s) not found in {country}: {', '.join(missing)}"
+            )
+        
+        practice_ids, practice_names, items, cost = _build_practice_matrix(pulls)
+        
+        # Order practices by total items across drugs and limit
+        totals = [sum(column[row] for column in items.values()) for row in range(len(practice_ids))]
+        rows = sorted(range(len(practice_ids)), key=totals.__getitem__, reverse=True)[:limit]
+        
+        return {
+            'country': country,
+            'region': region,
+            'period': period,
+            'drugs': [
+                {'name': drug, 'drug_code': drug_code, 'prescribers': len(data)}
+                for drug, drug_code, data in pulls
+            ],
+            'practices': {
+                'id': [practice_ids[r] for r in rows],
+                'name': [practice_names[r] for r in rows]
+            },
+            'items': {drug: [column[r] for r in rows] for drug, column in items.items()},
+            'cost': {drug: [round(column[r], 2) for r in rows] for drug, column in cost.items()},
+            'count': len(rows),
+            'total_practices': len(practice_ids)
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Practice matrix failed for %s in %s", drugs, country_code)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to build practice matrix: {str(e)}"
+        )
+
+
 @router.get("/country/{country_code}/practices/{practice_id}", tags=["Granular Data"])
 async def get_practice_detail(
     country_code: str,
@@ -181,15 +378,10 @@ async def get_practice_detail(
             drug_code = data_source.find_drug_code(drug)
             if drug_code:
                 period = data_source.get_latest_period()
-                prescribing_data = data_source.get_prescribing_data(
-                    drug_code=drug_code,
-                    period=period
-                )
                 
-                # Find this practice's data
-                practice_data = next(
-                    (p for p in prescribing_data if p.prescriber.id == practice_id),
-                    None
+                # Indexed single-practice lookup (no national pull)
+                practice_data = data_source.get_prescriber_data(
+                    practice_id, drug_code, period
                 )
                 
                 if practice_data:
@@ -207,8 +399,7 @@ async def get_practice_detail(
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Practice detail failed for %s in %s", practice_id, country_code)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to fetch practice detail: {str(e)}"
@@ -6,11 +6,16 @@ Queries live data sources and creates cached aggregates for country detail pages
 Usage:
     python scripts/aggregate_country_data.py --country UK
     python scripts/aggregate_country_data.py --all
+    python scripts/aggregate_country_data.py --country UK --granular --incremental
 """
 import sys
 import os
 import json
 import argparse
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from collections import defaultdict
 
@@ -40,6 +45,22 @@ TOP_DRUGS = {
            'metformin', 'valsartan', 'telmisartan', 'olmesartan', 'esomeprazole']
 }
 
+# Concurrent calls allowed against each upstream (country data source)
+UPSTREAM_LIMITS = {
+    'UK': 3,   # OpenPrescribing API
+    'AU': 4,   # Local PBS JSON files
+}
+DEFAULT_WORKERS = 8
+MAX_RETRIES = 3
+RETRY_BACKOFF = 2.0  # seconds, doubled on each retry
+CACHE_FILE_MODE = 0o644  # cache files are read by the API, possibly as another user
+
+# Per-practice, per-drug state behind incremental LA aggregation
+LA_CONTRIBUTIONS_FILE = 'uk_la_contributions.json'
+
+# Months of trend data (ending at the latest period) stored as monthly_data
+TREND_MONTHS = 12
+
 
 # Region mapping functions for each country
 def get_uk_region(practice_code, practice_name):
@@ -82,57 +103,121 @@ def get_us_state(prescriber_id, prescriber_name):
     return 'California'  # Default
 
 
-def aggregate_australia(cache_dir):
-    """Aggregate Australia PBS data"""
-    print("\n🇦🇺 Aggregating Australia (PBS)...")
+def write_cache_atomic(path, data, indent=2):
+    """Write JSON via a temp file + rename so readers never see a half-written cache"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+        # mkstemp creates 0600 files; keep caches readable like open(path, 'w') did
+        os.chmod(tmp_path, CACHE_FILE_MODE)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _with_retries(fn, *args, retries=MAX_RETRIES, backoff=RETRY_BACKOFF):
+    """Call fn, retrying failures with exponential backoff (LookupError is final)"""
+    for attempt in range(retries + 1):
+        try:
+            return fn(*args)
+        except LookupError:
+            # Unknown drug or no data for it - retrying won't change that
+            raise
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * (2 ** attempt))
+
+
+def _fetch_drug(data_source, limiter, drug_name, period):
+    """Job: resolve one drug and pull its prescribing data (bounded per upstream)"""
+    with limiter:
+        drug_code = data_source.find_drug_code(drug_name)
+        if not drug_code:
+            raise LookupError(f"No code found for {drug_name}")
+        
+        prescribing_data = data_source.get_prescribing_data(drug_code, period)
+    
+    if not prescribing_data:
+        raise LookupError(f"No data returned for {drug_name}")
+    
+    return prescribing_data
+
+
+def trend_start(period, months=TREND_MONTHS):
+    """First period of the months-long trend ending at period (same format)"""
+    year, month = int(period[:4]), int(period[5:7] or 12)
+    index = year * 12 + month - 1 - (months - 1)
+    return f"{index // 12:04d}-{index % 12 + 1:02d}" + period[7:]
+
+
+def _fetch_trend(data_source, limiter, drug_name, period):
+    """Job: pull one drug's monthly series for the TREND_MONTHS up to period"""
+    with limiter:
+        drug_code = data_source.find_drug_code(drug_name)
+        if not drug_code:
+            raise LookupError(f"No code found for {drug_name}")
+        
+        series = data_source.get_prescribing_series(drug_code, trend_start(period), period)
     
-    data_source = AustraliaDataSource()
+    if not series.periods:
+        raise LookupError(f"No trend data returned for {drug_name}")
+    
+    return series
+
+
+def build_monthly_data(trends):
+    """Per-month national totals across the drugs' series, oldest first"""
+    totals = defaultdict(lambda: [0, 0.0])
+    for series in trends.values():
+        for j, period in enumerate(series.periods):
+            total = totals[period[:7]]
+            total[0] += sum(row[j] for row in series.prescriptions)
+            total[1] += sum(row[j] for row in series.cost)
+    
+    return [
+        {'month': month, 'prescriptions': int(prescriptions), 'cost': int(cost)}
+        for month, (prescriptions, cost) in sorted(totals.items())
+    ] or None
+
+
+def build_australia_cache(data_source, fetched, trends):
+    """Build the AU country cache from per-drug PBS pulls and monthly series"""
+    print("\n🇦🇺 Aggregating Australia (PBS)...")
     
-    # Load real PBS data
     drugs_data = []
     top_drugs = TOP_DRUGS['AU']
     
     for drug_name in top_drugs:
-        print(f"  → Loading {drug_name}...")
-        drug_code = data_source.find_drug_code(drug_name)
-        
-        if not drug_code:
-            print(f"    ⚠️  No code found for {drug_name}")
+        prescribing_data = fetched.get(drug_name)
+        if not prescribing_data:
             continue
         
-        # Get latest period
-        period = data_source.get_latest_period()
+        # Calculate totals
+        total_rx = sum(p.prescriptions for p in prescribing_data)
+        total_cost = sum(p.cost for p in prescribing_data)
         
-        # Get prescribing data (returns state-level aggregates)
-        prescribing_data = data_source.get_prescribing_data(drug_code, period)
+        drugs_data.append({
+            'name': drug_name.title(),
+            'prescriptions': total_rx,
+            'cost': total_cost
+        })
         
-        if prescribing_data:
-            # Calculate totals
-            total_rx = sum(p.prescriptions for p in prescribing_data)
-            total_cost = sum(p.cost for p in prescribing_data)
-            
-            drugs_data.append({
-                'name': drug_name.title(),
-                'prescriptions': total_rx,
-                'cost': total_cost
-            })
-            
-            print(f"    ✓ {total_rx:,} prescriptions, A${total_cost:,.0f}")
+        print(f"  → {drug_name}: {total_rx:,} prescriptions, A${total_cost:,.0f}")
     
     # Aggregate by state
     regional_data = defaultdict(lambda: {'prescriptions': 0, 'cost': 0, 'prescribers': 0})
     
     for drug_name in top_drugs[:3]:  # Use top 3 for regional breakdown
-        drug_code = data_source.find_drug_code(drug_name)
-        if drug_code:
-            period = data_source.get_latest_period()
-            prescribing_data = data_source.get_prescribing_data(drug_code, period)
-            
-            for p in prescribing_data:
-                state = p.prescriber.name  # State name is in prescriber.name for AU
-                regional_data[state]['prescriptions'] += p.prescriptions
-                regional_data[state]['cost'] += p.cost
-                regional_data[state]['prescribers'] += 1
+        for p in fetched.get(drug_name) or []:
+            state = p.prescriber.name  # State name is in prescriber.name for AU
+            regional_data[state]['prescriptions'] += p.prescriptions
+            regional_data[state]['cost'] += p.cost
+            regional_data[state]['prescribers'] += 1
     
     regions = [
         {
@@ -147,36 +232,26 @@ def aggregate_australia(cache_dir):
     # Sort top drugs by prescriptions
     drugs_data.sort(key=lambda x: x['prescriptions'], reverse=True)
     
-    # Create cache file
-    cache_data = {
+    print(f"  ✓ {len(regions)} states, {len(drugs_data)} drugs")
+    
+    return {
         'country': 'AU',
         'last_updated': datetime.now().isoformat(),
-        'period': period,
+        'period': data_source.get_latest_period(),  # Known once PBS files are loaded
         'regions': regions,
         'top_drugs': drugs_data,
-        'monthly_data': None,  # TODO: Extract from PBS JSON
+        'monthly_data': build_monthly_data(trends),
         'metadata': {
             'source': 'PBS - AIHW Real Data',
             'update_frequency': 'Monthly'
         }
     }
-    
-    # Write to cache
-    cache_path = os.path.join(cache_dir, 'au_country_data.json')
-    with open(cache_path, 'w') as f:
-        json.dump(cache_data, f, indent=2)
-    
-    print(f"  ✓ Cached to {cache_path}")
-    print(f"  ✓ {len(regions)} states, {len(drugs_data)} drugs")
 
 
-def aggregate_uk(cache_dir):
-    """Aggregate UK NHS OpenPrescribing data"""
+def build_uk_cache(data_source, fetched, trends):
+    """Build the UK country cache from per-drug OpenPrescribing pulls and monthly series"""
     print("\n🇬🇧 Aggregating United Kingdom (NHS)...")
     
-    data_source = UKDataSource()
-    
-    # Get latest period
     period = data_source.get_latest_period()
     print(f"  Period: {period}")
     
@@ -184,21 +259,9 @@ def aggregate_uk(cache_dir):
     regional_data = defaultdict(lambda: {'prescriptions': 0, 'cost': 0, 'prescribers': set()})
     drugs_data = []
     
-    top_drugs = TOP_DRUGS['UK']
-    
-    for drug_name in top_drugs:
-        print(f"  → Querying {drug_name}...")
-        
-        drug_code = data_source.find_drug_code(drug_name)
-        if not drug_code:
-            print(f"    ⚠️  No code found for {drug_name}")
-            continue
-        
-        # Get prescribing data
-        prescribing_data = data_source.get_prescribing_data(drug_code, period)
-        
+    for drug_name in TOP_DRUGS['UK']:
+        prescribing_data = fetched.get(drug_name)
         if not prescribing_data:
-            print(f"    ⚠️  No data returned")
             continue
         
         # Aggregate totals for this drug
@@ -211,7 +274,7 @@ def aggregate_uk(cache_dir):
             'cost': int(total_cost)
         })
         
-        print(f"    ✓ {total_rx:,} prescriptions, £{total_cost:,.0f}")
+        print(f"  → {drug_name}: {total_rx:,} prescriptions, £{total_cost:,.0f}")
         
         # Aggregate by region
         for p in prescribing_data:
@@ -234,31 +297,164 @@ def aggregate_uk(cache_dir):
     # Sort drugs by prescriptions
     drugs_data.sort(key=lambda x: x['prescriptions'], reverse=True)
     
-    # Create cache file
-    cache_data = {
+    print(f"  ✓ {len(regions)} regions, {len(drugs_data)} drugs")
+    
+    return {
         'country': 'UK',
         'last_updated': datetime.now().isoformat(),
         'period': period,
         'regions': regions,
         'top_drugs': drugs_data,
-        'monthly_data': None,  # TODO: Query historical data
+        'monthly_data': build_monthly_data(trends),
         'metadata': {
             'source': 'NHS OpenPrescribing',
             'update_frequency': 'Daily'
         }
     }
+
+
+# Country → (data source, cache builder) for the concurrent runner
+COUNTRY_AGGREGATORS = {
+    'AU': (AustraliaDataSource, build_australia_cache),
+    'UK': (UKDataSource, build_uk_cache),
+}
+
+
+def run_aggregation(countries, cache_dir, max_workers=DEFAULT_WORKERS):
+    """
+    Aggregate several countries concurrently
+    
+    Every (country, drug) pull - the latest period and the monthly trend
+    series - is a job on one shared worker pool. Each upstream gets its own
+    concurrency limit (UPSTREAM_LIMITS), failed jobs are retried with
+    exponential backoff, and a country's cache is written atomically as
+    soon as all of its jobs have finished.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        jobs = {}
+        pending = {}
+        fetched = {}
+        
+        for country in countries:
+            source_class, _ = COUNTRY_AGGREGATORS[country]
+            data_source = source_class()
+            limiter = threading.BoundedSemaphore(UPSTREAM_LIMITS.get(country, 2))
+            period = data_source.get_latest_period()
+            
+            print(f"  → {country}: queueing {len(TOP_DRUGS[country])} drugs (period {period})")
+            
+            fetched[country] = (data_source, {}, {})
+            pending[country] = 2 * len(TOP_DRUGS[country])
+            
+            for drug_name in TOP_DRUGS[country]:
+                job = pool.submit(_with_retries, _fetch_drug, data_source, limiter, drug_name, period)
+                jobs[job] = (country, drug_name, False)
+                job = pool.submit(_with_retries, _fetch_trend, data_source, limiter, drug_name, period)
+                jobs[job] = (country, drug_name, True)
+        
+        for job in as_completed(jobs):
+            country, drug_name, is_trend = jobs[job]
+            data_source, results, trends = fetched[country]
+            
+            try:
+                (trends if is_trend else results)[drug_name] = job.result()
+            except Exception as e:
+                print(f"    ⚠️  {country} {drug_name}{' trend' if is_trend else ''}: {e}")
+            
+            pending[country] -= 1
+            if pending[country]:
+                continue
+            
+            # monthly_data must cover the same drugs as top_drugs; a partial
+            # trend would silently understate the months
+            trends = {drug: series for drug, series in trends.items() if drug in results}
+            missing = [drug for drug in TOP_DRUGS[country] if drug in results and drug not in trends]
+            if missing:
+                print(f"    ⚠️  {country}: no trend for {', '.join(missing)} - omitting monthly_data")
+                trends = {}
+            
+            # All jobs for this country are done - build and publish its cache
+            try:
+                _, build_cache = COUNTRY_AGGREGATORS[country]
+                cache_path = os.path.join(cache_dir, f'{country.lower()}_country_data.json')
+                write_cache_atomic(cache_path, build_cache(data_source, results, trends))
+                print(f"  ✓ Cached to {cache_path}")
+            except Exception as e:
+                print(f"❌ Error aggregating {country}: {e}")
+                import traceback
+                traceback.print_exc()
+
+
+def _load_la_contributions(cache_dir):
+    """Load per-practice, per-drug LA contributions from the previous run"""
+    path = os.path.join(cache_dir, LA_CONTRIBUTIONS_FILE)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"  ⚠️  Could not load {LA_CONTRIBUTIONS_FILE}: {e}")
+    return {'period': None, 'practices': {}, 'local_authorities': {}}
+
+
+def _la_contribution(practice):
+    """Return (la_name, prescriptions, cost) a practice currently adds to its LA"""
+    location = practice.get('location') or {}
+    la_name = location.get('la_name')
+    if not la_name or not practice['contributions']:
+        return None
+    
+    prescriptions = sum(c[0] for c in practice['contributions'].values())
+    cost = sum(c[1] for c in practice['contributions'].values())
+    return la_name, prescriptions, cost
+
+
+def _shift_la_totals(la_totals, contribution, sign):
+    """Add (sign=1) or remove (sign=-1) a practice's contribution from the LA totals"""
+    if contribution is None:
+        return
+    
+    la_name, prescriptions, cost = contribution
+    totals = la_totals.setdefault(la_name, {'prescriptions': 0, 'cost': 0.0, 'prescribers': 0})
+    totals['prescriptions'] += sign * prescriptions
+    totals['cost'] += sign * cost
+    totals['prescribers'] += sign
+    
+    if totals['prescribers'] <= 0:
+        del la_totals[la_name]
+
+
+def _update_practice(la_totals, practice, drug_key, value, location=None):
+    """Replace one drug's contribution for a practice and apply the delta to its LA"""
+    before = _la_contribution(practice)
+    
+    if location is not None:
+        practice['location'] = location
+    if value is None:
+        practice['contributions'].pop(drug_key, None)
+    else:
+        practice['contributions'][drug_key] = value
     
-    # Write to cache
-    cache_path = os.path.join(cache_dir, 'uk_country_data.json')
-    with open(cache_path, 'w') as f:
-        json.dump(cache_data, f, indent=2)
-    
-    print(f"  ✓ Cached to {cache_path}")
-    print(f"  ✓ {len(regions)} regions, {len(drugs_data)} drugs")
+    _shift_la_totals(la_totals, before, -1)
+    _shift_la_totals(la_totals, _la_contribution(practice), 1)
 
 
-def aggregate_uk_local_authorities(cache_dir):
-    """Aggregate UK NHS data by Local Authority (granular ~150 areas)"""
+def _drop_drug(la_totals, practices, drug_key):
+    """Remove one drug's contribution from every practice (and its LA)"""
+    for practice in practices.values():
+        if drug_key in practice['contributions']:
+            _update_practice(la_totals, practice, drug_key, None)
+
+
+def aggregate_uk_local_authorities(cache_dir, incremental=False):
+    """
+    Aggregate UK NHS data by Local Authority (granular ~150 areas)
+    
+    Per-practice, per-drug contributions are kept in uk_la_contributions.json.
+    With incremental=True only practices whose contribution changed since the
+    previous run are geocoded and applied as deltas to the LA totals; a full
+    run rebuilds the same state from scratch.
+    """
     print("\n🏘️ Aggregating UK by Local Authority (using postcodes)...")
     
     data_source = UKDataSource()
@@ -268,23 +464,31 @@ def aggregate_uk_local_authorities(cache_dir):
     period = data_source.get_latest_period()
     print(f"  Period: {period}")
     
-    # Aggregate by Local Authority
-    la_data = defaultdict(lambda: {'prescriptions': 0, 'cost': 0, 'prescribers': set(), 'practices': []})
-    drugs_data = []
-    unmapped_count = 0
-    total_practices = 0
+    state = _load_la_contributions(cache_dir) if incremental else {
+        'period': None, 'practices': {}, 'local_authorities': {}
+    }
+    if incremental:
+        print(f"  Mode: incremental (previous period: {state.get('period')})")
     
-    # Also collect practice locations for point markers
-    practice_locations = {}
+    practices = state['practices']
+    la_totals = state['local_authorities']
+    drugs_data = []
+    geocoded = 0
     
     top_drugs = TOP_DRUGS['UK'][:3]  # Use top 3 drugs for LA aggregation
     
+    # Drop contributions for drugs no longer in the top list
+    for practice in practices.values():
+        for drug_key in [d for d in practice['contributions'] if d not in top_drugs]:
+            _update_practice(la_totals, practice, drug_key, None)
+    
     for drug_name in top_drugs:
         print(f"  → Querying {drug_name}...")
         
         drug_code = data_source.find_drug_code(drug_name)
         if not drug_code:
             print(f"    ⚠️  No code found for {drug_name}")
+            _drop_drug(la_totals, practices, drug_name)  # don't carry last period's figures
             continue
         
         # Get practice-level prescribing data
@@ -292,45 +496,47 @@ def aggregate_uk_local_authorities(cache_dir):
         
         if not prescribing_data:
             print(f"    ⚠️  No data returned")
+            _drop_drug(la_totals, practices, drug_name)  # don't carry last period's figures
             continue
         
-        print(f"    → Geocoding {len(prescribing_data)} practices...")
-        total_practices = len(prescribing_data)
+        current = {p.prescriber.id: p for p in prescribing_data}
+        changed = 0
         
-        # Geocode practices and map to LAs
-        for i, p in enumerate(prescribing_data):
-            if i % 100 == 0 and i > 0:
-                print(f"      Progress: {i}/{len(prescribing_data)}")
-                geocoder._save_cache()  # Save periodically
+        for practice_id, p in current.items():
+            value = [p.prescriptions, p.cost]
+            practice = practices.get(practice_id)
+            
+            # Unchanged practices are skipped unless they still need an LA
+            if (practice is not None and practice['location'] is not None
+                    and practice['contributions'].get(drug_name) == value):
+                continue
             
-            # Get practice location and LA
-            location = geocoder.get_practice_location_and_la(p.prescriber.id)
+            changed += 1
+            if practice is None:
+                practice = practices[practice_id] = {
+                    'name': p.prescriber.name,
+                    'location': None,
+                    'contributions': {}
+                }
             
-            if location and location.get('la_name'):
-                la_name = location['la_name']
-                
-                # Aggregate to LA
-                la_data[la_name]['prescriptions'] += p.prescriptions
-                la_data[la_name]['cost'] += p.cost
-                la_data[la_name]['prescribers'].add(p.prescriber.id)
-                
-                # Store practice location for point markers (first drug only)
-                if p.prescriber.id not in practice_locations:
-                    practice_locations[p.prescriber.id] = {
-                        'name': p.prescriber.name,
-                        'lat': location['lat'],
-                        'lng': location['lng'],
-                        'postcode': location['postcode'],
-                        'la': la_name,
-                        'prescriptions': p.prescriptions,
-                        'cost': p.cost
-                    }
-                else:
-                    # Update totals
-                    practice_locations[p.prescriber.id]['prescriptions'] += p.prescriptions
-                    practice_locations[p.prescriber.id]['cost'] += p.cost
-            else:
-                unmapped_count += 1
+            # Only geocode practices we have not mapped yet
+            location = None
+            if practice['location'] is None:
+                location = geocoder.get_practice_location_and_la(practice_id)
+                geocoded += 1
+                if geocoded % 100 == 0:
+                    print(f"      Geocoded: {geocoded}")
+                    geocoder._save_cache()  # Save periodically
+            
+            _update_practice(la_totals, practice, drug_name, value, location)
+        
+        # Practices that stopped prescribing this drug
+        removed = [
+            practice_id for practice_id, practice in practices.items()
+            if drug_name in practice['contributions'] and practice_id not in current
+        ]
+        for practice_id in removed:
+            _update_practice(la_totals, practices[practice_id], drug_name, None)
         
         # Calculate totals for this drug
         total_rx = sum(p.prescriptions for p in prescribing_data)
@@ -342,23 +548,49 @@ def aggregate_uk_local_authorities(cache_dir):
             'cost': int(total_cost)
         })
         
-        print(f"    ✓ {total_rx:,} prescriptions across {len(la_data)} LAs")
-        print(f"    ✓ Geocoded {len(practice_locations)} practice locations")
+        print(f"    ✓ {total_rx:,} prescriptions, {changed:,} changed / {len(removed):,} removed practices")
     
     # Save final cache
     geocoder._save_cache()
     
+    # Forget practices with no remaining contributions
+    for practice_id in [pid for pid, p in practices.items() if not p['contributions']]:
+        del practices[practice_id]
+    
+    state['period'] = period
+    
     # Convert to list
     local_authorities = [
         {
             'local_authority': la_name,
             'prescriptions': int(data['prescriptions']),
             'cost': int(data['cost']),
-            'prescribers': len(data['prescribers'])
+            'prescribers': data['prescribers']
         }
-        for la_name, data in la_data.items()
+        for la_name, data in la_totals.items()
     ]
     
+    # Practice locations for point markers
+    practice_locations = {}
+    for practice_id, practice in practices.items():
+        contribution = _la_contribution(practice)
+        if contribution is None:
+            continue
+        
+        location = practice['location']
+        practice_locations[practice_id] = {
+            'name': practice['name'],
+            'lat': location['lat'],
+            'lng': location['lng'],
+            'postcode': location['postcode'],
+            'la': contribution[0],
+            'prescriptions': contribution[1],
+            'cost': contribution[2]
+        }
+    
+    total_practices = len(practices)
+    unmapped_count = total_practices - len(practice_locations)
+    
     # Sort by prescriptions
     local_authorities.sort(key=lambda x: x['prescriptions'], reverse=True)
     drugs_data.sort(key=lambda x: x['prescriptions'], reverse=True)
@@ -384,8 +616,7 @@ def aggregate_uk_local_authorities(cache_dir):
     
     # Write LA aggregates to cache
     cache_path = os.path.join(cache_dir, 'uk_local_authority_data.json')
-    with open(cache_path, 'w') as f:
-        json.dump(cache_data, f, indent=2)
+    write_cache_atomic(cache_path, cache_data)
     
     print(f"  ✓ Cached LA aggregates to {cache_path}")
     print(f"  ✓ {len(local_authorities)} Local Authorities")
@@ -393,20 +624,23 @@ def aggregate_uk_local_authorities(cache_dir):
     
     # Write practice locations to separate cache
     locations_path = os.path.join(cache_dir, 'uk_practice_locations.json')
-    with open(locations_path, 'w') as f:
-        json.dump(practice_locations, f, indent=2)
+    write_cache_atomic(locations_path, practice_locations)
     
     print(f"  ✓ Cached {len(practice_locations)} practice locations to {locations_path}")
+    
+    # Write per-practice contributions for the next incremental run
+    contributions_path = os.path.join(cache_dir, LA_CONTRIBUTIONS_FILE)
+    write_cache_atomic(contributions_path, state, indent=None)
+    
+    print(f"  ✓ Cached {total_practices} practice contributions to {contributions_path}")
 
 
-def aggregate_country(country_code, cache_dir):
+def aggregate_country(country_code, cache_dir, max_workers=DEFAULT_WORKERS):
     """Aggregate data for a specific country"""
     country_code = country_code.upper()
     
-    if country_code == 'AU':
-        aggregate_australia(cache_dir)
-    elif country_code == 'UK':
-        aggregate_uk(cache_dir)
+    if country_code in COUNTRY_AGGREGATORS:
+        run_aggregation([country_code], cache_dir, max_workers=max_workers)
     elif country_code == 'US':
         print(f"\n🇺🇸 US aggregation not yet implemented (CMS API requires more setup)")
     elif country_code in ['FR', 'JP']:
@@ -420,6 +654,10 @@ def main():
     parser.add_argument('--country', help='Country code (UK, US, AU, FR, JP)')
     parser.add_argument('--all', action='store_true', help='Aggregate all countries')
     parser.add_argument('--granular', action='store_true', help='Create granular aggregates (UK: Local Authorities)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Worker threads for concurrent (country, drug) pulls')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Granular only: apply changed practices to the previous LA aggregates')
     args = parser.parse_args()
     
     cache_dir = os.path.join(os.path.dirname(__file__), '..', 'cache')
@@ -430,19 +668,18 @@ def main():
     print("=" * 60)
     
     if args.all:
-        for country in ['AU', 'UK']:  # Start with these two
+        run_aggregation(['AU', 'UK'], cache_dir, max_workers=args.workers)  # Start with these two
+        if args.granular:
             try:
-                aggregate_country(country, cache_dir)
-                if args.granular and country == 'UK':
-                    aggregate_uk_local_authorities(cache_dir)
+                aggregate_uk_local_authorities(cache_dir, incremental=args.incremental)
             except Exception as e:
-                print(f"❌ Error aggregating {country}: {e}")
+                print(f"❌ Error aggregating UK local authorities: {e}")
                 import traceback
                 traceback.print_exc()
     elif args.country:
-        aggregate_country(args.country, cache_dir)
+        aggregate_country(args.country, cache_dir, max_workers=args.workers)
         if args.granular and args.country.upper() == 'UK':
-            aggregate_uk_local_authorities(cache_dir)
+            aggregate_uk_local_authorities(cache_dir, incremental=args.incremental)
     else:
         parser.print_help()
     
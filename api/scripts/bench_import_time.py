@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Cold Start Benchmark
+Profiles `import main` with `python -X importtime` and times the first
+response (GET /health) from a fresh interpreter
+
+Usage:
+    python scripts/bench_import_time.py
+    python scripts/bench_import_time.py --top 30 --budget 1.0
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Time-to-first-response target (seconds)
+DEFAULT_BUDGET = 1.0
+
+FIRST_RESPONSE_SNIPPET = """
+import time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    status = client.get('/health').status_code
+done = time.perf_counter()
+print(f"{imported - start:.4f} {done - start:.4f} {status}")
+"""
+
+
+def _fresh_env():
+    """Environment for a cold interpreter (no bytecode writes, no warm-up)"""
+    env = dict(os.environ)
+    env['WARMUP_ENABLED'] = '0'
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    return env
+
+
+def profile_imports(top_n):
+    """
+    Run `import main` under -X importtime
+
+    Returns (total cumulative microseconds, self microseconds spent in
+    modules from api/, [(cumulative_us, self_us, module)] for the top_n
+    slowest modules).
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        cwd=API_DIR, env=_fresh_env(), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import main failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|', 2)
+        rows.append((int(cumulative_us), int(self_us), module.rstrip()))
+
+    total = next((cumulative for cumulative, _, module in rows if module.strip() == 'main'), 0)
+    local = {name[:-3] for name in os.listdir(API_DIR) if name.endswith('.py')}
+    own = sum(self_us for _, self_us, module in rows if module.strip().split('.')[0] in local)
+    top = sorted(rows, reverse=True)[:top_n]
+    return total, own, top
+
+
+def time_first_response():
+    """(import seconds, seconds to first /health response, status code) in a new process"""
+    result = subprocess.run(
+        [sys.executable, '-c', FIRST_RESPONSE_SNIPPET],
+        cwd=API_DIR, env=_fresh_env(), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"first response failed:\n{result.stderr[-2000:]}")
+
+    imported, done, status = result.stdout.strip().splitlines()[-1].split()
+    return float(imported), float(done), int(status)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile API import time and time to first response')
+    parser.add_argument('--top', type=int, default=20, help='Slowest modules to list (default: %(default)s)')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET,
+                        help='Fail if time to first response exceeds this many seconds (default: %(default)s)')
+    args = parser.parse_args()
+
+    total, own, top = profile_imports(args.top)
+    print(f"\n{'='*80}")
+    print(f"IMPORT TIME: import main = {total / 1000:.1f} ms "
+          f"({own / 1000:.1f} ms in api/ modules, the rest in dependencies)")
+    print(f"{'='*80}")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, module in top:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {module}")
+
+    imported, first_response, status = time_first_response()
+    print(f"\n{'='*80}")
+    print(f"Import:              {imported * 1000:.1f} ms")
+    print(f"First response:      {first_response * 1000:.1f} ms (GET /health -> {status})")
+    print(f"Budget:              {args.budget * 1000:.0f} ms")
+    print(f"{'='*80}\n")
+
+    if first_response > args.budget:
+        print("❌ Time to first response over budget")
+        sys.exit(1)
+    print("✅ Within budget")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+PBS Ingestion
+Aggregates the PBS item-level prescribing CSV for every drug in one pass
+
+Joins each row to the item map (ITEM_CODE -> drug name, ATC5 code) and sums
+national prescriptions and cost per ATC5 code and month, then writes a
+single compact store that AustraliaDataSource queries for any drug. State
+figures are distributed from the national totals at query time using the
+state model saved in the store.
+
+Replaces the per-drug prepare_pbs_real_data.py / process_additional_drugs.py
+scripts, which re-read the whole CSV once per drug.
+
+Usage:
+    python scripts/ingest_pbs.py
+    python scripts/ingest_pbs.py --csv pbs_data/pbs_jul2024_jun2025.csv --out pbs_data/pbs_store.json
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+PBS_DIR = os.path.join(API_DIR, 'pbs_data')
+
+DEFAULT_CSV = os.path.join(PBS_DIR, 'pbs_jul2024_jun2025.csv')
+DEFAULT_ITEM_MAP = os.path.join(PBS_DIR, 'pbs_item_drug_map.csv')
+DEFAULT_OUT = os.path.join(PBS_DIR, 'pbs_store.json')
+
+# ATC5 codes that aren't drugs (missing item codes, extemporaneous preparations)
+EXCLUDED_ATC = {'', 'Z'}
+
+# State/Territory population and demographic prescribing factor; national
+# totals are split by population × factor
+STATES = {
+    'NSW': ('New South Wales', 8_166_000, 1.05),
+    'VIC': ('Victoria', 6_613_000, 1.02),
+    'QLD': ('Queensland', 5_185_000, 1.10),
+    'WA': ('Western Australia', 2_667_000, 0.95),
+    'SA': ('South Australia', 1_771_000, 1.08),
+    'TAS': ('Tasmania', 541_000, 1.15),
+    'ACT': ('Australian Capital Territory', 431_000, 0.85),
+    'NT': ('Northern Territory', 246_000, 0.90),
+}
+
+
+def build_state_model():
+    """State model with each state's weighted share of national prescribing"""
+    total_weighted = sum(population * factor for _, population, factor in STATES.values())
+    return {
+        code: {
+            'name': name,
+            'population': population,
+            'demographic_factor': factor,
+            'weighted_share': population * factor / total_weighted
+        }
+        for code, (name, population, factor) in STATES.items()
+    }
+
+
+def load_item_map(path):
+    """ITEM_CODE -> (drug name, ATC5 code)"""
+    items = {}
+    with open(path, 'r', encoding='latin-1', newline='') as f:
+        for row in csv.DictReader(f):
+            items[row['ITEM_CODE']] = (row['DRUG_NAME'].strip(), row['ATC5_Code'].strip())
+    return items
+
+
+def aggregate(csv_path, items):
+    """
+    Single pass over the prescribing CSV
+
+    Returns ({(atc, month): [prescriptions, cost]}, {atc: Counter of drug
+    names weighted by prescriptions}, rows read, rows without a mapped item).
+    """
+    totals = defaultdict(lambda: [0, 0.0])
+    names = defaultdict(Counter)
+    rows = unmapped = 0
+
+    with open(csv_path, 'r', encoding='latin-1', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        item_col = header.index('ITEM_CODE')
+        month_col = header.index('MONTH_OF_SUPPLY')
+        rx_col = header.index('PRESCRIPTIONS')
+        cost_col = header.index('TOTAL_COST')
+
+        for row in reader:
+            rows += 1
+            item = items.get(row[item_col])
+            if item is None:
+                unmapped += 1
+                continue
+            name, atc = item
+            if atc in EXCLUDED_ATC:
+                continue
+            prescriptions = int(row[rx_col])
+            total = totals[(atc, row[month_col])]
+            total[0] += prescriptions
+            total[1] += float(row[cost_col])
+            names[atc][name] += prescriptions
+
+    return totals, names, rows, unmapped
+
+
+def build_store(totals, names, source_file):
+    """Compact store: one dense national series per ATC5 code over the shared month axis"""
+    months = sorted({month for _, month in totals})
+    month_index = {month: i for i, month in enumerate(months)}
+
+    drugs = {}
+    for (atc, month), (prescriptions, cost) in totals.items():
+        entry = drugs.get(atc)
+        if entry is None:
+            entry = drugs[atc] = {
+                # Most-prescribed name first; all names are searchable
+                'names': [name for name, _ in names[atc].most_common()],
+                'prescriptions': [0] * len(months),
+                'cost': [0.0] * len(months)
+            }
+        entry['prescriptions'][month_index[month]] = prescriptions
+        entry['cost'][month_index[month]] = round(cost, 2)
+
+    return {
+        'metadata': {
+            'source': 'PBS (Pharmaceutical Benefits Scheme)',
+            'source_url': 'https://www.pbs.gov.au/statistics/dos-and-dop/',
+            'data_type': 'Real national data with demographic state distribution',
+            'source_file': os.path.basename(source_file),
+            'period_start': f"{months[0][:4]}-{months[0][4:]}" if months else None,
+            'period_end': f"{months[-1][:4]}-{months[-1][4:]}" if months else None,
+            'update_frequency': 'Monthly',
+            'created': datetime.now().date().isoformat()
+        },
+        'months': months,
+        'state_model': build_state_model(),
+        'drugs': dict(sorted(drugs.items()))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Aggregate PBS prescribing data for all drugs into one store')
+    parser.add_argument('--csv', default=DEFAULT_CSV, help='PBS item-level prescribing CSV (default: %(default)s)')
+    parser.add_argument('--item-map', default=DEFAULT_ITEM_MAP, help='PBS item -> drug/ATC map (default: %(default)s)')
+    parser.add_argument('--out', default=DEFAULT_OUT, help='Store to write (default: %(default)s)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.csv):
+        print(f"❌ PBS CSV not found: {args.csv}")
+        print("   Download from https://www.pbs.gov.au/statistics/dos-and-dop/")
+        sys.exit(1)
+
+    start = time.time()
+    items = load_item_map(args.item_map)
+    print(f"✓ Loaded {len(items):,} PBS item codes")
+
+    totals, names, rows, unmapped = aggregate(args.csv, items)
+    print(f"✓ Read {rows:,} rows ({unmapped:,} with unknown item codes)")
+
+    store = build_store(totals, names, args.csv)
+    with open(args.out, 'w') as f:
+        json.dump(store, f, separators=(',', ':'))
+
+    print(f"✓ Wrote {len(store['drugs']):,} drugs × {len(store['months'])} months to {args.out} "
+          f"({os.path.getsize(args.out) / 1024:.0f} KB) in {time.time() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
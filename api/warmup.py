@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Startup Warm-up
+Preloads data sources, drug-code lookups and prescribing pulls for a hot
+set of drug × country pairs, so the first requests after a deploy don't
+pay the upstream cost
+
+Run in the background from the app's startup event (readiness reported
+via /health), or as a pre-start command:
+    python warmup.py
+    python warmup.py --countries UK,AU --top-n 5
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Warm-up configuration (environment)
+WARMUP_ENABLED = os.environ.get('WARMUP_ENABLED', '1').lower() not in ('0', 'false', 'no')
+WARMUP_COUNTRIES = os.environ.get('WARMUP_COUNTRIES', 'UK,AU')
+WARMUP_TOP_N = int(os.environ.get('WARMUP_TOP_N', '3'))  # drugs per country from TOP_DRUGS
+WARMUP_WORKERS = int(os.environ.get('WARMUP_WORKERS', '2'))
+# Report ready after this many seconds even if warm-up hasn't finished,
+# so a slow upstream can't keep the instance out of rotation forever
+WARMUP_TIMEOUT = float(os.environ.get('WARMUP_TIMEOUT', '300'))
+
+
+def get_hot_set(countries: str = WARMUP_COUNTRIES, top_n: int = WARMUP_TOP_N) -> List[Tuple[str, str]]:
+    """(country, drug_name) pairs to warm: the first top_n TOP_DRUGS per country"""
+    from scripts.aggregate_country_data import TOP_DRUGS
+
+    hot_set = []
+    for country in [c.strip().upper() for c in countries.split(',') if c.strip()]:
+        for drug_name in TOP_DRUGS.get(country, [])[:top_n]:
+            hot_set.append((country, drug_name))
+    return hot_set
+
+
+@dataclass
+class WarmupState:
+    """Progress of the warm-up, as reported by /health"""
+    enabled: bool = WARMUP_ENABLED
+    status: str = "pending"  # pending, running, completed, disabled
+    total: int = 0
+    done: int = 0
+    failed: List[str] = field(default_factory=list)
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    timeout: float = WARMUP_TIMEOUT
+    _started: Optional[float] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def ready(self) -> bool:
+        """True once the hot set is warm (or warm-up is off / timed out)"""
+        if self.status in ("completed", "disabled"):
+            return True
+        return self._started is not None and time.time() - self._started > self.timeout
+
+    def to_dict(self) -> Dict:
+        return {
+            'status': self.status,
+            'ready': self.ready,
+            'total': self.total,
+            'done': self.done,
+            'failed': list(self.failed),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
+
+
+WARMUP_STATE = WarmupState()
+
+
+def run_warmup(hot_set: Optional[List[Tuple[str, str]]] = None,
+               workers: int = WARMUP_WORKERS,
+               state: WarmupState = WARMUP_STATE) -> WarmupState:
+    """
+    Warm the hot set (blocking)
+
+    Each pair resolves its drug code and pulls the latest period, which
+    constructs the country's data source and fills its caches. These
+    layers are shared by every /analyze request whatever the company;
+    the analysis result cache is keyed on company too, so it's left to
+    real requests. A failed pair is recorded and doesn't block readiness.
+    """
+    from routes import get_data_source
+
+    if hot_set is None:
+        hot_set = get_hot_set()
+
+    with state._lock:
+        state.status = "running"
+        state.total = len(hot_set)
+        state.done = 0
+        state.failed = []
+        state.started_at = datetime.now()
+        state._started = time.time()
+
+    logger.info("Warm-up started: %d drug × country pulls (%d workers)", len(hot_set), workers)
+
+    def warm(country, drug_name):
+        data_source = get_data_source(country)
+        drug_code = data_source.find_drug_code(drug_name)
+        if not drug_code:
+            raise LookupError(f"No code found for {drug_name}")
+        data_source.get_prescribing_data(drug_code, data_source.get_latest_period())
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(warm, country, drug_name): (country, drug_name)
+            for country, drug_name in hot_set
+        }
+        for future in as_completed(futures):
+            country, drug_name = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                logger.warning("Warm-up %s/%s failed: %s", country, drug_name, e)
+                with state._lock:
+                    state.failed.append(f"{country}/{drug_name}")
+            with state._lock:
+                state.done += 1
+
+    with state._lock:
+        state.status = "completed"
+        state.completed_at = datetime.now()
+
+    elapsed = (state.completed_at - state.started_at).total_seconds()
+    logger.info("Warm-up complete in %.1fs (%d failed)", elapsed, len(state.failed))
+    return state
+
+
+def start_background_warmup(state: WarmupState = WARMUP_STATE) -> Optional[threading.Thread]:
+    """Start the warm-up on a daemon thread (no-op when disabled)"""
+    if not state.enabled:
+        state.status = "disabled"
+        return None
+
+    # Readiness clock starts now, not when the thread gets scheduled
+    state._started = time.time()
+    thread = threading.Thread(target=run_warmup, kwargs={'state': state},
+                              name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Warm data source caches for the hot drug set')
+    parser.add_argument('--countries', default=WARMUP_COUNTRIES,
+                        help='Comma-separated country codes (default: %(default)s)')
+    parser.add_argument('--top-n', type=int, default=WARMUP_TOP_N,
+                        help='Drugs per country from TOP_DRUGS (default: %(default)s)')
+    parser.add_argument('--workers', type=int, default=WARMUP_WORKERS,
+                        help='Concurrent pulls (default: %(default)s)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    state = run_warmup(get_hot_set(args.countries, args.top_n), workers=args.workers)
+    sys.exit(1 if state.failed and len(state.failed) == state.total else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,134 +2,273 @@
 """
 Parse PBS XLSX file to extract state-level prescribing data
 Uses the main "Date of Supply" report (98MB XLSX)
+
+The workbook is streamed (openpyxl read-only, values only) so memory stays
+bounded, and converted once into a columnar cache next to it; later runs
+read the cache and skip XLSX parsing entirely.
 """
+import json
+import os
 import sys
+from array import array
 from openpyxl import load_workbook
 from collections import defaultdict
 import csv
 
+# Columnar cache: one binary file per column, string columns dictionary-encoded
+CACHE_VERSION = 1
+CACHE_CHUNK_ROWS = 100_000  # rows buffered per column before appending to disk
+CACHE_COLUMNS = (
+    ('month', 'I'),   # index into meta['months']
+    ('item', 'I'),    # index into meta['items']
+    ('state', 'I'),   # index into meta['states']
+    ('rx', 'q'),
+    ('cost', 'd'),
+)
+
 def analyze_xlsx_structure(xlsx_path):
-    """Analyze XLSX file structure to understand the data"""
+    """Analyze XLSX file structure to understand the data (reads only the first rows)"""
     print("="*80)
     print("PBS XLSX File Structure Analysis")
     print("="*80)
     
-    print(f"\nLoading workbook: {xlsx_path}")
-    print("(This may take 1-2 minutes for large files...)")
+    print(f"\nOpening workbook (read-only): {xlsx_path}")
     
     wb = load_workbook(xlsx_path, read_only=True, data_only=True)
+    try:
+        print(f"Sheet names: {wb.sheetnames}")
+        
+        # Analyze first sheet
+        first_sheet = wb[wb.sheetnames[0]]
+        print(f"\nAnalyzing sheet: {first_sheet.title}")
+        
+        rows = first_sheet.iter_rows(max_row=4, values_only=True)
+        headers = list(next(rows, ()))
+        
+        print(f"\nColumns ({len(headers)}):")
+        for i, header in enumerate(headers, 1):
+            print(f"  {i}. {header}")
+        
+        # Sample first few data rows
+        print(f"\nSample data (first 3 rows):")
+        for row_idx, row in enumerate(rows, 1):
+            print(f"\nRow {row_idx}:")
+            for header, value in zip(headers, row):
+                print(f"  {header}: {value}")
+    finally:
+        wb.close()
     
-    print(f"\n✓ Workbook loaded")
-    print(f"Sheet names: {wb.sheetnames}")
+    return headers
+
+def find_columns(headers):
+    """Column indices for month, item, state, prescriptions and cost (None if missing)"""
+    def first_present(*names):
+        for name in names:
+            if name in headers:
+                return headers.index(name)
+        return None
     
-    # Analyze first sheet
-    first_sheet = wb[wb.sheetnames[0]]
+    columns = {
+        'month': first_present('MONTH_OF_SUPPLY', 'Supply Month'),
+        'item': first_present('ITEM_CODE', 'PBS Item Code'),
+        'state': first_present('STATE', 'State', 'STATE_CODE', 'State Code', 'JURISDICTION'),
+        'rx': first_present('PRESCRIPTIONS', 'Scripts'),
+        'cost': first_present('TOTAL_COST', 'Total Cost'),
+    }
     
-    print(f"\nAnalyzing sheet: {first_sheet.title}")
+    missing = [name for name, index in columns.items() if index is None]
+    if missing:
+        if 'state' in missing:
+            print(f"\n⚠️  WARNING: No state column found!")
+        print(f"\n❌ Missing columns: {', '.join(missing)}")
+        print(f"Available columns: {headers}")
+        return None
     
-    # Get headers (first row)
-    headers = []
-    for cell in first_sheet[1]:
-        headers.append(cell.value)
+    print(f"\n✓ Found columns:")
+    for name, index in columns.items():
+        print(f"  {name}: {headers[index]} (col {index})")
+    return columns
+
+def default_cache_dir(xlsx_path):
+    return os.path.splitext(xlsx_path)[0] + '_columns'
+
+def _source_signature(xlsx_path):
+    stat = os.stat(xlsx_path)
+    return {'source': os.path.basename(xlsx_path), 'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+
+def load_cache_meta(xlsx_path, cache_dir):
+    """Cache metadata if the cache was built from this exact workbook, else None"""
+    try:
+        with open(os.path.join(cache_dir, 'meta.json')) as f:
+            meta = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    
+    if meta.get('version') != CACHE_VERSION or meta.get('signature') != _source_signature(xlsx_path):
+        return None
+    return meta
+
+def stream_xlsx_to_cache(xlsx_path, cache_dir, on_row=None):
+    """
+    Stream every data row of the workbook into the columnar cache
+    
+    Rows are read with values_only in read-only mode and appended to the
+    column files in chunks, so memory holds one chunk plus the (small)
+    month/item/state dictionaries. on_row(month, item, state, rx, cost) is
+    called for each row, so callers can filter and aggregate in the same pass.
+    
+    Returns the cache metadata, or None if the sheet lacks required columns.
+    """
+    wb = load_workbook(xlsx_path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        headers = list(next(rows, ()))
+        columns = find_columns(headers)
+        if columns is None:
+            return None
+        month_col, item_col, state_col = columns['month'], columns['item'], columns['state']
+        rx_col, cost_col = columns['rx'], columns['cost']
+        
+        dictionaries = {'month': {}, 'item': {}, 'state': {}}
+        months, items, states = dictionaries['month'], dictionaries['item'], dictionaries['state']
+        
+        # Build into a temporary directory; it only replaces the cache once complete
+        tmp_dir = cache_dir + '.tmp'
+        os.makedirs(tmp_dir, exist_ok=True)
+        files = {name: open(os.path.join(tmp_dir, f"{name}.bin"), 'wb') for name, _ in CACHE_COLUMNS}
+        chunk = {name: array(typecode) for name, typecode in CACHE_COLUMNS}
+        
+        def flush():
+            for name, _ in CACHE_COLUMNS:
+                chunk[name].tofile(files[name])
+                del chunk[name][:]
+        
+        row_count = 0
+        skipped = 0
+        try:
+            for row in rows:
+                try:
+                    item = str(row[item_col]).strip() if row[item_col] else ""
+                    month = str(row[month_col])
+                    state = str(row[state_col]).strip() if row[state_col] else "UNK"
+                    rx = int(row[rx_col]) if row[rx_col] else 0
+                    cost = float(row[cost_col]) if row[cost_col] else 0.0
+                except (TypeError, ValueError, IndexError):
+                    # Skip problematic rows
+                    skipped += 1
+                    continue
+                
+                chunk['month'].append(months.setdefault(month, len(months)))
+                chunk['item'].append(items.setdefault(item, len(items)))
+                chunk['state'].append(states.setdefault(state, len(states)))
+                chunk['rx'].append(rx)
+                chunk['cost'].append(cost)
+                if on_row:
+                    on_row(month, item, state, rx, cost)
+                
+                row_count += 1
+                if row_count % CACHE_CHUNK_ROWS == 0:
+                    flush()
+                    if row_count % 1_000_000 == 0:
+                        print(f"  Streamed {row_count:,} rows...")
+            flush()
+        finally:
+            for f in files.values():
+                f.close()
+    finally:
+        wb.close()
     
-    print(f"\nColumns ({len(headers)}):")
-    for i, header in enumerate(headers, 1):
-        print(f"  {i}. {header}")
+    meta = {
+        'version': CACHE_VERSION,
+        'signature': _source_signature(xlsx_path),
+        'rows': row_count,
+        'skipped': skipped,
+        'columns': dict(CACHE_COLUMNS),
+        'months': list(months),
+        'items': list(items),
+        'states': list(states),
+    }
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
     
-    # Sample first few data rows
-    print(f"\nSample data (first 3 rows):")
-    for row_idx, row in enumerate(first_sheet.iter_rows(min_row=2, max_row=4), 1):
-        print(f"\nRow {row_idx}:")
-        for i, cell in enumerate(row):
-            if i < len(headers):
-                print(f"  {headers[i]}: {cell.value}")
+    if os.path.isdir(cache_dir):
+        for name in os.listdir(cache_dir):
+            os.remove(os.path.join(cache_dir, name))
+        os.rmdir(cache_dir)
+    os.rename(tmp_dir, cache_dir)
     
-    return wb, headers
+    print(f"✓ Columnar cache written to {cache_dir} ({row_count:,} rows, {skipped:,} skipped)")
+    return meta
+
+def iter_cache_chunks(cache_dir, meta, chunk_rows=CACHE_CHUNK_ROWS):
+    """Yield {column: array} chunks from the columnar cache (bounded memory)"""
+    files = {name: open(os.path.join(cache_dir, f"{name}.bin"), 'rb') for name in meta['columns']}
+    try:
+        remaining = meta['rows']
+        while remaining:
+            n = min(chunk_rows, remaining)
+            chunk = {}
+            for name, typecode in meta['columns'].items():
+                chunk[name] = array(typecode)
+                chunk[name].fromfile(files[name], n)
+            remaining -= n
+            yield chunk
+    finally:
+        for f in files.values():
+            f.close()
 
-def extract_metformin_state_data(xlsx_path, drug_codes):
+def extract_metformin_state_data(xlsx_path, drug_codes, cache_dir=None):
     """
     Extract state-level metformin data from PBS XLSX
     
     Args:
         xlsx_path: Path to PBS XLSX file
         drug_codes: Set of PBS item codes for metformin
+        cache_dir: Columnar cache directory (default: <xlsx name>_columns/)
     """
     print("\n" + "="*80)
     print("Extracting Metformin State Data")
     print("="*80)
     
-    print(f"\nLoading workbook...")
-    wb = load_workbook(xlsx_path, read_only=True, data_only=True)
-    sheet = wb.active
-    
-    # Get headers
-    headers = [cell.value for cell in sheet[1]]
-    
-    # Find column indices
-    try:
-        month_col = headers.index('MONTH_OF_SUPPLY') if 'MONTH_OF_SUPPLY' in headers else headers.index('Supply Month')
-        item_col = headers.index('ITEM_CODE') if 'ITEM_CODE' in headers else headers.index('PBS Item Code')
-        state_col = None
-        
-        # Look for state column (various possible names)
-        for possible_state in ['STATE', 'State', 'STATE_CODE', 'State Code', 'JURISDICTION']:
-            if possible_state in headers:
-                state_col = headers.index(possible_state)
-                break
-        
-        if state_col is None:
-            print(f"\n⚠️  WARNING: No state column found!")
-            print(f"Available columns: {headers}")
-            return None
-        
-        rx_col = headers.index('PRESCRIPTIONS') if 'PRESCRIPTIONS' in headers else headers.index('Scripts')
-        cost_col = headers.index('TOTAL_COST') if 'TOTAL_COST' in headers else headers.index('Total Cost')
-        
-        print(f"\n✓ Found columns:")
-        print(f"  Month: {headers[month_col]} (col {month_col})")
-        print(f"  Item: {headers[item_col]} (col {item_col})")
-        print(f"  State: {headers[state_col]} (col {state_col})")
-        print(f"  Prescriptions: {headers[rx_col]} (col {rx_col})")
-        print(f"  Cost: {headers[cost_col]} (col {cost_col})")
-        
-    except ValueError as e:
-        print(f"\n❌ Error finding columns: {e}")
-        print(f"Available columns: {headers}")
-        return None
-    
-    # Aggregate data by state and month
-    print(f"\nProcessing rows (this may take a few minutes)...")
+    cache_dir = cache_dir or default_cache_dir(xlsx_path)
     state_month_data = defaultdict(lambda: defaultdict(lambda: {'rx': 0, 'cost': 0.0}))
+    matched = 0
     
-    row_count = 0
-    metformin_rows = 0
-    
-    for row in sheet.iter_rows(min_row=2):
-        row_count += 1
+    meta = load_cache_meta(xlsx_path, cache_dir)
+    if meta is not None:
+        print(f"\nReading columnar cache {cache_dir} (skipping XLSX parsing)...")
+        wanted = {index for index, code in enumerate(meta['items']) if code in drug_codes}
+        months, states = meta['months'], meta['states']
         
-        if row_count % 100000 == 0:
-            print(f"  Processed {row_count:,} rows, found {metformin_rows:,} metformin records...")
+        for chunk in iter_cache_chunks(cache_dir, meta):
+            month_col, state_col = chunk['month'], chunk['state']
+            rx_col, cost_col = chunk['rx'], chunk['cost']
+            for i, item in enumerate(chunk['item']):
+                if item in wanted:
+                    data = state_month_data[states[state_col[i]]][months[month_col[i]]]
+                    data['rx'] += rx_col[i]
+                    data['cost'] += cost_col[i]
+                    matched += 1
+        row_count = meta['rows']
+    else:
+        print(f"\nStreaming workbook into columnar cache (first run only)...")
         
-        try:
-            item_code = str(row[item_col].value).strip() if row[item_col].value else ""
-            
-            if item_code in drug_codes:
-                month = str(row[month_col].value)
-                state = str(row[state_col].value).strip() if row[state_col].value else "UNK"
-                rx = int(row[rx_col].value) if row[rx_col].value else 0
-                cost = float(row[cost_col].value) if row[cost_col].value else 0.0
-                
-                state_month_data[state][month]['rx'] += rx
-                state_month_data[state][month]['cost'] += cost
-                metformin_rows += 1
-                
-        except Exception as e:
-            # Skip problematic rows
-            continue
+        def on_row(month, item, state, rx, cost):
+            nonlocal matched
+            if item in drug_codes:
+                data = state_month_data[state][month]
+                data['rx'] += rx
+                data['cost'] += cost
+                matched += 1
+        
+        meta = stream_xlsx_to_cache(xlsx_path, cache_dir, on_row)
+        if meta is None:
+            return None
+        row_count = meta['rows']
     
     print(f"\n✓ Processing complete")
     print(f"  Total rows processed: {row_count:,}")
-    print(f"  Metformin records found: {metformin_rows:,}")
+    print(f"  Metformin records found: {matched:,}")
     print(f"  States found: {len(state_month_data)}")
     
     return state_month_data
@@ -170,15 +309,18 @@ def main():
     
     print(f"✓ Found {len(metformin_codes)} metformin item codes")
     
-    # First, analyze structure
-    print(f"\nStep 1: Analyzing XLSX structure...")
-    try:
-        wb, headers = analyze_xlsx_structure(xlsx_file)
-        wb.close()
-    except FileNotFoundError:
+    if not os.path.exists(xlsx_file):
         print(f"\n❌ File not found: {xlsx_file}")
         print(f"Waiting for download to complete...")
         return
+    
+    # First, analyze structure (not needed once the columnar cache exists)
+    print(f"\nStep 1: Analyzing XLSX structure...")
+    try:
+        if load_cache_meta(xlsx_file, default_cache_dir(xlsx_file)) is not None:
+            print(f"✓ Columnar cache is current, skipping XLSX")
+        else:
+            analyze_xlsx_structure(xlsx_file)
     except Exception as e:
         print(f"\n❌ Error analyzing file: {e}")
         import traceback